@@ -1,20 +1,26 @@
 import asyncio
 import os
-from fastapi import FastAPI, Query
-from urllib.parse import urlparse
+import sys
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from dotenv import load_dotenv
-import ollama 
 
-app = FastAPI(title="Scholarship Foundation Crawler", version="2.0")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from frontier import PriorityFrontier, VisitedStore, same_site
+from page_store import PageStore, conditional_navigation
+from html_extract import extract_html, shutdown_pool
+from llm_gateway import get_gateway
+from prefilter import RelevancePrefilter
+from crawl_jobs import CrawlJob, CrawlJobManager
+import metrics
 
 load_dotenv("apikey.env")
 
-# 후보 셀렉터
-CONTENT_SELECTORS = [
-    "main", "article", "#content", ".content", ".post",
-    ".program", ".board-view", "#container"
-]
+# 페이지 사이 대기 (대상 사이트 부하 방지, 초)
+CRAWL_DELAY = float(os.getenv("CRAWL_DELAY", "0.3"))
 
 # URL 필터링 규칙
 EXCLUDE_KEYWORDS_URL = [
@@ -27,106 +33,65 @@ def is_excluded_url(url: str) -> bool:
     lower_url = url.lower()
     return any(k in lower_url for k in EXCLUDE_KEYWORDS_URL)
 
-# 텍스트 필터링 규칙
-def is_meaningless_text(text: str):
-    text = text.strip()
-    exclude_phrases = [
-        "인사말", "설립취지", "연혁", "소개합니다", "아이디", "비밀번호",
-        "이사회", "정보마당", "찾아오시는 길", "오시는 길", "공지사항", "조직도", "일반공지", "영상"
-    ]
-    matched = [p for p in exclude_phrases if p in text]
-    if matched:
-        return True, f"[스킵 단어] {', '.join(matched)}"
-    return False, ""
-
-async def fetch_rendered(page, url):
-    try:
-        await page.goto(url, wait_until="networkidle", timeout=15000)
-        await page.wait_for_timeout(1500)
-    except PlaywrightTimeoutError:
-        await page.goto(url, wait_until="domcontentloaded", timeout=15000)
-
-    await page.eval_on_selector_all(
-        "header, footer, script, style, noscript",
-        "els => els.forEach(e => e.remove())"
-    )
-
-    text = ""
-    for sel in CONTENT_SELECTORS:
-        try:
-            node = await page.query_selector(sel)
-            if node:
-                await node.eval_on_selector_all(
-                    "nav, aside, .menu, .sidebar",
-                    "els => els.forEach(e => e.remove())"
-                )
-                text = await node.inner_text()
-                if len(text.strip()) > 100:
-                    break
-        except Exception:
-            continue
-
-    if not text:
-        body = await page.locator("body").element_handle()
-        if body:
-            await body.eval_on_selector_all(
-                "nav, aside, .menu, .sidebar",
-                "els => els.forEach(e => e.remove())"
-            )
-            text = await body.inner_text()
-
-    title = await page.title()
-    text = " ".join(text.split())
-
-    skip, reason = is_meaningless_text(text)
-    if skip:
-        print(f"[스킵됨] {url} | 이유: {reason} | 텍스트 길이: {len(text)}")
-        return title.strip(), ""
-    else:
-        print(f"[수집됨] {url} | 텍스트 길이: {len(text)}")
+# 텍스트 필터링 규칙 (본문에 있으면 스킵, 검사는 html_extract 워커에서)
+EXCLUDE_TEXT_PHRASES = [
+    "인사말", "설립취지", "연혁", "소개합니다", "아이디", "비밀번호",
+    "이사회", "정보마당", "찾아오시는 길", "오시는 길", "공지사항", "조직도", "일반공지", "영상"
+]
 
-    return title.strip(), text[:1500]
+@metrics.timed("fetch_rendered", crawler="corporate")
+async def fetch_rendered(page, url, pages):
+    """렌더링 후 HTML 한 번만 가져와 본문 추출은 프로세스 풀에서. (제목, 스니펫, 헤더, 링크) 반환.
+    이동 요청에 이전 검증자를 붙여, 서버가 304를 주면 렌더링/추출 없이 None 반환"""
+    async with conditional_navigation(page, url, pages):
+        try:
+            response = await page.goto(url, wait_until="networkidle", timeout=15000)
+            if response and response.status == 304:
+                return None
+            await page.wait_for_timeout(1500)
+        except PlaywrightTimeoutError:
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+    if response and response.status == 304:
+        return None
+    headers = response.headers if response else {}
 
+    html = await page.content()
+    page_info = await extract_html(html, page.url, EXCLUDE_TEXT_PHRASES)
+    if page_info["skipped"]:
+        print(f"[스킵됨] {url} | 이유: {page_info['skipped']} | 텍스트 길이: {page_info['length']}")
+    else:
+        print(f"[수집됨] {url} | 텍스트 길이: {page_info['length']}")
+    return page_info["title"], page_info["snippet"], headers, page_info["anchors"]
 
-async def filter_with_ollama(item):
-    """
-    Ollama를 사용하여 '지원사업 공고' 관련 여부를 판별하고 요약 생성
-    """
-    if not item.get("snippet"):
-        return None
 
-    prompt = f"""
+# 페이지마다 같은 판정 지시문 (system 메시지로 맨 앞에 두어 모델 서버가 접두부 KV 캐시를 재사용)
+FILTER_INSTRUCTION = """
 다음 웹페이지 본문이 단순한 '재단소개, 인사말, 연혁, 메뉴구조'인지,
 아니면 실제 '지원사업, 장학, 복지, 프로그램 모집 공고'인지 구분하세요.
 
 단순 소개형이면 "IGNORE"만 출력하세요.
-지원사업 관련이면 아래 형식으로 요약하세요:
+지원사업 관련이면 아래 형식으로 요약하세요 ([신청링크]에는 주어진 URL):
 
 [프로그램명]: ...
 [지원대상]: ...
 [지원내용]: ...
 [신청기간]: ...
-[신청링크]: {item['url']}
-
-본문:
-{item['snippet']}
+[신청링크]: ...
 """
 
-    try:
-        response = await asyncio.to_thread(
-            ollama.chat,
-            model="gpt-oss:20b",
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        output_text = ""
-        if "message" in response:
-            output_text = response["message"]["content"]
-        elif "messages" in response:
-            output_text = response["messages"][-1]["content"]
-        else:
-            output_text = str(response)
 
+async def filter_with_ollama(item):
+    """
+    Ollama를 사용하여 '지원사업 공고' 관련 여부를 판별하고 요약 생성
+    """
+    if not item.get("snippet"):
+        return None
+
+    try:
+        output_text = await get_gateway().chat([
+            {"role": "system", "content": FILTER_INSTRUCTION},
+            {"role": "user", "content": f"URL: {item['url']}\n\n본문:\n{item['snippet']}"},
+        ])
         output_text = output_text.strip()
 
         print(f"[Ollama 응답] {item['url']} | {output_text[:100]}...")
@@ -143,58 +108,206 @@ async def filter_with_ollama(item):
         return None
 
 # ------------------------
-# 크롤링 메인 엔드포인트
+# 공용 브라우저
 # ------------------------
-@app.get("/crawl_playwright")
-async def crawl_playwright(
-    start_url: str = Query(..., description="시작 URL"),
-    max_depth: int = Query(2, ge=1, le=4, description="최대 탐색 깊이")
-):
-    visited = set()
-    results = []
-    queue = [(start_url, 0)]
+class SharedBrowser:
+    """프로세스에서 Chromium 하나만 띄우고 작업마다 컨텍스트만 새로 만듦"""
+
+    def __init__(self):
+        self.playwright = None
+        self.browser = None
+        self.loop = None
+        self.lock = asyncio.Lock()
+
+    async def get(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # 다른 이벤트 루프(asyncio.run 반복)에서 만든 브라우저는 쓸 수 없음
+            self.playwright = self.browser = None
+            self.loop = loop
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if self.browser is None or not self.browser.is_connected():
+                if self.playwright is None:
+                    self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(headless=True)
+            return self.browser
+
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.close()
+        if self.playwright is not None:
+            await self.playwright.stop()
+        self.playwright = self.browser = self.loop = None
+
+
+shared_browser = SharedBrowser()
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent="ScholarshipBot/1.1")
-        page = await context.new_page()
 
-        while queue:
-            url, depth = queue.pop(0)
-            if url in visited or depth > max_depth:
-                continue
-            visited.add(url)
+# ------------------------
+# 크롤링 실행 (작업 워커에서 호출)
+# ------------------------
+async def crawl_site(job: CrawlJob):
+    """깊이 제한 크롤링 + 사전필터 + Ollama 판정.
+    페이지를 추출하는 즉시 판정 태스크를 띄워, 크롤링이 끝나기 전에도 판정이 끝난 결과부터 job에 추가"""
+    start_url = job.start_url
+    visited = VisitedStore()
+    pages = PageStore()
+    frontier = PriorityFrontier(start_url, job.max_depth, visited, refresh=job.refresh)
+    # 키워드/정규식 점수가 낮거나 중복인 스니펫은 모델에 보내지 않음
+    prefilter = RelevancePrefilter()
+    judging = []
+
+    async def judge(item):
+        res = await filter_with_ollama(item)
+        if res is not None:
+            job.add_result(res)
+        if "error" not in item:
+            pages.save_result(item["url"], res["filtered_snippet"] if res else "IGNORE")
+
+    def submit(item):
+        keep, reason = prefilter.check(item["snippet"])
+        if not keep:
+            print(f"[사전필터 제외] {item['url']} | {reason}")
+            return
+        # 게이트웨이 세마포어가 동시 요청 수를 제한하므로 태스크를 바로 띄워도 모델이 몰리지 않음
+        judging.append(asyncio.create_task(judge(item)))
+
+    browser = await shared_browser.get()
+    context = await browser.new_context(user_agent="ScholarshipBot/1.1")
+    try:
+        page = await context.new_page()
 
+        while frontier:
+            url, depth = frontier.pop()
             if is_excluded_url(url):
                 continue
+            job.pages += 1
+
+            # TTL 안에 가져온 페이지는 다시 가져오지 않고, 서버가 304를 주면 렌더링/추출/LLM을 건너뜀.
+            # 두 경우 모두 저장된 링크와 판정으로 탐색을 이어감
+            cached = pages.get(url) if frontier.is_fresh(url) else None
+            if cached is None:
+                frontier.mark_visited(url)
+                try:
+                    fetched = await fetch_rendered(page, url, pages)
+                except Exception as e:
+                    print(f"[렌더링 오류] {url} | {e}")
+                    fetched = ("", "", None, [])
+                if fetched is None:
+                    cached = pages.get(url)
+                    fetched = ("", "", None, [])
+            if cached is not None:
+                print(f"[변경없음] {url}")
+                frontier.record(bool(cached["result"]) and cached["result"] != "IGNORE")
+                if cached["result"] and cached["result"] != "IGNORE":
+                    job.add_result({"url": url, "title": cached["title"],
+                                    "filtered_snippet": cached["result"], "unchanged": True})
+                for href, text in cached["links"]:
+                    frontier.push(href, depth + 1, anchor_text=text)
+                continue
 
-            try:
-                title, snippet = await fetch_rendered(page, url)
+            title, snippet, headers, anchors = fetched
+
+            # 앵커 텍스트와 함께 넣어 신청/모집 관련 링크가 먼저 방문되도록 함
+            links = [
+                [href, text] for href, text in anchors
+                if href and same_site(href, start_url) and not is_excluded_url(href)
+            ]
+            for href, text in links:
+                frontier.push(href, depth + 1, anchor_text=text)
+
+            frontier.record(bool(snippet) and frontier.scorer.text_score(snippet) > 0)
+
+            if headers is not None:
+                previous = pages.get(url)
+                changed = pages.save(url, title, snippet, links, headers)
                 if snippet:
-                    results.append({"url": url, "title": title, "snippet": snippet})
-            except Exception as e:
-                results.append({"url": url, "error": str(e)})
-
-            try:
-                anchors = await page.eval_on_selector_all("a[href]", "els => els.map(e=>e.href)")
-            except Exception:
-                anchors = []
-
-            for href in anchors:
-                if not href:
-                    continue
-                if urlparse(href).netloc == urlparse(start_url).netloc:
-                    normalized = href.split("#")[0]
-                    if normalized not in visited and not is_excluded_url(normalized):
-                        queue.append((normalized, depth + 1))
-            await asyncio.sleep(0.3)
-
-        await browser.close()
-
-    filtered_results = await asyncio.gather(*[filter_with_ollama(item) for item in results])
-    filtered_results = [item for item in filtered_results if item is not None]
-
-    return {"count": len(filtered_results), "data": filtered_results}
+                    # 본문 해시가 같으면 이전 판정 결과를 그대로 사용 (모델 호출 없음)
+                    if not changed and previous and previous["result"] is not None:
+                        if previous["result"] != "IGNORE":
+                            job.add_result({"url": url, "title": title, "snippet": snippet,
+                                            "filtered_snippet": previous["result"], "unchanged": True})
+                    else:
+                        submit({"url": url, "title": title, "snippet": snippet})
+            await asyncio.sleep(CRAWL_DELAY)
+
+        if frontier.exhausted():
+            print(f"[조기종료] {start_url} | 방문 {frontier.pages}개, 유효 {frontier.useful}개")
+
+        await asyncio.gather(*judging)
+        print(f"[사전필터 통계] {prefilter.stats()}")
+        print(f"[Ollama 통계] {get_gateway().stats()}")
+    finally:
+        for task in judging:
+            task.cancel()
+        await context.close()
+        visited.close()
+        pages.close()
+
+
+crawl_jobs = CrawlJobManager(crawl_site)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await crawl_jobs.close()
+    await shared_browser.close()
+    shutdown_pool()
+
+
+app = FastAPI(title="Scholarship Foundation Crawler", version="2.0", lifespan=lifespan)
+
+
+# ------------------------
+# 크롤링 작업 API
+# ------------------------
+class CrawlRequest(BaseModel):
+    start_url: str = Field(..., description="시작 URL")
+    max_depth: int = Field(2, ge=1, le=4, description="최대 탐색 깊이")
+    refresh: bool = Field(False, description="캐시된 결과가 있어도 다시 크롤링")
+
+
+@app.post("/crawl_jobs", status_code=202)
+async def submit_crawl_job(req: CrawlRequest):
+    """크롤링 작업 제출. 같은 start_url이 진행 중이거나 최근에 끝났으면 그 작업을 돌려줌"""
+    job = crawl_jobs.submit(req.start_url, req.max_depth, refresh=req.refresh)
+    return {"id": job.id, "status": job.status}
+
+
+@app.get("/crawl_jobs")
+async def crawl_job_stats():
+    """워커 수와 상태별 작업 수"""
+    return crawl_jobs.stats()
+
+
+@app.get("/crawl_jobs/{job_id}")
+async def get_crawl_job(job_id: str, offset: int = Query(0, ge=0, description="이미 받은 결과 수")):
+    """작업 상태 + offset 이후 결과 (진행 중에도 판정이 끝난 결과부터 포함)"""
+    job = crawl_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    return job.to_dict(offset)
+
+
+@app.get("/crawl_playwright")
+async def crawl_playwright(
+    start_url: str = Query(..., description="시작 URL"),
+    max_depth: int = Query(2, ge=1, le=4, description="최대 탐색 깊이")
+):
+    """기존 동기식 호출 (작업을 제출하고 끝날 때까지 기다림). 긴 크롤링은 /crawl_jobs 사용"""
+    job = crawl_jobs.submit(start_url, max_depth)
+    await job.done.wait()
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    return {"count": len(job.results), "data": job.results}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """크롤러 프로세스의 Prometheus 텍스트 형식 지표"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -13,7 +13,15 @@ if parent_dir not in sys.path:
 dotenv_path = os.path.join(parent_dir, "apikey.env")
 load_dotenv(dotenv_path)
 
-from db import engine, 복지서비스, 카테고리
+from db import engine, 복지서비스, save_categories
+from catalog import notify_changed
+from page_store import PageStore
+from crawl_runs import iter_chunks, remove_run
+from prefilter import RelevancePrefilter
+from dedup import DedupIndex
+from jobs import JobStore, CLASSIFY_QUEUE
+from metrics import span, write_run_summary
+from sqlalchemy import select
 
 def _extract_text(res):
     try:
@@ -36,127 +44,215 @@ def _extract_text(res):
     except Exception:
         return str(res)
 
+# 사이트/페이지 단위 작업 큐 이름
+SITE_QUEUE = "mcp_sites"
+PAGE_QUEUE = "mcp_pages"
+
+def load_dedup_index() -> DedupIndex:
+    """DB에 이미 있는 서비스의 상세내용으로 유사 중복 색인 구성.
+    크롤링 스니펫(원문)과 비교되는 것은 주로 정부 수집분 원문이고, 이번 실행의 스니펫도 차례로 추가됨"""
+    index = DedupIndex()
+    try:
+        if getattr(engine, 'url').host:
+            with engine.connect() as conn:
+                rows = conn.execute(select(복지서비스.c.서비스ID, 복지서비스.c.상세내용))
+                for service_id, details in rows:
+                    index.add(service_id, details or "")
+    except Exception as e:
+        print("중복 색인 구성 실패:", repr(e))
+    return index
+
 async def log_handler(msg: LogMessage):
     print(f"[SERVER {msg.level.upper()}] {msg.data}")
 
+async def process_page(client, item, pages, prefilter, dedup, jobs=None):
+    """크롤링된 페이지 1건: 사전필터 → 검증 → 요약 → 제목·카테고리 → DB 저장.
+    jobs가 있으면 저장한 서비스ID를 분류 큐에 넣어 지원대상/참고사항 생성과 카테고리 분류를 맡김"""
+    url = item.get("url", "")
+    title = item.get("title", "")
+    snippet = item.get("snippet", "")
+
+    # 이전 실행 이후 내용이 바뀌지 않은 페이지는 검증/요약/저장 생략
+    if item.get("unchanged"):
+        print(f"변경 없음으로 건너뜀: 제목={title}, URL={url}")
+        return
+
+    # 신청 페이지 단서가 없거나 이미 본 스니펫이면 Gemini 검증 전에 제외
+    keep, reason = prefilter.check(snippet)
+    if not keep:
+        print(f"사전필터로 건너뜀: 제목={title}, URL={url}, 사유={reason}")
+        return
+
+    # 이미 저장된 정책(정부 수집분 원문) 또는 이번 실행에서 본 페이지 원문과 거의 같으면 검증/요약 호출 전에 제외
+    dup_id = dedup.add(url, snippet)
+    if dup_id:
+        print(f"유사 중복으로 건너뜀: URL={url}, 기존={dup_id}")
+        return
+
+    verify_res = await client.call_tool("verify_crawled_info", {"title": title, "snippet": snippet})
+    res_text = _extract_text(verify_res).strip().upper()
+    if res_text in ("VALID", "INVALID"):
+        pages.save_result(url, res_text)
+
+    if res_text == "VALID":
+        summary_res = await client.call_tool("summary_info", {"title": title, "snippet": snippet})
+        sum_text = _extract_text(summary_res).strip()
+
+        try:
+            # 서버측 도구 이름에 맞춰 호출
+            analysis_res = await client.call_tool("generate_title_and_category", {"summary": sum_text})
+            analysis_text = _extract_text(analysis_res).strip()
+        except Exception as e:
+            print("generate_title 호출 예외:", repr(e))
+            import traceback
+            traceback.print_exc()
+            analysis_text = ""
+
+        # JSON 파싱
+        try:
+            parsed = json.loads(analysis_text)
+            gen_title = parsed.get("generated_title", "")
+            cats = parsed.get("categories", [])
+            if isinstance(cats, list):
+                categories_csv = ",".join(cats)
+            else:
+                categories_csv = str(cats)
+            # DB 필드 매핑: 정책명은 생성된 제목, 상세내용은 요약문
+            policy_name = gen_title or title
+            policy_link = url
+            target = ""
+            note = ""
+            details = sum_text
+        except Exception:
+            # JSON 아닌 경우 fallback
+            gen_title = title
+            policy_name = title
+            policy_link = url
+            target = ""
+            note = ""
+            details = sum_text
+            categories_csv = ""
+
+        print(
+            f"title: {gen_title} \n policy_name: {policy_name} \n policy_link: {policy_link} \n taget: {target} \n note: {note} \n details: {details}\n"
+        )
+
+        # DB에 저장 (None 값은 빈 문자열로 대체)
+        service_id = uuid.uuid4().hex[:20]
+        # 안전하게 None -> '' 변환
+        def _s(v):
+            return v if v is not None else ""
+
+        policy_name = _s(policy_name)
+        policy_link = _s(policy_link)
+        target = _s(target)
+        note = _s(note)
+        details = _s(details)
+        categories_csv = _s(categories_csv)
+
+        # DB 연결 정보 확인: 엔진에 설정된 호스트가 없으면 연결 시도하지 않음
+        try:
+            host = None
+            try:
+                host = getattr(engine, 'url').host
+            except Exception:
+                # SQLAlchemy 버전 차이 또는 engine 객체에 url이 없을 수 있음
+                host = None
+
+            if not host:
+                print("DB 연결 정보가 설정되지 않았습니다 (DB_HOST 없음). 삽입을 건너뜁니다.")
+            else:
+                with span("db_insert"), engine.begin() as conn:
+                    conn.execute(
+                        복지서비스.insert().values(
+                            서비스ID=service_id,
+                            정책명=policy_name,
+                            링크=policy_link,
+                            지원대상=target,
+                            참고사항=note,
+                            상세내용=details
+                        )
+                    )
+
+                    # 카테고리 테이블에 분리된 카테고리 삽입 + 카테고리목록 갱신
+                    save_categories(conn, service_id, categories_csv)
+
+                print(f"DB에 저장됨: 서비스ID={service_id}")
+                if jobs is not None:
+                    jobs.requeue(CLASSIFY_QUEUE, [service_id])
+                notify_changed([service_id])
+        except Exception as e:
+            print("DB 저장 실패:", repr(e))
+    else:
+        print(f"검증 실패로 저장 건너뜀: 제목={title}, URL={url}, 결과={res_text}")
+
 async def main():
+    jobs = JobStore()
+    # 이어서 처리하는 것은 중단된 실행뿐. 지난 실행이 다 끝났으면(또는 --reset) 두 큐를 비우고
+    # 새로 검색해 이미 본 사이트까지 다시 크롤링 (바뀌지 않은 페이지는 PageStore로 LLM 단계 생략)
+    new_pass = "--reset" in sys.argv or not (jobs.has_unfinished(SITE_QUEUE) or jobs.has_unfinished(PAGE_QUEUE))
+    if new_pass:
+        jobs.reset(SITE_QUEUE)
+        jobs.reset(PAGE_QUEUE)
+
     async with Client("server.py", log_handler=log_handler) as client:
-        urls_json = await client.call_tool("search_sites_with_gemini", {})
-        urls = json.loads(urls_json.data)
-        data = [item["url"] for item in urls]
-        # data = ['']
-        results = await client.call_tool("crawl_from_search", { "urls": data, "max_depth": 2 })
-
-        text_data = results.content[0].text
-        parsed = json.loads(text_data)
-        count = parsed[0]["count"]
-        data = parsed[0]["data"]
-        for item in data:
-            url = item.get("url", "")
-            title = item.get("title", "")
-            snippet = item.get("snippet", "")
-
-            verify_res = await client.call_tool("verify_crawled_info", {"title": title, "snippet": snippet})
-            res_text = _extract_text(verify_res).strip().upper()
-
-            if res_text == "VALID":
-                summary_res = await client.call_tool("summary_info", {"title": title, "snippet": snippet})
-                sum_text = _extract_text(summary_res).strip()
-
-                try:
-                    # 서버측 도구 이름에 맞춰 호출
-                    analysis_res = await client.call_tool("generate_title_and_category", {"summary": sum_text})
-                    analysis_text = _extract_text(analysis_res).strip()
-                except Exception as e:
-                    print("generate_title 호출 예외:", repr(e))
-                    import traceback
-                    traceback.print_exc()
-                    analysis_text = ""
-
-                # JSON 파싱
-                try:
-                    parsed = json.loads(analysis_text)
-                    gen_title = parsed.get("generated_title", "")
-                    cats = parsed.get("categories", [])
-                    if isinstance(cats, list):
-                        categories_csv = ",".join(cats)
-                    else:
-                        categories_csv = str(cats)
-                    # DB 필드 매핑: 정책명은 생성된 제목, 상세내용은 요약문
-                    policy_name = gen_title or title
-                    policy_link = url
-                    target = ""
-                    note = ""
-                    details = sum_text
-                except Exception:
-                    # JSON 아닌 경우 fallback
-                    gen_title = title
-                    policy_name = title
-                    policy_link = url
-                    target = ""
-                    note = ""
-                    details = sum_text
-                    categories_csv = ""
-
-                print(
-                    f"title: {gen_title} \n policy_name: {policy_name} \n policy_link: {policy_link} \n taget: {target} \n note: {note} \n details: {details}\n"
-                )
-
-                # DB에 저장 (None 값은 빈 문자열로 대체)
-                service_id = uuid.uuid4().hex[:20]
-                # 안전하게 None -> '' 변환
-                def _s(v):
-                    return v if v is not None else ""
-
-                policy_name = _s(policy_name)
-                policy_link = _s(policy_link)
-                target = _s(target)
-                note = _s(note)
-                details = _s(details)
-                categories_csv = _s(categories_csv)
-
-                # DB 연결 정보 확인: 엔진에 설정된 호스트가 없으면 연결 시도하지 않음
-                try:
-                    host = None
-                    try:
-                        host = getattr(engine, 'url').host
-                    except Exception:
-                        # SQLAlchemy 버전 차이 또는 engine 객체에 url이 없을 수 있음
-                        host = None
-
-                    if not host:
-                        print("DB 연결 정보가 설정되지 않았습니다 (DB_HOST 없음). 삽입을 건너뜁니다.")
-                    else:
-                        with engine.begin() as conn:
-                            conn.execute(
-                                복지서비스.insert().values(
-                                    서비스ID=service_id,
-                                    정책명=policy_name,
-                                    링크=policy_link,
-                                    지원대상=target,
-                                    참고사항=note,
-                                    상세내용=details
-                                )
-                            )
-
-                            # 카테고리 테이블에 분리된 카테고리 삽입
-                            if categories_csv:
-                                for cat in categories_csv.split(','):
-                                    cat = cat.strip()
-                                    if not cat:
-                                        continue
-                                    conn.execute(
-                                        카테고리.insert().values(
-                                            서비스ID=service_id,
-                                            카테고리=cat
-                                        )
-                                    )
-
-                        print(f"DB에 저장됨: 서비스ID={service_id}")
-                except Exception as e:
-                    print("DB 저장 실패:", repr(e))
-            else:
-                print(f"검증 실패로 저장 건너뜀: 제목={title}, URL={url}, 결과={res_text}")
+        # 1) 사이트 검색: 이전 실행에서 남은 사이트/페이지 작업이 있으면 검색을 건너뛰고 이어서 진행
+        if new_pass:
+            async with span("mcp_search"):
+                urls_json = await client.call_tool("search_sites_with_gemini", {})
+            urls = json.loads(urls_json.data)
+            for item in urls:
+                jobs.enqueue(SITE_QUEUE, item["url"])
+
+        # 2) 사이트별 크롤링: 결과 페이지를 작업으로 저장한 뒤 사이트 완료 처리
+        for site, _ in jobs.iterate(SITE_QUEUE):
+            try:
+                async with span("mcp_crawl_site"):
+                    results = await client.call_tool("crawl_from_search", { "urls": [site], "max_depth": 2 })
+                parsed = json.loads(results.content[0].text)
+                if isinstance(parsed, dict) and parsed.get("error"):
+                    raise RuntimeError(parsed["error"])
+                if isinstance(parsed, dict) and "run" in parsed:
+                    # 서버가 결과를 실행 파일에 써 두고 핸들만 보냄 → 조금씩 읽어 페이지 작업으로 옮김
+                    for chunk in iter_chunks(parsed["path"]):
+                        jobs.enqueue_many(PAGE_QUEUE, [item.get("url", "") for item in chunk], chunk)
+                    remove_run(parsed["path"])
+                else:
+                    for crawled in parsed:
+                        for item in crawled.get("data", []):
+                            jobs.enqueue(PAGE_QUEUE, item.get("url", ""), item)
+                jobs.complete(SITE_QUEUE, site)
+            except Exception as e:
+                print(f"크롤링 실패: {site}, {e!r}")
+                jobs.fail(SITE_QUEUE, site, e)
+
+        # 3) 페이지별 검증/요약/저장
+        pages = PageStore()
+        prefilter = RelevancePrefilter()
+        dedup = load_dedup_index()
+        for key, item in jobs.iterate(PAGE_QUEUE):
+            try:
+                async with span("mcp_page"):
+                    await process_page(client, item, pages, prefilter, dedup, jobs)
+                jobs.complete(PAGE_QUEUE, key)
+            except Exception as e:
+                print(f"페이지 처리 실패: {key}, {e!r}")
+                jobs.fail(PAGE_QUEUE, key, e)
+
+        print(f"사전필터 통계: {prefilter.stats()}")
+        print(f"작업 현황: 사이트={jobs.counts(SITE_QUEUE)}, 페이지={jobs.counts(PAGE_QUEUE)}")
+
+        # 서버 프로세스(크롤링/Gemini) 계측도 함께 남김
+        try:
+            server_metrics = json.loads((await client.call_tool("metrics_snapshot", {})).data)
+        except Exception as e:
+            server_metrics = {"error": repr(e)}
+        write_run_summary("mcp_client", {
+            "server": server_metrics,
+            "prefilter": prefilter.stats(),
+            "jobs": {"sites": jobs.counts(SITE_QUEUE), "pages": jobs.counts(PAGE_QUEUE)},
+        })
+    jobs.close()
 
 
 if __name__ == "__main__":
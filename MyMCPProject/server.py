@@ -1,16 +1,25 @@
 import asyncio
-import requests
+import functools
 import os
 import re
 import json
-from urllib.parse import urlparse
+import sqlite3
+import sys
+import time
+from collections import deque
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 from fastmcp import FastMCP, Context
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-import ollama
-from google import genai
-from google.genai import types
-import traceback
+# playwright / google.genai / httpx / ollama 는 도구가 처음 쓸 때 import.
+# 서버는 클라이언트 세션마다 새로 뜨므로 시작 시간을 줄이기 위함
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from frontier import PriorityFrontier, VisitedStore, canonicalize_url, same_site
+from page_store import PageStore, conditional_navigation
+from crawl_runs import CrawlRun
+from html_extract import extract_html
+from llm_gateway import get_gateway
+from metrics import inc, registry, span, timed
 
 # ========================================
 # 환경설정
@@ -18,6 +27,26 @@ import traceback
 
 load_dotenv("api.env")
 GEMINI_KEY = os.getenv("GEMINI_API_KEY")
+# LLM_BACKEND=fake 면 Gemini 대신 fake_llm 사용 / GEMINI_BASE_URL 로 HTTP 대역 서버 지정 가능
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")
+
+# URL 검사: 기본 대기 시간 / 느린 사이트 재시도 때의 상한 (초), 동시 검사 수
+URL_CHECK_TIMEOUT = float(os.getenv("URL_CHECK_TIMEOUT", "3"))
+URL_CHECK_MAX_TIMEOUT = float(os.getenv("URL_CHECK_MAX_TIMEOUT", "10"))
+URL_CHECK_CONCURRENCY = int(os.getenv("URL_CHECK_CONCURRENCY", "16"))
+
+# 사이트 검색: 1이면 지역/분야/대상별 검색어로 나눠 동시에 검색, 동시 Gemini 호출 수
+DISCOVERY_FANOUT = os.getenv("DISCOVERY_FANOUT", "0") == "1"
+DISCOVERY_CONCURRENCY = int(os.getenv("DISCOVERY_CONCURRENCY", "4"))
+# 검색어별 결과 캐시 (SQLite, 비우면 메모리만) / 재검색 주기 (초)
+DISCOVERY_CACHE_DB = os.getenv(
+    "DISCOVERY_CACHE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "discovery_cache.sqlite")
+)
+DISCOVERY_TTL = int(os.getenv("DISCOVERY_TTL", str(24 * 3600)))
+
+# 1이면 crawl_from_search 가 결과를 실행 파일(crawl_runs)에 쓰고 핸들만 반환. 0이면 결과 전체를 JSON으로 반환
+CRAWL_SPILL = os.getenv("CRAWL_SPILL", "1") == "1"
 
 headers = {
     "User-Agent": (
@@ -32,41 +61,30 @@ mcp = FastMCP(name="MCPServer")
 # ========================================
 # Ollama 필터링 함수
 # ========================================
-async def filter_with_ollama(item):
-    if not item.get("snippet"):
-        return None
-
-    prompt = f"""
+# 페이지마다 같은 판정 지시문 (system 메시지로 맨 앞에 두어 모델 서버가 접두부 KV 캐시를 재사용)
+FILTER_INSTRUCTION = """
     다음 웹페이지 본문이 단순한 '재단소개, 인사말, 연혁, 메뉴구조'인지,
     아니면 실제 '지원사업, 장학, 복지, 프로그램 모집 공고'인지 구분하세요.
 
     단순 소개형이면 "IGNORE"만 출력하세요.
-    지원사업 관련이면 아래 형식으로 요약하세요:
+    지원사업 관련이면 아래 형식으로 요약하세요 ([신청링크]에는 주어진 URL):
 
     [프로그램명]: ...
     [지원대상]: ...
     [지원내용]: ...
     [신청기간]: ...
-    [신청링크]: {item['url']}
-
-    본문:
-    {item['snippet']}
+    [신청링크]: ...
     """
-    try:
-        response = await asyncio.to_thread(
-            ollama.chat,
-            model="gpt-oss:20b",
-            messages=[{"role": "user", "content": prompt}],
-        )
 
-        output_text = ""
-        if "message" in response:
-            output_text = response["message"]["content"]
-        elif "messages" in response:
-            output_text = response["messages"][-1]["content"]
-        else:
-            output_text = str(response)
+async def filter_with_ollama(item):
+    if not item.get("snippet"):
+        return None
 
+    try:
+        output_text = await get_gateway().chat([
+            {"role": "system", "content": FILTER_INSTRUCTION},
+            {"role": "user", "content": f"URL: {item['url']}\n\n본문:\n{item['snippet']}"},
+        ])
         output_text = output_text.strip()
         print(f"[Ollama 응답] {item['url']} | {output_text[:100]}...")
 
@@ -85,11 +103,6 @@ async def filter_with_ollama(item):
 # Playwright 크롤링
 # ========================================
 
-CONTENT_SELECTORS = [
-    "main", "article", "#content", ".content", ".post",
-    ".program", ".board-view", "#container"
-]
-
 EXCLUDE_KEYWORDS_URL = [
     "intro", "greeting", "about", "history", "연혁",
     "privacy", "terms", "login", "logout", "qna", "faq", "contact",
@@ -102,25 +115,91 @@ def is_excluded_url(url: str) -> bool:
     lower_url = url.lower()
     return any(k in lower_url for k in EXCLUDE_KEYWORDS_URL)
 
-def is_meaningless_text(text: str):
-    text = text.strip()
-    exclude_phrases = [
-        "인사말", "설립취지", "연혁", "소개합니다", "아이디", "비밀번호",
-        "이사회", "정보마당", "찾아오시는 길", "오시는 길", "공지사항", "조직도", "일반공지", "영상", "video",
-        "고객센터", "자주 묻는 질문", "FAQ", "문의하기", "문의하기", "contact us",
-        "©", "All rights reserved", "Privacy Policy", "Terms of Service",
-    ]
-    matched = [p for p in exclude_phrases if p in text]
-    if matched:
-        return True, f"[스킵 단어] {', '.join(matched)}"
-    return False, ""
-
-def is_valid_url(url: str) -> bool:
-    try:
-        resp = requests.head(url, timeout=1, allow_redirects=True)
-        return resp.status_code == 200
-    except Exception as e:
-        return False
+# 본문에 있으면 스킵할 단어 (검사는 html_extract 워커에서)
+EXCLUDE_TEXT_PHRASES = [
+    "인사말", "설립취지", "연혁", "소개합니다", "아이디", "비밀번호",
+    "이사회", "정보마당", "찾아오시는 길", "오시는 길", "공지사항", "조직도", "일반공지", "영상", "video",
+    "고객센터", "자주 묻는 질문", "FAQ", "문의하기", "contact us",
+    "©", "All rights reserved", "Privacy Policy", "Terms of Service",
+]
+
+class UrlValidator:
+    """공용 httpx.AsyncClient(연결 재사용)로 HEAD 검사, HEAD를 거부하는 서버는 GET 상태 코드만 확인.
+    대기 시간은 최근 응답 시간 90번째 백분위의 3배(기본~상한 사이)로 맞추고,
+    시간 초과면 상한으로 한 번 더 시도해 느리지만 살아 있는 사이트를 버리지 않음"""
+
+    def __init__(self, timeout: float = URL_CHECK_TIMEOUT, max_timeout: float = URL_CHECK_MAX_TIMEOUT,
+                 concurrency: int = URL_CHECK_CONCURRENCY):
+        self.base_timeout = timeout
+        self.max_timeout = max_timeout
+        self.concurrency = concurrency
+        self.latencies = deque(maxlen=200)
+        self.checked = {}
+        self.client = None
+        self.loop = None
+
+    def timeout(self) -> float:
+        if len(self.latencies) < 5:
+            return self.base_timeout
+        ordered = sorted(self.latencies)
+        p90 = ordered[int(len(ordered) * 0.9) - 1]
+        return min(self.max_timeout, max(self.base_timeout, p90 * 3))
+
+    def _ensure_client(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            import httpx
+            self.loop = loop
+            self.client = httpx.AsyncClient(
+                headers=headers, follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.concurrency,
+                                    max_keepalive_connections=self.concurrency),
+            )
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        return self.client
+
+    async def _status(self, client, url: str, timeout: float) -> int:
+        resp = await client.head(url, timeout=timeout)
+        if resp.status_code in (403, 405, 501):
+            async with client.stream("GET", url, timeout=timeout) as resp:
+                pass
+        return resp.status_code
+
+    async def check(self, url: str) -> bool:
+        if url in self.checked:
+            return self.checked[url]
+        import httpx
+        client = self._ensure_client()
+        timeout = self.timeout()
+        ok = False
+        async with self.semaphore:
+            for attempt in range(2):
+                started = time.perf_counter()
+                try:
+                    ok = await self._status(client, url, timeout) < 400
+                    self.latencies.append(time.perf_counter() - started)
+                    break
+                except httpx.TimeoutException:
+                    if timeout >= self.max_timeout:
+                        break
+                    timeout = self.max_timeout
+                except Exception:
+                    break
+        inc("url_checks_total", outcome="ok" if ok else "invalid")
+        self.checked[url] = ok
+        return ok
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+        self.client = self.loop = None
+
+
+url_validator = UrlValidator()
+
+
+async def is_valid_url(url: str) -> bool:
+    return await url_validator.check(url)
 
 def extract_first_json_array(text: str) -> str | None:
     match = re.search(r'\[.*?\]', text, re.DOTALL)
@@ -128,189 +207,356 @@ def extract_first_json_array(text: str) -> str | None:
         return match.group(0)
     return None
 
-async def fetch_rendered(ctx: Context, page, url):
+@timed("fetch_rendered", crawler="mcp")
+async def fetch_rendered(ctx: Context, page, url, pages: PageStore):
+    """렌더링 후 HTML 한 번만 가져와 본문 추출은 프로세스 풀에서. (제목, 스니펫, 헤더, 링크) 반환.
+    이동 요청에 이전 검증자를 붙여, 서버가 304를 주면 렌더링/추출 없이 None 반환"""
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
     ctx.debug(f"탐색 시작: {url}")
-    try:
-        await page.goto(url, wait_until="networkidle", timeout=15000)
-        await page.wait_for_timeout(1500)
-    except PlaywrightTimeoutError:
-        await page.goto(url, wait_until="domcontentloaded", timeout=15000)
-
-    await page.eval_on_selector_all(
-        "header, footer, script, style, noscript",
-        "els => els.forEach(e => e.remove())"
-    )
-
-    text = ""
-    for sel in CONTENT_SELECTORS:
+    async with conditional_navigation(page, url, pages):
         try:
-            node = await page.query_selector(sel)
-            if node:
-                await node.eval_on_selector_all(
-                    "nav, aside, .menu, .sidebar",
-                    "els => els.forEach(e => e.remove())"
-                )
-                text = await node.inner_text()
-                if len(text.strip()) > 100:
-                    break
-        except Exception:
-            continue
-
-    if not text:
-        body = await page.locator("body").element_handle()
-        if body:
-            await body.eval_on_selector_all(
-                "nav, aside, .menu, .sidebar",
-                "els => els.forEach(e => e.remove())"
-            )
-            text = await body.inner_text()
-
-    title = await page.title()
-    text = " ".join(text.split())
+            response = await page.goto(url, wait_until="networkidle", timeout=15000)
+            if response and response.status == 304:
+                return None
+            await page.wait_for_timeout(1500)
+        except PlaywrightTimeoutError:
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+    if response and response.status == 304:
+        return None
+    headers = response.headers if response else {}
 
-    skip, reason = is_meaningless_text(text)
-    if skip:
-        ctx.debug(f"[스킵됨] {url} | 이유: {reason} | 텍스트 길이: {len(text)}")
-        return title.strip(), ""
+    html = await page.content()
+    page_info = await extract_html(html, page.url, EXCLUDE_TEXT_PHRASES)
+    if page_info["skipped"]:
+        ctx.debug(f"[스킵됨] {url} | 이유: {page_info['skipped']} | 텍스트 길이: {page_info['length']}")
     else:
-        ctx.debug(f"[수집됨] {url} | 텍스트 길이: {len(text)}")
-
-    return title.strip(), text[:1500]
+        ctx.debug(f"[수집됨] {url} | 텍스트 길이: {page_info['length']}")
+    return page_info["title"], page_info["snippet"], headers, page_info["anchors"]
 
-async def crawl_playwright_async(ctx: Context, start_url: str, max_depth: int):
+async def crawl_playwright_async(ctx: Context, start_url: str, max_depth: int, run: CrawlRun | None = None,
+                                 refresh: bool = False):
+    """run 을 주면 결과를 추출하는 즉시 실행 파일에 기록하고 건수만 반환 (메모리에 모으지 않음).
+    refresh 면 재크롤링 주기 안에 방문한 페이지도 다시 가져옴"""
     await ctx.debug(f"사이트 검색 시작 {start_url}")
-    visited = set()
+    visited = VisitedStore()
+    pages = PageStore()
+    frontier = PriorityFrontier(start_url, max_depth, visited, refresh=refresh)
     results = []
-    queue = [(start_url, 0)]
+    count = 0
 
+    def emit(item: dict):
+        nonlocal count
+        count += 1
+        if run is not None:
+            run.append(item)
+        else:
+            results.append(item)
+
+    from playwright.async_api import async_playwright
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         context = await browser.new_context(user_agent="ScholarshipBot/1.1")
         page = await context.new_page()
 
-        while queue:
-            url, depth = queue.pop(0)
+        while frontier:
+            url, depth = frontier.pop()
             await ctx.debug(f"크롤링 대상 URL: {url} | depth: {depth}")
 
-            # depth 초과 및 중복 URL 필터링
-            if url in visited or depth > max_depth:
-                continue
-
-            # URL 유효성 검증 추가
-            if not is_valid_url(url):
-                continue
-
             # 크롤링 제외 URL
             if is_excluded_url(url):
                 continue
 
-            visited.add(url)
+            # 재크롤링 주기 안에 가져온 페이지는 다시 가져오지 않음
+            cached = pages.get(url) if frontier.is_fresh(url) else None
+            if cached is None:
+                # 큐에 넣을 때 중복/깊이를 이미 걸렀으므로 가져오기 전에 방문 처리
+                frontier.mark_visited(url)
 
+                # URL 유효성 검증 추가
+                if not await is_valid_url(url):
+                    continue
 
-            # 렌더링 시도
-            try:
-                title, snippet = await fetch_rendered(ctx, page, url)
-                if snippet:
-                    results.append({"url": url, "title": title, "snippet": snippet})
-            except Exception as e:
-                results.append({"url": url, "error": str(e)})
+                # 렌더링 + 본문/내부 링크 추출 (조건부 이동이 304면 None)
+                try:
+                    fetched = await fetch_rendered(ctx, page, url, pages)
+                except Exception as e:
+                    emit({"url": url, "error": str(e)})
+                    fetched = ("", "", None, [])
+                if fetched is None:
+                    cached = pages.get(url)
+                    fetched = ("", "", None, [])
+
+            # 최근에 가져왔거나 변경 없는 페이지(304)는 렌더링 없이 저장된 링크만 이어서 탐색
+            if cached is not None:
+                await ctx.debug(f"[변경없음] {url}")
+                frontier.record(cached["result"] == "VALID")
+                if cached["result"] is not None:
+                    emit({"url": url, "title": cached["title"], "unchanged": True})
+                for href, text in cached["links"]:
+                    frontier.push(href, depth + 1, anchor_text=text)
+                continue
 
-            # 내부 링크 수집
-            try:
-                anchors = await page.locator("a[href]").evaluate_all("els => els.map(e => e.href)")
+            title, snippet, page_headers, anchors = fetched
 
-            except Exception as e:
-                anchors = []
+            # 앵커 텍스트와 함께 넣어 신청/모집 관련 링크가 먼저 방문되도록 함
+            links = [
+                [href, text] for href, text in anchors
+                if href and same_site(href, start_url) and not is_excluded_url(href)
+            ]
+            for href, text in links:
+                frontier.push(href, depth + 1, anchor_text=text)
 
-            for href in anchors:
-                if not href:
-                    continue
-                if urlparse(href).netloc == urlparse(start_url).netloc:
-                    normalized = href.split("#")[0]
-                    if normalized not in visited and not is_excluded_url(normalized):
-                        queue.append((normalized, depth + 1))
+            frontier.record(bool(snippet) and frontier.scorer.text_score(snippet) > 0)
+
+            if page_headers is not None:
+                previous = pages.get(url)
+                changed = pages.save(url, title, snippet, links, page_headers)
+                if snippet:
+                    # 본문이 같고 이전 실행에서 이미 검증까지 끝났으면 하위 LLM 단계 생략
+                    if not changed and previous and previous["result"] is not None:
+                        emit({"url": url, "title": title, "unchanged": True})
+                    else:
+                        emit({"url": url, "title": title, "snippet": snippet})
 
             await asyncio.sleep(0.3)
 
+        if frontier.exhausted():
+            await ctx.debug(f"[조기종료] {start_url} | 방문 {frontier.pages}개, 유효 {frontier.useful}개")
+
     await browser.close()
+    visited.close()
+    pages.close()
 
-    return {"count": len(results), "data": results}
+    if run is not None:
+        return {"url": start_url, "count": count}
+    return {"count": count, "data": results}
 
 # ========================================
-# Gemini 기반 구글서치 + URL 리스트 추출 도구
+# Gemini 호출 (계측 포함)
 # ========================================
+@functools.lru_cache(maxsize=1)
+def make_gemini_client():
+    """프로세스당 하나 (HTTP 연결 재사용)"""
+    if LLM_BACKEND == "fake":
+        from fake_llm import FakeGeminiClient
+        return FakeGeminiClient()
+    from google import genai
+    from google.genai import types
+    if GEMINI_BASE_URL:
+        return genai.Client(api_key=GEMINI_KEY or "fake",
+                            http_options=types.HttpOptions(base_url=GEMINI_BASE_URL))
+    return genai.Client(api_key=GEMINI_KEY)
+
+
+def gemini_generate(model: str, contents, config=None):
+    """generate_content 한 번 호출하고 지연/토큰 수를 기록"""
+    client = make_gemini_client()
+    try:
+        with span("gemini", model=model):
+            response = client.models.generate_content(model=model, contents=contents, config=config)
+    except Exception:
+        inc("llm_requests_total", backend="gemini", model=model, outcome="error")
+        raise
+    inc("llm_requests_total", backend="gemini", model=model, outcome="ok")
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        inc("llm_tokens_total", usage.prompt_token_count or 0, backend="gemini", model=model, kind="prompt")
+        inc("llm_tokens_total", usage.candidates_token_count or 0, backend="gemini", model=model, kind="completion")
+    return response
+
 
 @mcp.tool
-async def search_sites_with_gemini(ctx: Context) -> str:
-    await ctx.debug("URL 검색 시작")
+async def metrics_snapshot() -> str:
+    """서버 프로세스의 구간별 소요 시간/카운터 요약 (클라이언트 실행 요약에 포함)"""
+    return json.dumps(registry.summary(), ensure_ascii=False)
 
-    client = genai.Client(api_key=GEMINI_KEY)
-    grounding_tool = types.Tool(google_search=types.GoogleSearch())
-    config = types.GenerateContentConfig(tools=[grounding_tool])
+# ========================================
+# Gemini 기반 구글서치 + URL 리스트 추출 도구
+# ========================================
 
-    all_results = []
-    seen_urls = set()
+# 검색어 변형 (DISCOVERY_FANOUT): 한 번의 검색으로는 잘 알려진 재단만 나오므로 지역/분야/대상별로 나눠 검색
+BASE_QUERY = "대한민국 장학재단"
+QUERY_VARIANTS = {
+    "region": ["서울", "경기·인천", "부산·울산·경남", "대구·경북", "광주·전라", "대전·세종·충청", "강원", "제주"],
+    "field": ["이공계", "인문사회", "예체능", "의료·보건", "IT·소프트웨어"],
+    "target": ["대학생", "고등학생", "저소득층 가정", "다문화·북한이탈 청소년", "장애 학생", "한부모 가정 자녀"],
+}
 
-    prompt = f"""
+
+def discovery_queries(fanout: bool) -> list:
+    if not fanout:
+        return [BASE_QUERY]
+    queries = [BASE_QUERY]
+    queries += [f"{region} 지역 장학재단" for region in QUERY_VARIANTS["region"]]
+    queries += [f"{field} 분야 장학재단" for field in QUERY_VARIANTS["field"]]
+    queries += [f"{target} 대상 장학재단" for target in QUERY_VARIANTS["target"]]
+    return queries
+
+
+def search_prompt(query: str) -> str:
+    return f"""
     검색을 수행하라. 절대로 모델의 내부 지식으로만 답하지 마라 — 반드시 Google Search 도구를 호출해서 실제 검색 결과를 참고해야 한다.
     
     지자체/정부 사이트, 삼성, IBK, 복지로를 제외한, 다음 쿼리로 Google Search 도구를 사용해 대한민국 장학재단을 검색해서 찾아라.
+
+    쿼리: {query}
     
     출력 형식은 JSON 배열로만 반환하라:
     [{{"foundation": "재단명", "url": "https://..."}}]
     """
-    try:
-        response = client.models.generate_content(
-            # model="gemini-2.5-flash-lite",
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=config
+
+
+class DiscoveryCache:
+    """검색어별 Gemini 검색 결과 (검증 전 목록). MCP 서버는 실행마다 새로 뜨므로 SQLite에 보관"""
+
+    def __init__(self, path: str = DISCOVERY_CACHE_DB, ttl: int = DISCOVERY_TTL):
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path or ":memory:")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS discovery ("
+            " query TEXT PRIMARY KEY,"
+            " results TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, query: str) -> list | None:
+        row = self.conn.execute(
+            "SELECT results, fetched_at FROM discovery WHERE query = ?", (query,)
+        ).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, query: str, results: list):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO discovery (query, results, fetched_at) VALUES (?, ?, ?)",
+            (query, json.dumps(results, ensure_ascii=False), time.time()),
         )
-        text = response.text or ""
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def search_config():
+    if LLM_BACKEND == "fake":
+        return None
+    from google.genai import types
+    grounding_tool = types.Tool(google_search=types.GoogleSearch())
+    return types.GenerateContentConfig(tools=[grounding_tool])
 
-        # JSON 배열 부분만 추출하는 함수 필요
-        json_str = extract_first_json_array(text)
+
+async def search_query(ctx: Context, query: str, cache: DiscoveryCache, limit: asyncio.Semaphore,
+                       refresh: bool = False) -> list:
+    """검색어 하나를 Gemini 검색. 캐시가 유효하면 재검색하지 않음"""
+    cached = None if refresh else cache.get(query)
+    if cached is not None:
+        inc("discovery_queries_total", outcome="cached")
+        return cached
+    try:
+        async with limit:
+            # SDK 호출이 동기식이라 스레드에서 실행해 다른 검색어와 겹치게 함
+            response = await asyncio.to_thread(
+                gemini_generate,
+                # model="gemini-2.5-flash-lite",
+                model="gemini-2.5-flash",
+                contents=search_prompt(query),
+                config=search_config(),
+            )
+        json_str = extract_first_json_array(response.text or "")
         if not json_str:
-            await ctx.debug(f"JSON 배열 추출 실패")
-
-        data = json.loads(json_str)
-
-        for item in data:
-            url = item.get("url", "").strip()
-            if url and url not in seen_urls and is_valid_url(url):
-                seen_urls.add(url)
-                all_results.append(item)
-            else:
-                await ctx.debug(f"유효하지 않은 URL 제외: {url}")
-                
+            await ctx.debug(f"JSON 배열 추출 실패: {query}")
+            return []
+        items = [item for item in json.loads(json_str) if isinstance(item, dict)]
     except Exception as e:
-        await ctx.debug(f"Gemini 호출 또는 파싱 오류: {e}")
+        inc("discovery_queries_total", outcome="error")
+        await ctx.debug(f"Gemini 호출 또는 파싱 오류 ({query}): {e}")
+        return []
+    inc("discovery_queries_total", outcome="searched")
+    cache.put(query, items)
+    return items
+
+
+def site_key(url: str) -> str:
+    """사이트 단위 중복 제거 키: 호스트 + 첫 경로 조각.
+    공용 플랫폼(같은 호스트, 경로별 재단)에 올라간 서로 다른 재단이 하나로 합쳐지지 않도록"""
+    parts = urlsplit(url)
+    first = parts.path.strip("/").split("/", 1)[0]
+    return f"{parts.netloc}/{first}"
+
 
-    await ctx.debug(f"총 유니크 URL 개수: {len(all_results)}")
+@mcp.tool
+async def search_sites_with_gemini(ctx: Context, fanout: bool = DISCOVERY_FANOUT, refresh: bool = False) -> str:
+    """장학재단 사이트 검색. fanout이면 지역/분야/대상별 검색어를 동시에 검색해 합침.
+    URL은 정규화 후 사이트(site_key) 단위로 중복 제거하고, 동시에 접속 검사"""
+    await ctx.debug("URL 검색 시작")
+    queries = discovery_queries(fanout)
+    cache = DiscoveryCache()
+    limit = asyncio.Semaphore(DISCOVERY_CONCURRENCY)
+    try:
+        with span("discovery_search", fanout=fanout):
+            batches = await asyncio.gather(*[search_query(ctx, q, cache, limit, refresh) for q in queries])
+    finally:
+        cache.close()
+
+    candidates = {}
+    for item in (item for batch in batches for item in batch):
+        url = canonicalize_url(str(item.get("url") or ""))
+        host = urlsplit(url).netloc
+        if not url.startswith(("http://", "https://")) or not host:
+            await ctx.debug(f"유효하지 않은 URL 제외: {item.get('url')}")
+            continue
+        # 같은 사이트의 여러 페이지는 하나만 (크롤러가 사이트 안을 탐색)
+        key = site_key(url)
+        if key not in candidates:
+            candidates[key] = {**item, "url": url}
+
+    with span("discovery_validate"):
+        checks = await asyncio.gather(*[is_valid_url(item["url"]) for item in candidates.values()])
+    all_results = []
+    for item, ok in zip(candidates.values(), checks):
+        if ok:
+            all_results.append(item)
+        else:
+            await ctx.debug(f"유효하지 않은 URL 제외: {item['url']}")
+
+    await ctx.debug(f"검색어 {len(queries)}개 → 후보 {len(candidates)}개 → 유효 URL {len(all_results)}개")
     return json.dumps(all_results, ensure_ascii=False)
 
 
 @mcp.tool
-async def crawl_from_search(ctx: Context, urls: list, max_depth: int) -> str:
+async def crawl_from_search(ctx: Context, urls: list, max_depth: int, spill: bool = CRAWL_SPILL,
+                            refresh: bool = False) -> str:
+    """spill 이면 {"run", "path", "count", "sites"} 핸들만 반환 (결과는 crawl_runs.iter_chunks 로 읽음).
+    아니면 사이트별 {"count", "data"} 목록 전체를 반환. refresh 면 최근 방문 페이지도 다시 가져옴"""
     await ctx.debug("크롤링 시작")
 
     handled = []
+    run = CrawlRun() if spill else None
     try:
         for url in urls:
             await ctx.debug(f"단일 URL 처리 시작: {url}")
             try:
-                r = await crawl_playwright_async(ctx, url, max_depth)
+                r = await crawl_playwright_async(ctx, url, max_depth, run, refresh)
                 handled.append(r)
             except Exception as e:
                 err = str(e) or "unknown_error"
                 handled.append({"url": url, "error": err})
                 await ctx.debug(f"크롤링 예외 처리: {err}")
 
+        if run is not None:
+            run.close()
+            await ctx.debug(f"크롤링 결과 {run.count}건 → {run.path}")
+            return json.dumps({**run.handle(), "sites": handled}, ensure_ascii=False)
         return json.dumps(handled, ensure_ascii=False)
 
     except Exception as e:
         await ctx.debug(f"크롤링 에러발생: {e}")
         return json.dumps({"error": str(e)}, ensure_ascii=False)
+    finally:
+        if run is not None:
+            run.close()
 
 @mcp.tool
 async def verify_crawled_info(title: str, snippet: str) -> str:
@@ -338,9 +584,7 @@ async def verify_crawled_info(title: str, snippet: str) -> str:
     #     )
     #     result = resp.json().get("response", "").strip().upper()
     try:
-        client = genai.Client(api_key=GEMINI_KEY)
-
-        response = client.models.generate_content(
+        response = gemini_generate(
             model="gemini-2.5-flash-lite",
             contents=prompt,
         )
@@ -380,8 +624,7 @@ async def summary_info(title: str, snippet: str) -> str:
     """
 
     try:
-        client = genai.Client(api_key=GEMINI_KEY)
-        response = client.models.generate_content(
+        response = gemini_generate(
             model="gemini-2.0-flash-lite",
             contents=prompt,
         )
@@ -420,8 +663,7 @@ async def generate_title(summary: str, url: str = "") -> str:
     """
 
     try:
-        client = genai.Client(api_key=GEMINI_KEY)
-        response = client.models.generate_content(
+        response = gemini_generate(
             model="gemini-2.0-flash",
             contents=prompt,
         )
@@ -489,11 +731,14 @@ async def generate_title_and_category(summary: str, url: str = "") -> str:
 # ========================================
 # MCP 서버 실행
 # ========================================
-if __name__ == "__main__":
-    import sys
+def main():
     import logging
     logging.basicConfig(level=logging.DEBUG)
     if sys.platform.startswith("win"):
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
     print("=== MCP Server started (stdio mode) ===")
     mcp.run()
+
+
+if __name__ == "__main__":
+    main()
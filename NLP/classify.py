@@ -1,41 +1,62 @@
-import ollama, re, os, sys
+import functools
+import re, os, sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from db import engine
+from sqlalchemy import select
+from db import engine, 복지서비스, save_categories
+from catalog import notify_changed
+from llm_gateway import get_gateway
+from prompt_input import PROMPT_INPUT_BUDGET, fit_sections, fit_text
+from page_store import content_hash
+from jobs import JobStore, CLASSIFY_QUEUE
+from metrics import span, write_run_summary
 
-conn = engine.raw_connection()
-cur = conn.cursor()
+JOB_QUEUE = CLASSIFY_QUEUE
+# 이만큼 처리할 때마다 바뀐 행을 API 카탈로그에 알림
+NOTIFY_BATCH = int(os.getenv("CATALOG_NOTIFY_BATCH", "20"))
+
+# 실행 위치와 관계없이 이 파일 옆의 프롬프트 사용
+PROMPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt.txt")
 
 # ------------------------
 # NLP 분류 준비
 # ------------------------
-with open("NLP/prompt.txt", "r", encoding="utf-8") as f:
-    system_prompt = f.read()
+@functools.lru_cache(maxsize=1)
+def load_system_prompt() -> str:
+    """분류 시스템 프롬프트 (처음 쓸 때 한 번만 읽음)"""
+    with open(PROMPT_PATH, "r", encoding="utf-8") as f:
+        return f.read()
 
 def classify_welfare(text: str) -> str:
     """NLP 모델로 카테고리 분류"""
-    response = ollama.chat(
-        model='gpt-oss:20b',
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": text}
-        ]
-    )
-    return response.get('message', {}).get('content', '응답 없음')
+    content = get_gateway().chat_sync([
+        {"role": "system", "content": load_system_prompt()},
+        {"role": "user", "content": text}
+    ])
+    return content or '응답 없음'
+
+# 필드 생성 지시문. 행마다 같은 문장이 system 메시지로 맨 앞에 오고 바뀌는 본문은 user 메시지로만 보내
+# 모델 서버가 고정 접두부의 KV 캐시를 재사용할 수 있게 함
+TITLE_INSTRUCTION = "다음 복지정보 요약에서 간결하고 매력적인 정책명(2-5단어)을 생성해주세요. 정책명만 출력하세요."
+TARGET_INSTRUCTION = (
+    '다음 복지정보에서 지원대상(예: 아동, 청년, 저소득층 등)을 추출해주세요. '
+    '해당 내용이 없으면 "일반인"으로 표기하세요. 지원대상만 출력하세요.'
+)
+NOTE_INSTRUCTION = "다음 복지정보에서 신청 조건, 기한, 주의사항 등 중요한 참고사항을 1-2문장으로 추출/생성해주세요. 참고사항만 출력하세요."
+
+
+def instruction_messages(instruction: str, body: str) -> list:
+    return [{"role": "system", "content": instruction}, {"role": "user", "content": body}]
+
+def fit_input(text: str) -> str:
+    """상세내용을 토큰 예산 안으로 (자격·금액·기간 문장 우선)"""
+    return fit_text(text, PROMPT_INPUT_BUDGET, stage="generate_input")[0]
 
 def generate_policy_name(text: str) -> str:
     """요약 텍스트에서 정책명을 생성"""
-    prompt = f"""
-다음 복지정보 요약에서 간결하고 매력적인 정책명(2-5단어)을 생성해주세요. 정책명만 출력하세요.
-
-요약: {text}
-"""
     try:
-        response = ollama.chat(
-            model='gpt-oss:20b',
-            messages=[{"role": "user", "content": prompt}]
-        )
-        policy_name = clean_text(response.get('message', {}).get('content', '정책'))
+        content = get_gateway().chat_sync(instruction_messages(TITLE_INSTRUCTION, f"요약: {fit_input(text)}"))
+        policy_name = clean_text(content or '정책')
         
         # 기업/정부 여부 판단
         text_lower = text.lower()
@@ -50,33 +71,17 @@ def generate_policy_name(text: str) -> str:
 
 def generate_target(text: str) -> str:
     """요약 텍스트에서 지원대상을 추출/생성"""
-    prompt = f"""
-다음 복지정보에서 지원대상(예: 아동, 청년, 저소득층 등)을 추출해주세요. 해당 내용이 없으면 "일반인"으로 표기하세요. 지원대상만 출력하세요.
-
-정보: {text}
-"""
     try:
-        response = ollama.chat(
-            model='gpt-oss:20b',
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return clean_text(response.get('message', {}).get('content', '일반인'))
+        content = get_gateway().chat_sync(instruction_messages(TARGET_INSTRUCTION, f"정보: {fit_input(text)}"))
+        return clean_text(content or '일반인')
     except Exception as e:
         return "일반인"
 
 def generate_note(text: str) -> str:
     """요약 텍스트에서 참고사항을 생성"""
-    prompt = f"""
-다음 복지정보에서 신청 조건, 기한, 주의사항 등 중요한 참고사항을 1-2문장으로 추출/생성해주세요. 참고사항만 출력하세요.
-
-정보: {text}
-"""
     try:
-        response = ollama.chat(
-            model='gpt-oss:20b',
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return clean_text(response.get('message', {}).get('content', ''))
+        content = get_gateway().chat_sync(instruction_messages(NOTE_INSTRUCTION, f"정보: {fit_input(text)}"))
+        return clean_text(content)
     except Exception as e:
         return ""
 
@@ -89,33 +94,48 @@ def clean_text(text: str) -> str:
     return text
 
 def prepare_text_for_nlp(정책명, 지원대상, 참고사항, 상세내용) -> str:
-    """NLP 모델이 이해하기 좋게 각 필드를 라벨과 함께 연결"""
-    parts = []
-    if 정책명:
-        parts.append(f"정책명: {clean_text(정책명)}")
-    if 지원대상:
-        parts.append(f"지원대상: {clean_text(지원대상)}")
-    if 참고사항:
-        parts.append(f"참고사항: {clean_text(참고사항)}")
-    if 상세내용:
-        parts.append(f"상세내용: {clean_text(상세내용)}")
-    return " | ".join(parts)  # 구분자로 "|" 사용
-
-cur.execute("SELECT 서비스ID, 정책명, 지원대상, 참고사항, 상세내용 FROM 복지서비스")
-rows = cur.fetchall()
+    """NLP 모델이 이해하기 좋게 각 필드를 라벨과 함께 연결 (구분자 "|").
+    전체가 PROMPT_INPUT_BUDGET 토큰 안에 들도록 짧고 중요한 필드부터, 상세내용은 자격·금액·기간 문장 우선"""
+    sections = [
+        ("정책명", 정책명 or "", 3.0),
+        ("지원대상", 지원대상 or "", 3.0),
+        ("참고사항", 참고사항 or "", 1.0),
+        ("상세내용", 상세내용 or "", 0.0),
+    ]
+    text, _ = fit_sections(sections, PROMPT_INPUT_BUDGET, stage="classify_input")
+    return text
+
+ROW_COLUMNS = (
+    복지서비스.c.서비스ID, 복지서비스.c.정책명, 복지서비스.c.지원대상,
+    복지서비스.c.참고사항, 복지서비스.c.상세내용,
+)
+
+def load_row(서비스ID):
+    """작업 하나에 필요한 행만 읽고 연결은 바로 반납"""
+    with engine.connect() as read_conn:
+        return read_conn.execute(select(*ROW_COLUMNS).where(복지서비스.c.서비스ID == 서비스ID)).first()
 # ------------------------
 # 필드 생성 + 카테고리 분류 + 저장
 # ------------------------
-for row in rows:
+def process_row(row, dedup, generated: dict) -> bool:
+    """한 행의 필드 생성 + 분류 + 저장. 중복 결과를 재사용했으면 True.
+    상세내용이 거의 같은 정책(정부/기업 중복 수집분)은 먼저 처리한 결과(generated)의 제목·카테고리만 재사용.
+    지원대상·참고사항(자격·기한)은 지역/금액만 다른 템플릿 정책끼리 섞이지 않도록 본문이 같을 때만 재사용"""
     서비스ID, 정책명, 지원대상, 참고사항, 상세내용 = row
 
     # 상세내용이 없으면 스킵
     if not 상세내용:
         print(f"[SKIP] {서비스ID} 상세내용 없음, 스킵")
-        continue
+        return False
+
+    dup_id = dedup.add(서비스ID, 상세내용)
+    reused = generated.get(dup_id) if dup_id else None
+    same_text = reused is not None and reused[4] == content_hash(상세내용)
+    if reused:
+        print(f"\n[{서비스ID}] 유사 중복({dup_id}) → 제목·카테고리 재사용" + (" (본문 동일 → 전체)" if same_text else ""))
 
     # 모든 필드를 항상 재생성 (기존 데이터 덮어쓰기)
-    생성된_정책명 = generate_policy_name(상세내용)
+    생성된_정책명 = reused[0] if reused else generate_policy_name(상세내용)
     # 생성된 제목에서 [기업], [정부] 등의 접두사/괄호 제거
     생성된_정책명_clean = re.sub(r'^\[[^\]]+\]\s*', '', 생성된_정책명).strip()
 
@@ -139,8 +159,11 @@ for row in rows:
     else:
         최종_정책명 = 생성된_정책명_clean
 
-    생성된_지원대상 = generate_target(상세내용)
-    생성된_참고사항 = generate_note(상세내용)
+    if same_text:
+        생성된_지원대상, 생성된_참고사항 = reused[1], reused[2]
+    else:
+        생성된_지원대상 = generate_target(상세내용)
+        생성된_참고사항 = generate_note(상세내용)
 
     print(f"\n[{서비스ID}] 처리 중...")
     print(f"  기존정책명: {정책명}")
@@ -150,41 +173,100 @@ for row in rows:
 
     # 복지서비스 테이블 업데이트
     try:
-        cur.execute("""
-            UPDATE 복지서비스
-            SET 정책명=%s, 지원대상=%s, 참고사항=%s
-            WHERE 서비스ID=%s
-        """, (최종_정책명, 생성된_지원대상, 생성된_참고사항, 서비스ID))
-        conn.commit()
+        with span("db_update"), engine.begin() as sa_conn:
+            sa_conn.execute(
+                복지서비스.update()
+                .where(복지서비스.c.서비스ID == 서비스ID)
+                .values(정책명=최종_정책명, 지원대상=생성된_지원대상, 참고사항=생성된_참고사항)
+            )
         print(f"  ✓ 복지서비스 정보 업데이트 완료")
     except Exception as e:
         print(f"  [!] 복지서비스 업데이트 실패: {e}")
-        conn.rollback()
 
     # 카테고리 분류 (분류에는 DB에 저장될 최종 제목을 사용)
     text_for_classify = prepare_text_for_nlp(최종_정책명, 생성된_지원대상, 생성된_참고사항, 상세내용)
 
     try:
-        category = classify_welfare(text_for_classify)
-        category = clean_text(category)
+        category = reused[3] if reused else clean_text(classify_welfare(text_for_classify))
         print(f"  카테고리: {category}")
     except Exception as e:
         print(f"  [!] 카테고리 분류 오류: {e}")
         category = ""
 
-    # 카테고리 저장
+    if not reused and not dup_id:
+        generated[서비스ID] = (생성된_정책명, 생성된_지원대상, 생성된_참고사항, category, content_hash(상세내용))
+
+    # 카테고리 저장 (쉼표로 묶인 출력을 개별 행으로 분리해 교체 저장)
     try:
-        cur.execute("""
-            INSERT INTO 카테고리
-            (서비스ID, 카테고리)
-            VALUES (%s, %s)
-            ON DUPLICATE KEY UPDATE
-                카테고리=VALUES(카테고리)
-        """, (서비스ID, category))
-        conn.commit()
-        print(f"  ✓ 카테고리 저장 완료")
+        with engine.begin() as sa_conn:
+            cats = save_categories(sa_conn, 서비스ID, category)
+        print(f"  ✓ 카테고리 저장 완료 ({len(cats)}개)")
     except Exception as e:
         print(f"  [!] 카테고리 저장 실패: {e}")
-        conn.rollback()
 
-conn.close()
+    return bool(reused)
+
+
+def main(argv: list | None = None):
+    # 행 단위 작업 큐: 중단 후 재실행하면 끝나지 않은 행부터 이어서 처리하고, 지난 패스가 다 끝났으면 전체로 새 패스.
+    # 여러 프로세스로 띄우면 행을 나눠 가져감. --reset 으로 진행 중인 패스도 버리고 전체를 새로 처리.
+    # --changed-only: 전체를 넣지 않고 수집 단계가 큐에 넣은(새로 들어오거나 바뀐) 행만 처리
+    # --skip-warmup: 파이프라인의 warmup 단계가 이미 모델을 올려 둔 경우
+    from dedup import DedupIndex
+
+    argv = sys.argv[1:] if argv is None else argv
+    jobs = JobStore()
+    if "--changed-only" in argv:
+        if "--reset" in argv:
+            jobs.reset(JOB_QUEUE)
+    elif jobs.begin_pass(JOB_QUEUE, force="--reset" in argv):
+        with engine.connect() as read_conn:
+            ids = read_conn.execute(select(복지서비스.c.서비스ID)).scalars().all()
+        jobs.enqueue_many(JOB_QUEUE, ids)
+
+    gateway = get_gateway()
+    # --num-ctx N: 이번 실행의 모든 요청에 같은 컨텍스트 길이 고정 (값이 바뀌면 서버가 모델을 다시 올림)
+    if "--num-ctx" in argv:
+        gateway.pin_options(num_ctx=int(argv[argv.index("--num-ctx") + 1]))
+    if jobs.has_unfinished(JOB_QUEUE):
+        # 응답하지 않는 모델 서버는 첫 행이 실패하기 전에 제외 (상태는 프로세스마다 따로라 여기서도 확인)
+        print(f"[모델 서버] {gateway.run_sync(gateway.check_health())}")
+    if jobs.has_unfinished(JOB_QUEUE) and "--skip-warmup" not in argv:
+        # 첫 행이 모델 로딩을 떠안지 않도록 모델과 분류 프롬프트 접두부를 미리 올려 둠
+        print(f"[워밍업] {gateway.run_sync(gateway.warm_up(system_prompt=load_system_prompt()))}")
+
+    dedup = DedupIndex()
+    generated = {}
+    reused_count = 0
+    updated = []
+    for key, _ in jobs.iterate(JOB_QUEUE):
+        row = load_row(key)
+        if row is None:
+            # 큐에는 있지만 그 사이 삭제된 행
+            jobs.complete(JOB_QUEUE, key, {"skipped": "row not found"})
+            continue
+        try:
+            with span("classify_row"):
+                reused = process_row(row, dedup, generated)
+            if reused:
+                reused_count += 1
+            jobs.complete(JOB_QUEUE, key)
+            updated.append(key)
+        except Exception as e:
+            print(f"  [!] {key} 처리 실패: {e}")
+            jobs.fail(JOB_QUEUE, key, e)
+        if len(updated) >= NOTIFY_BATCH:
+            notify_changed(updated)
+            updated = []
+    notify_changed(updated)
+
+    print(f"[작업 현황] {jobs.counts(JOB_QUEUE)}")
+    jobs.close()
+    print(f"[중복 재사용] {reused_count}건")
+    print(f"[Ollama 통계] {get_gateway().stats()}")
+    write_run_summary("classify", {"reused": reused_count, "gateway": get_gateway().stats()})
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+import asyncio
+import csv
+import importlib.util
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+# ========================================
+# 오프라인 벤치마크
+# ========================================
+# 네트워크/실제 DB/모델 없이 녹화한 fixture + 로컬 스텁 서버 + SQLite로 주요 경로를 측정하고
+# 결과를 JSON으로 남겨 커밋 간 비교.
+#
+#   python bench/run.py                              # 전체 실행 → bench/results/<시각>-<커밋>.json
+#   python bench/run.py --only ingest,services --sizes 100,1000
+#   python bench/run.py --compare old.json new.json  # 지표별 비율 출력
+#
+# BENCH_LLM_LATENCY: 스텁 LLM 응답 지연(초), BENCH_PAGES: 수집 페이지 수,
+# BENCH_CLASSIFY_ROWS: 분류 행 수, BENCH_DB_DSN: SQLite 대신 쓸 MySQL 등 (빈 스키마 권장)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+RESULT_DIR = os.path.join(BENCH_DIR, "results")
+
+BENCH_LLM_LATENCY = float(os.getenv("BENCH_LLM_LATENCY", "0.05"))
+BENCH_PAGES = int(os.getenv("BENCH_PAGES", "20"))
+BENCH_CLASSIFY_ROWS = int(os.getenv("BENCH_CLASSIFY_ROWS", "100"))
+BENCH_KEYWORD_ROWS = int(os.getenv("BENCH_KEYWORD_ROWS", "20000"))
+BENCH_DB_DSN = os.getenv("BENCH_DB_DSN", "")
+
+ALL_BENCHES = ["ingest", "keywords", "classify", "crawler", "services"]
+DEFAULT_SIZES = [100, 1000, 10000]
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def latency_summary(samples: list) -> dict:
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+def load_module(name: str, path: str):
+    """같은 이름의 main.py가 여러 개라 파일 경로로 직접 로드"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_categories() -> list:
+    """NLP/prompt.txt의 카테고리 목록"""
+    with open(os.path.join(ROOT, "NLP", "prompt.txt"), encoding="utf-8") as f:
+        prompt = f.read()
+    section = prompt.split("### 카테고리 목록", 1)[1].split("###", 1)[0]
+    return re.findall(r"^- (.+)$", section, flags=re.M)
+
+
+def fixture_texts() -> list:
+    """list/detail fixture에서 뽑은 정책 문장들 (시드 데이터 재료)"""
+    root = ET.parse(os.path.join(FIXTURE_DIR, "list.xml")).getroot()
+    texts = [item.findtext("servDgst") for item in root.findall(".//servList")]
+    detail = ET.parse(os.path.join(FIXTURE_DIR, "detail.xml")).getroot()
+    for tag in ("tgtrDtlCn", "slctCritCn", "alwServCn"):
+        texts.extend(line.strip("○- ").strip() for line in detail.findtext(tag).splitlines() if line.strip())
+    return texts
+
+
+# ------------------------
+# 시드 DB
+# ------------------------
+def seed_catalog(engine, n: int, seed: int = 42):
+    """복지서비스 n행 + 카테고리 행을 채움 (기존 행은 삭제)"""
+    from db import metadata, 복지서비스, 카테고리
+
+    rng = random.Random(seed)
+    texts = fixture_texts()
+    categories = load_categories()
+    metadata.create_all(engine)
+    services, category_rows = [], []
+    for i in range(n):
+        sid = f"S{i:09d}"
+        cats = rng.sample(categories, rng.randint(1, 3))
+        services.append({
+            "서비스ID": sid,
+            "정책명": f"[{'기업' if i % 5 == 0 else '정부'}] {rng.choice(texts)[:30]} {i}",
+            "링크": f"https://example.org/policy/{i}",
+            "지원대상": rng.choice(texts),
+            "참고사항": rng.choice(texts),
+            # 행마다 문장 조합과 번호를 달리해 중복 판정에 걸리지 않게 함
+            "상세내용": f"{i}번 사업. " + " ".join(rng.sample(texts, 4)),
+            "카테고리목록": cats,
+        })
+        category_rows.extend({"서비스ID": sid, "카테고리": c} for c in cats)
+    with engine.begin() as conn:
+        conn.execute(카테고리.delete())
+        conn.execute(복지서비스.delete())
+        conn.execute(복지서비스.insert(), services)
+        conn.execute(카테고리.insert(), category_rows)
+
+
+def _sqlite_upsert_rows(rows: list):
+    """fetch_and_save.upsert_rows와 같은 upsert를 SQLite 문법으로 (MySQL 없이 측정할 때)"""
+    from db import engine
+    from fetch_and_save import row_values, source_hash
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.executemany(
+            "INSERT INTO 복지서비스 (서비스ID, 정책명, 링크, 지원대상, 참고사항, 상세내용, 원본해시)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (서비스ID) DO UPDATE SET"
+            " 정책명=excluded.정책명, 링크=excluded.링크, 지원대상=excluded.지원대상,"
+            " 참고사항=excluded.참고사항, 상세내용=excluded.상세내용, 원본해시=excluded.원본해시",
+            [(r["servId"], *row_values(r), source_hash(r)) for r in rows],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ------------------------
+# 개별 벤치마크
+# ------------------------
+def bench_ingest(ctx: dict) -> dict:
+    """fetch_and_save: XML 파싱 처리량 + 스텁 API 대상 페이지 수집/upsert 처리량"""
+    import fetch_and_save
+    from db import engine, metadata
+    from jobs import JobStore
+
+    list_xml = open(os.path.join(FIXTURE_DIR, "list.xml"), encoding="utf-8").read()
+    detail_xml = open(os.path.join(FIXTURE_DIR, "detail.xml"), encoding="utf-8").read()
+    docs = 500
+    started = time.perf_counter()
+    for _ in range(docs):
+        ET.fromstring(list_xml).findall(".//servList")
+        d = ET.fromstring(detail_xml)
+        for tag in ("tgtrDtlCn", "slctCritCn", "alwServCn"):
+            fetch_and_save.정리(d.findtext(tag))
+    parse_elapsed = time.perf_counter() - started
+
+    metadata.create_all(engine)
+    fetch_and_save.BASE_URL_LIST = ctx["base_url"] + "/list"
+    fetch_and_save.BASE_URL_DETAIL = ctx["base_url"] + "/detail"
+    fetch_and_save.FETCH_DELAY = 0
+    upsert = engine.dialect.name
+    if upsert != "mysql":
+        fetch_and_save.upsert_rows = _sqlite_upsert_rows
+        upsert = f"{upsert} (upsert_rows SQL 대체)"
+
+    jobs = JobStore(os.path.join(ctx["tmp"], "ingest_jobs.sqlite"))
+    rows = 0
+    started = time.perf_counter()
+    for page in range(1, BENCH_PAGES + 1):
+        rows += fetch_and_save.process_page(page, jobs)
+    elapsed = time.perf_counter() - started
+    jobs.close()
+    return {
+        "parse_docs_per_sec": round(docs * 2 / parse_elapsed, 1),
+        "pages": BENCH_PAGES,
+        "rows": rows,
+        "rows_per_sec": round(rows / elapsed, 1),
+        "upsert": upsert,
+    }
+
+
+def bench_keywords(ctx: dict) -> dict:
+    """Keywords/text_category_keywords: classify_policy / classify_csv 처리량"""
+    kw_dir = os.path.join(ROOT, "Keywords", "text_category_keywords")
+    category = load_module("bench_category", os.path.join(kw_dir, "category.py"))
+    keywords = category.load_category_keywords(os.path.join(kw_dir, "category_keywords.txt"))
+    texts = fixture_texts()
+    rows = [texts[i % len(texts)] for i in range(BENCH_KEYWORD_ROWS)]
+
+    started = time.perf_counter()
+    for text in rows:
+        category.classify_policy(text, keywords)
+    policy_elapsed = time.perf_counter() - started
+
+    input_csv = os.path.join(ctx["tmp"], "servDgst_list.csv")
+    output_csv = os.path.join(ctx["tmp"], "classified_policies.csv")
+    with open(input_csv, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows([t] for t in rows)
+    cwd = os.getcwd()
+    os.chdir(kw_dir)  # classify_csv는 category_keywords.txt를 상대 경로로 읽음
+    try:
+        started = time.perf_counter()
+        category.classify_csv(input_csv, output_csv)
+        csv_elapsed = time.perf_counter() - started
+    finally:
+        os.chdir(cwd)
+    return {
+        "rows": len(rows),
+        "classify_policy_rows_per_sec": round(len(rows) / policy_elapsed, 1),
+        "classify_csv_rows_per_sec": round(len(rows) / csv_elapsed, 1),
+    }
+
+
+def bench_classify(ctx: dict) -> dict:
+    """NLP/classify.py 전체 실행 (스텁 Ollama). 중복 재사용은 꺼서 행마다 모델 호출"""
+    from db import engine
+    seed_catalog(engine, BENCH_CLASSIFY_ROWS)
+    env = dict(os.environ, DEDUP_THRESHOLD="1.1",
+               JOB_DB_PATH=os.path.join(ctx["tmp"], "classify_jobs.sqlite"))
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "NLP/classify.py", "--reset"], cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode)
+    return {
+        "rows": BENCH_CLASSIFY_ROWS,
+        "llm_latency_s": BENCH_LLM_LATENCY,
+        "rows_per_min": round(BENCH_CLASSIFY_ROWS / elapsed * 60, 1),
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def bench_crawler(ctx: dict) -> dict:
+    """Corporate_Program 크롤러: 저장한 HTML을 스텁 서버로 제공하고 페이지/초 측정"""
+    corporate = load_module("bench_corporate_main", os.path.join(ROOT, "Corporate_Program", "main.py"))
+    corporate.CRAWL_DELAY = 0
+    state = ctx["stub_state"]
+    before = state.hits["site"]
+    started = time.perf_counter()
+
+    async def crawl():
+        try:
+            return await corporate.crawl_playwright(
+                start_url=ctx["base_url"] + "/site/0/index.html", max_depth=2,
+            )
+        finally:
+            await corporate.crawl_jobs.close()
+            await corporate.shared_browser.close()
+            corporate.shutdown_pool()
+
+    result = asyncio.run(crawl())
+    elapsed = time.perf_counter() - started
+    pages = state.hits["site"] - before
+    return {
+        "pages": pages,
+        "kept": result["count"],
+        "pages_per_sec": round(pages / elapsed, 2),
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def bench_services(ctx: dict) -> dict:
+    """/services: 카탈로그 크기별 적재 시간과 캐시 미스/캐시 적중/304 지연"""
+    import httpx
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    import db
+    from catalog import catalog_cache
+    import main
+
+    async def measure(client, n_requests: int, headers: dict, cold: bool) -> list:
+        samples = []
+        for _ in range(n_requests):
+            if cold:
+                catalog_cache.invalidate()
+            started = time.perf_counter()
+            res = await client.get("/services", headers=headers)
+            samples.append(time.perf_counter() - started)
+            if res.status_code not in (200, 304):
+                raise RuntimeError(f"/services returned {res.status_code}")
+        return samples
+
+    async def run(n: int) -> dict:
+        path = os.path.join(ctx["tmp"], f"services_{n}.sqlite")
+        seed_catalog(create_engine(f"sqlite:///{path}"), n)
+        db._async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        # ASGITransport는 lifespan을 실행하지 않으므로 메모리 카탈로그를 직접 적재
+        started = time.perf_counter()
+        await main.refresh_catalog()
+        load_s = time.perf_counter() - started
+        transport = httpx.ASGITransport(app=main.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                gzip_headers = {"Accept-Encoding": "gzip"}
+                first = await client.get("/services", headers=gzip_headers)
+                etag = first.headers["etag"]
+                return {
+                    "catalog_load_s": round(load_s, 4),
+                    "cold": latency_summary(await measure(client, 10, gzip_headers, cold=True)),
+                    "warm": latency_summary(await measure(client, 100, gzip_headers, cold=False)),
+                    "not_modified": latency_summary(
+                        await measure(client, 100, {**gzip_headers, "If-None-Match": etag}, cold=False)
+                    ),
+                    # httpx가 본문을 풀어 주므로 전송 크기는 Content-Length로 확인
+                    "body_bytes_gzip": int(first.headers.get("content-length") or len(first.content)),
+                }
+        finally:
+            await db._async_engine.dispose()
+            db._async_engine = None
+
+    return {str(n): asyncio.run(run(n)) for n in ctx["sizes"]}
+
+
+BENCHES = {
+    "ingest": bench_ingest,
+    "keywords": bench_keywords,
+    "classify": bench_classify,
+    "crawler": bench_crawler,
+    "services": bench_services,
+}
+
+
+# ------------------------
+# 실행 / 비교
+# ------------------------
+def git_revision() -> dict:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return {"commit": sha, "dirty": dirty}
+    except Exception:
+        return {"commit": None, "dirty": None}
+
+
+def prepare_env(tmp: str, base_url: str):
+    """저장소 모듈을 import 하기 전에 모든 외부 의존을 스텁/임시 파일로 돌림"""
+    dsn = BENCH_DB_DSN or f"sqlite:///{os.path.join(tmp, 'bench.sqlite')}"
+    os.environ.update({
+        "DB_DSN": dsn,
+        "OLLAMA_HOST": base_url,
+        "JOB_DB_PATH": os.path.join(tmp, "jobs.sqlite"),
+        "CRAWL_VISITED_DB": os.path.join(tmp, "visited.sqlite"),
+        "CRAWL_PAGE_DB": os.path.join(tmp, "pages.sqlite"),
+        "EXPORT_DIR": os.path.join(tmp, "export"),
+        "FETCH_DELAY": "0",
+        "CRAWL_DELAY": "0",
+        "SERVICE_KEY": "bench",
+    })
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def run(names: list, sizes: list, out: str | None) -> dict:
+    from stub_server import start_stub
+
+    tmp = tempfile.mkdtemp(prefix="welfare-bench-")
+    server, state, base_url = start_stub(latency=BENCH_LLM_LATENCY)
+    prepare_env(tmp, base_url)
+    ctx = {"tmp": tmp, "base_url": base_url, "stub_state": state, "sizes": sizes}
+
+    report = {
+        **git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "llm_latency_s": BENCH_LLM_LATENCY, "pages": BENCH_PAGES, "classify_rows": BENCH_CLASSIFY_ROWS,
+            "keyword_rows": BENCH_KEYWORD_ROWS, "sizes": sizes, "db": "custom" if BENCH_DB_DSN else "sqlite",
+        },
+        "results": {},
+    }
+    try:
+        for name in names:
+            print(f"[bench] {name} ...", flush=True)
+            started = time.perf_counter()
+            try:
+                result = BENCHES[name](ctx)
+            except ImportError as e:
+                result = {"skipped": f"missing dependency: {e.name or e}"}
+            except Exception as e:
+                result = {"error": repr(e)}
+            result["wall_s"] = round(time.perf_counter() - started, 2)
+            report["results"][name] = result
+            print(f"[bench] {name}: {json.dumps(result, ensure_ascii=False)}", flush=True)
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if out is None:
+        os.makedirs(RESULT_DIR, exist_ok=True)
+        out = os.path.join(RESULT_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit'] or 'nogit'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[bench] 결과 저장: {out}")
+    return report
+
+
+def _flatten(obj, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in obj.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(old_path: str, new_path: str):
+    """두 결과 파일의 수치 지표를 나란히 출력 (ratio = new / old)"""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    a, b = _flatten(old["results"]), _flatten(new["results"])
+    print(f"{'metric':<48} {old.get('commit') or 'old':>12} {new.get('commit') or 'new':>12} {'ratio':>8}")
+    for key in sorted(set(a) & set(b)):
+        ratio = f"{b[key] / a[key]:.2f}" if a[key] else "-"
+        print(f"{key:<48} {a[key]:>12} {b[key]:>12} {ratio:>8}")
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--compare"] and len(args) == 3:
+        compare(args[1], args[2])
+        return
+
+    def option(name: str):
+        if name in args and args.index(name) + 1 < len(args):
+            return args[args.index(name) + 1]
+        return None
+
+    names = option("--only").split(",") if option("--only") else ALL_BENCHES
+    unknown = [n for n in names if n not in BENCHES]
+    if unknown:
+        sys.exit(f"unknown benchmark: {unknown} (choose from {ALL_BENCHES})")
+    sizes = [int(s) for s in option("--sizes").split(",")] if option("--sizes") else DEFAULT_SIZES
+    run(names, sizes, option("--out"))
+
+
+if __name__ == "__main__":
+    main()
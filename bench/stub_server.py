@@ -0,0 +1,139 @@
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fake_llm import FakeModel, FakeModelError, gemini_response, ollama_response, split_messages
+
+# ========================================
+# 벤치마크용 로컬 스텁 서버
+# ========================================
+# /list, /detail                     ← 녹화한 data.go.kr XML (페이지마다 서비스ID만 바꿔 응답)
+# /site/<copy>/<name>.html           ← 저장한 재단 홈페이지 (copy별로 같은 사이트 복제)
+# /api/chat                          ← Ollama chat 응답 형태
+# /v1beta/models/<model>:generateContent ← Gemini 응답 형태
+# LLM 응답은 fake_llm 규칙(프롬프트별 고정/규칙 기반 응답)으로 만들고, latency 만큼 지연.
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _read(name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class StubState:
+    def __init__(self, latency: float = 0.0, site_copies: int = 10):
+        self.model = FakeModel(latency=f"fixed:{latency}", error_rate=0.0, capacity=0, seed=0)
+        self.site_copies = site_copies
+        self.lock = threading.Lock()
+        self.hits = {"list": 0, "detail": 0, "site": 0, "ollama": 0, "gemini": 0}
+        self.list_xml = _read("list.xml")
+        self.detail_xml = _read("detail.xml")
+        self.pages = {
+            name: _read(os.path.join("site", name))
+            for name in os.listdir(os.path.join(FIXTURE_DIR, "site"))
+        }
+
+    def hit(self, kind: str):
+        with self.lock:
+            self.hits[kind] += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state: StubState = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: str, content_type: str, status: int = 200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/list":
+            self.state.hit("list")
+            page = int(query.get("pageNo", ["1"])[0])
+            # 페이지마다 다른 서비스ID가 되도록 접두사 교체 (길이 유지)
+            self._send(self.state.list_xml.replace("WLF0000", f"B{page:06d}"), "application/xml")
+        elif url.path == "/detail":
+            self.state.hit("detail")
+            serv_id = query.get("servId", ["WLF00000001"])[0]
+            self._send(self.state.detail_xml.replace("WLF00000001", serv_id), "application/xml")
+        elif url.path.startswith("/site/"):
+            self._site(url.path)
+        else:
+            self._send("not found", "text/plain", 404)
+
+    def _site(self, path: str):
+        m = re.fullmatch(r"/site/(\d+)/([\w.]+)", path)
+        if not m or m.group(2) not in self.state.pages:
+            self._send("not found", "text/html", 404)
+            return
+        self.state.hit("site")
+        html = self.state.pages[m.group(2)]
+        if m.group(2) == "index.html" and m.group(1) == "0":
+            # 첫 사이트 홈에 복제본 링크를 모아 같은 깊이에서 여러 페이지를 방문하게 함
+            links = "".join(
+                f'<li><a href="/site/{c}/{name}">공고 {c}-{name}</a></li>'
+                for c in range(1, self.state.site_copies) for name in ("notice.html", "apply.html")
+            )
+            html = html.replace("</main>", f"<ul>{links}</ul></main>")
+        self._send(html, "text/html; charset=utf-8")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        try:
+            if self.path == "/api/chat":
+                self.state.hit("ollama")
+                system, prompt = split_messages(payload.get("messages", []))
+                content = self.state.model.generate(system, prompt)
+                body = ollama_response(payload.get("model", ""), content, system + prompt)
+            elif ":generateContent" in self.path:
+                self.state.hit("gemini")
+                prompt = "\n".join(
+                    p.get("text", "") for c in payload.get("contents", []) for p in c.get("parts", [])
+                )
+                body = gemini_response(self.state.model.generate("", prompt), prompt)
+            else:
+                self._send("not found", "text/plain", 404)
+                return
+        except FakeModelError as e:
+            self._send(json.dumps({"error": e.error}), "application/json", e.status_code)
+            return
+        self._send(json.dumps(body, ensure_ascii=False), "application/json")
+
+
+def start_stub(latency: float = 0.0, site_copies: int = 10, port: int = 0):
+    """백그라운드 스레드로 서버 시작. (server, state, base_url) 반환"""
+    state = StubState(latency, site_copies)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    server, _, base = start_stub(float(os.getenv("BENCH_LLM_LATENCY", "0")),
+                                 port=int(os.getenv("PORT", "11435")))
+    print(f"stub server on {base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,416 @@
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy.sql import select
+
+from db import 복지서비스, 카테고리
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# ========================================
+# 복지서비스 카탈로그 조회 / 직렬화 / 응답 캐시
+# ========================================
+
+# 같은 데이터에 대해 직렬화·압축한 본문을 재사용할 시간 (초)
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+# 캐시 상한: 항목 수 / 본문(압축본 포함) 총 바이트. 넘으면 가장 오래 안 쓴 항목부터 제거
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "256"))
+CATALOG_CACHE_MAX_BYTES = int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# 메모리 카탈로그를 DB에서 다시 읽는 주기 (초). 배포 파이프라인은 /cache/invalidate 로 즉시 갱신
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "600"))
+
+# 고정 카테고리 목록의 출처 (분류 프롬프트)
+PROMPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "NLP", "prompt.txt")
+SERVICE_FIELDS = ("서비스ID", "정책명", "링크", "지원대상", "참고사항", "상세내용")
+# 제공 주체 (마지막은 서비스ID 형식을 알 수 없는 행)
+PROVIDERS = ("정부", "기업", "기타")
+
+JSON_TYPE = "application/json"
+COLUMNAR_TYPE = "application/vnd.welfare.columnar+json"
+MSGPACK_TYPE = "application/msgpack"
+
+
+def services_query(category: list | None = None, ids: list | None = None):
+    """카테고리목록 사본을 포함한 복지서비스 조회 (카테고리 필터는 OR, ids는 서비스ID 지정)"""
+    # 내부용 컬럼(원본해시)은 응답에 넣지 않음
+    stmt = select(*(복지서비스.c[f] for f in SERVICE_FIELDS), 복지서비스.c.카테고리목록)
+    if ids:
+        stmt = stmt.where(복지서비스.c.서비스ID.in_(ids))
+    if category:
+        # (카테고리, 서비스ID) 인덱스만으로 해당 서비스ID를 찾음
+        stmt = stmt.where(복지서비스.c.서비스ID.in_(
+            select(카테고리.c.서비스ID).where(카테고리.c.카테고리.in_(category))
+        ))
+    return stmt
+
+
+def to_service(row) -> dict:
+    """조회 행을 API 응답 형태로 변환 (카테고리목록 → 카테고리)"""
+    # 키가 SQLAlchemy quoted_name(str 하위 클래스)이라 그대로 두면 orjson이 dict 키로 받지 않음
+    s = {str(k): v for k, v in row.items()}
+    s["카테고리"] = s.pop("카테고리목록", None) or []
+    return s
+
+
+# ------------------------
+# 메모리 카탈로그 (열 단위 + 카테고리 비트마스크)
+# ------------------------
+@functools.lru_cache(maxsize=1)
+def load_category_names(path: str = PROMPT_PATH) -> tuple:
+    """분류 프롬프트의 '### 카테고리 목록' 항목 (비트 순서)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            prompt = f.read()
+    except FileNotFoundError:
+        return ()
+    section = prompt.split("### 카테고리 목록", 1)[-1].split("###", 1)[0]
+    return tuple(re.findall(r"^- (.+?)\s*$", section, flags=re.M))
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# 제공 주체는 서비스ID 형식으로 구분:
+#   data.go.kr servId (fetch_and_save, 예: WLF00001188) → 정부
+#   uuid4().hex[:20]  (MCP 클라이언트가 저장한 재단/기업 정책) → 기업
+GOV_SERVICE_ID = re.compile(r"[A-Z]+\d+")
+CRAWLED_SERVICE_ID = re.compile(r"[0-9a-f]{20}")
+
+
+def provider_of(service_id) -> int:
+    """서비스ID가 어디서 만들어졌는지로 제공 주체 구분 → PROVIDERS 인덱스"""
+    sid = service_id or ""
+    if GOV_SERVICE_ID.fullmatch(sid):
+        return 0
+    if CRAWLED_SERVICE_ID.fullmatch(sid):
+        return 1
+    return len(PROVIDERS) - 1
+
+
+class ColumnarCatalog:
+    """서비스를 필드별 리스트(문자열 intern)로 보관하고 카테고리는 행마다 uint64 비트마스크 하나로 표현.
+    카테고리 AND/OR 필터는 전체 행에 대한 비트 연산 한 번.
+    카테고리별/제공 주체별 건수는 적재 때 한 번 세고 upsert()로 바뀐 행만큼 갱신"""
+
+    MAX_BITS = 64
+
+    def __init__(self, services: list, category_names: tuple | None = None):
+        self.bits = {name: i for i, name in enumerate(category_names or load_category_names())}
+        self.columns = {f: [_intern(s.get(f)) for s in services] for f in SERVICE_FIELDS}
+        self.categories = [tuple(_intern(c) for c in s.get("카테고리") or ()) for s in services]
+        self.masks = np.array([self._mask(cats) for cats in self.categories], dtype=np.uint64)
+        self.providers = np.array([provider_of(s.get("서비스ID")) for s in services], dtype=np.int8)
+        self.index = {sid: i for i, sid in enumerate(self.columns["서비스ID"])}
+        self.category_counts = _bit_counts(self.masks, self.MAX_BITS)
+        self.provider_counts = np.bincount(self.providers, minlength=len(PROVIDERS)).astype(np.int64)
+        self.loaded_at = time.time()
+
+    def _bit(self, name: str):
+        # 프롬프트 목록 밖의 카테고리도 남는 비트가 있으면 배정 (64개 초과분은 필터 불가)
+        if name not in self.bits and len(self.bits) < self.MAX_BITS:
+            self.bits[name] = len(self.bits)
+        return self.bits.get(name)
+
+    def _mask(self, cats) -> int:
+        mask = 0
+        for c in cats:
+            bit = self._bit(c)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def __len__(self):
+        return len(self.masks)
+
+    def mask_for(self, names) -> tuple[int, bool]:
+        """(요청 카테고리들의 비트 합, 모르는 카테고리 포함 여부)"""
+        mask, unknown = 0, False
+        for name in names:
+            bit = self.bits.get(name)
+            if bit is None:
+                unknown = True
+            else:
+                mask |= 1 << bit
+        return mask, unknown
+
+    def match(self, category: list | None = None, match: str = "any",
+              exclude: list | None = None) -> np.ndarray:
+        """조건에 맞는 행 여부 (bool 배열). match='any' 는 OR, 'all' 은 AND. exclude 카테고리가 있는 행은 제외"""
+        selected = np.ones(len(self), dtype=bool)
+        if category:
+            mask, unknown = self.mask_for(category)
+            if match == "all":
+                if unknown:
+                    return np.zeros(len(self), dtype=bool)
+                selected = (self.masks & np.uint64(mask)) == np.uint64(mask)
+            else:
+                selected = (self.masks & np.uint64(mask)) != 0
+        if exclude:
+            mask, _ = self.mask_for(exclude)
+            selected &= (self.masks & np.uint64(mask)) == 0
+        return selected
+
+    def select(self, category: list | None = None, match: str = "any",
+               exclude: list | None = None) -> np.ndarray:
+        return np.flatnonzero(self.match(category, match, exclude))
+
+    def rows(self, indices) -> list:
+        """API 응답 형태(dict)로 변환 — 직렬화 직전에만 만듦"""
+        cols = self.columns
+        result = []
+        for i in indices:
+            row = {f: cols[f][i] for f in SERVICE_FIELDS}
+            row["카테고리"] = list(self.categories[i])
+            result.append(row)
+        return result
+
+    def upsert(self, services: list) -> int:
+        """수집/분류가 쓴 행을 반영하고 건수를 그 행만큼만 갱신. 새로 추가된 행 수 반환"""
+        added = []
+        for s in services:
+            i = self.index.get(s["서비스ID"])
+            if i is None:
+                added.append(s)
+                continue
+            self._count(i, -1)
+            for f in SERVICE_FIELDS:
+                self.columns[f][i] = _intern(s.get(f))
+            self.categories[i] = tuple(_intern(c) for c in s.get("카테고리") or ())
+            self.masks[i] = self._mask(self.categories[i])
+            self.providers[i] = provider_of(s.get("서비스ID"))
+            self._count(i, 1)
+        if added:
+            start = len(self)
+            for f in SERVICE_FIELDS:
+                self.columns[f].extend(_intern(s.get(f)) for s in added)
+            self.categories.extend(tuple(_intern(c) for c in s.get("카테고리") or ()) for s in added)
+            self.masks = np.concatenate([
+                self.masks, np.array([self._mask(cats) for cats in self.categories[start:]], dtype=np.uint64),
+            ])
+            self.providers = np.concatenate([
+                self.providers, np.array([provider_of(s.get("서비스ID")) for s in added], dtype=np.int8),
+            ])
+            for i in range(start, len(self)):
+                self.index[self.columns["서비스ID"][i]] = i
+                self._count(i, 1)
+        return len(added)
+
+    def remove(self, ids) -> int:
+        """DB에서 삭제된 서비스ID를 빼고 건수도 그 행만큼 갱신. 제거한 행 수 반환"""
+        drop = {self.index[sid] for sid in ids if sid in self.index}
+        if not drop:
+            return 0
+        for i in drop:
+            self._count(i, -1)
+        keep = np.ones(len(self), dtype=bool)
+        keep[list(drop)] = False
+        for f in SERVICE_FIELDS:
+            self.columns[f] = [v for v, k in zip(self.columns[f], keep) if k]
+        self.categories = [c for c, k in zip(self.categories, keep) if k]
+        self.masks = self.masks[keep]
+        self.providers = self.providers[keep]
+        self.index = {sid: i for i, sid in enumerate(self.columns["서비스ID"])}
+        return len(drop)
+
+    def _count(self, i: int, sign: int):
+        mask = int(self.masks[i])
+        while mask:
+            low = mask & -mask
+            self.category_counts[low.bit_length() - 1] += sign
+            mask ^= low
+        self.provider_counts[self.providers[i]] += sign
+
+    def facets(self, category: list | None = None, match: str = "any",
+               exclude: list | None = None) -> dict:
+        """카테고리별·제공 주체별 건수. 필터가 없으면 유지 중인 집계를 그대로, 있으면 해당 행만 비트 집계"""
+        if category or exclude:
+            selected = self.match(category, match, exclude)
+            category_counts = _bit_counts(self.masks[selected], self.MAX_BITS)
+            provider_counts = np.bincount(self.providers[selected], minlength=len(PROVIDERS))
+        else:
+            category_counts, provider_counts = self.category_counts, self.provider_counts
+        return {
+            "total": int(provider_counts.sum()),
+            "categories": {name: int(category_counts[bit]) for name, bit in self.bits.items()},
+            "providers": {p: int(n) for p, n in zip(PROVIDERS, provider_counts)},
+        }
+
+
+def _bit_counts(masks: np.ndarray, n_bits: int) -> np.ndarray:
+    """비트 위치별로 켜진 행 수 (비트마다 벡터 연산 한 번)"""
+    counts = np.zeros(n_bits, dtype=np.int64)
+    for bit in range(n_bits):
+        counts[bit] = int(np.count_nonzero(masks & np.uint64(1 << bit)))
+    return counts
+
+
+_catalog = None
+
+
+def current_catalog() -> ColumnarCatalog | None:
+    return _catalog
+
+
+def set_catalog(catalog: ColumnarCatalog):
+    """새로 읽은 카탈로그로 교체하고 직렬화 캐시를 비움"""
+    global _catalog
+    _catalog = catalog
+    catalog_cache.invalidate()
+
+
+def notify_changed(ids: list):
+    """수집/분류가 쓴 서비스ID를 API에 알려 메모리 카탈로그와 건수를 그 행만 갱신하게 함.
+    실패해도 저장 작업은 계속 (다음 주기 갱신 때 반영)"""
+    # 스크립트가 apikey.env를 import 뒤에 읽으므로 환경 변수는 호출 시점에 확인
+    # API_URL / ADMIN_TOKEN: main.py가 떠 있는 주소와 같은 관리 토큰
+    token = os.getenv("ADMIN_TOKEN", "")
+    if not ids or not token:
+        return
+    import requests
+    try:
+        res = requests.post(f"{os.getenv('API_URL', 'http://localhost:8000')}/catalog/rows",
+                            json={"ids": list(ids)}, headers={"X-Admin-Token": token}, timeout=10)
+        res.raise_for_status()
+    except Exception as e:
+        print(f"[catalog] 변경 알림 실패 ({len(ids)}건): {e}")
+
+
+# ------------------------
+# 직렬화
+# ------------------------
+def dumps_json(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def to_columnar(services: list) -> dict:
+    """필드명 표 + 행별 값 배열. 한글 키를 행마다 반복하지 않아 크기가 줄어듦"""
+    fields = list(services[0].keys()) if services else []
+    return {"fields": fields, "rows": [[s.get(f) for f in fields] for s in services]}
+
+
+def encode(services: list, media_type: str) -> bytes:
+    if media_type == COLUMNAR_TYPE:
+        return dumps_json(to_columnar(services))
+    if media_type == MSGPACK_TYPE:
+        return msgpack.packb(to_columnar(services), use_bin_type=True)
+    return dumps_json({"data": services})
+
+
+def negotiate_format(accept: str | None) -> str:
+    accept = (accept or "").lower()
+    if COLUMNAR_TYPE in accept:
+        return COLUMNAR_TYPE
+    if msgpack is not None and ("application/msgpack" in accept or "application/x-msgpack" in accept):
+        return MSGPACK_TYPE
+    return JSON_TYPE
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str:
+    tokens = {t.split(";")[0].strip() for t in (accept_encoding or "").lower().split(",")}
+    if brotli is not None and "br" in tokens:
+        return "br"
+    if "gzip" in tokens:
+        return "gzip"
+    return "identity"
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=9)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+# ------------------------
+# 응답 캐시
+# ------------------------
+class CatalogCache:
+    """(필터, 형식)별로 직렬화 본문과 압축본을 한 번만 만들어 재사용.
+    필터 조합은 요청마다 임의로 올 수 있으므로 항목 수와 총 바이트로 제한하는 LRU"""
+
+    def __init__(self, ttl: float = CATALOG_CACHE_TTL, max_entries: int = CATALOG_CACHE_MAX_ENTRIES,
+                 max_bytes: int = CATALOG_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry["built_at"] > self.ttl:
+            self._drop(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, body: bytes) -> dict:
+        if key in self.entries:
+            self._drop(key)
+        entry = {
+            "built_at": time.monotonic(),
+            "etag": 'W/"' + hashlib.sha1(body).hexdigest() + '"',
+            "bodies": {"identity": body},
+            "size": len(body),
+            "key": key,
+        }
+        self.entries[key] = entry
+        self.size += entry["size"]
+        self._evict()
+        return entry
+
+    def body(self, entry: dict, encoding: str) -> bytes:
+        bodies = entry["bodies"]
+        if encoding not in bodies:
+            bodies[encoding] = compress(bodies["identity"], encoding)
+            if self.entries.get(entry["key"]) is entry:
+                entry["size"] += len(bodies[encoding])
+                self.size += len(bodies[encoding])
+                self._evict(keep=entry)
+        return bodies[encoding]
+
+    def _drop(self, key):
+        self.size -= self.entries.pop(key)["size"]
+
+    def _evict(self, keep: dict | None = None):
+        # 방금 넣은 항목 하나는 상한을 넘더라도 남김 (이번 응답에서 바로 씀)
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+            key, oldest = next(iter(self.entries.items()))
+            if oldest is keep:
+                self.entries.move_to_end(key)
+                key = next(iter(self.entries))
+            self._drop(key)
+
+    def invalidate(self):
+        self.entries.clear()
+        self.size = 0
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+import uuid
+
+# ========================================
+# 비동기 크롤링 작업 (제출 → 상태 조회)
+# ========================================
+# 요청 하나가 크롤링 전체 동안 연결을 붙잡지 않도록 작업으로 받아 고정 수의 워커가 처리.
+# 워커 수가 곧 동시에 열리는 브라우저 컨텍스트 수 (클라이언트 수와 무관).
+# 같은 (start_url, max_depth)는 진행 중이면 그 작업을, 끝난 지 CRAWL_RESULT_TTL 안이면 완료된 작업을 돌려줌.
+# refresh 요청은 이전 결과를 돌려주지 않고 새 작업을 띄움 (진행 중인 refresh 작업이 있으면 그것을 공유).
+# 작업 목록은 프로세스 메모리에만 둠 (재시작하면 사라짐, 페이지별 결과는 PageStore에 남음)
+
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", "2"))
+CRAWL_RESULT_TTL = float(os.getenv("CRAWL_RESULT_TTL", "3600"))
+# 메모리에 남겨 둘 작업 수 (오래된 완료 작업부터 제거)
+CRAWL_JOB_HISTORY = int(os.getenv("CRAWL_JOB_HISTORY", "200"))
+
+
+class CrawlJob:
+    def __init__(self, start_url: str, max_depth: int, refresh: bool = False):
+        self.id = uuid.uuid4().hex
+        self.start_url = start_url
+        self.max_depth = max_depth
+        # True면 재크롤링 주기(CRAWL_RECRAWL_TTL) 안에 방문한 페이지도 다시 가져옴
+        self.refresh = refresh
+        self.status = "queued"  # queued → running → done | failed
+        self.pages = 0
+        self.results = []
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = asyncio.Event()
+
+    @property
+    def key(self) -> tuple:
+        return self.start_url, self.max_depth
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def add_result(self, item: dict):
+        """판정이 끝난 결과를 바로 조회에 노출"""
+        self.results.append(item)
+
+    def to_dict(self, offset: int = 0) -> dict:
+        """offset 이후 결과만 포함. 클라이언트는 next_offset으로 이어서 폴링"""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "start_url": self.start_url,
+            "max_depth": self.max_depth,
+            "pages": self.pages,
+            "count": len(self.results),
+            "data": self.results[offset:],
+            "next_offset": len(self.results),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class CrawlJobManager:
+    """runner(job) 코루틴을 워커 풀에서 실행. 이벤트 루프가 바뀌면 (테스트/벤치의 asyncio.run) 워커를 새로 띄움"""
+
+    def __init__(self, runner, workers: int = CRAWL_WORKERS, result_ttl: float = CRAWL_RESULT_TTL,
+                 history: int = CRAWL_JOB_HISTORY):
+        self.runner = runner
+        self.n_workers = workers
+        self.result_ttl = result_ttl
+        self.history = history
+        self.jobs = {}
+        self.active = {}
+        self.completed = {}
+        self.queue = None
+        self.workers = []
+        self.loop = None
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.queue = asyncio.Queue()
+            self.active.clear()
+            self.workers = [loop.create_task(self._worker()) for _ in range(self.n_workers)]
+
+    def submit(self, start_url: str, max_depth: int, refresh: bool = False) -> CrawlJob:
+        self._ensure_workers()
+        key = (start_url, max_depth)
+        job = self.active.get(key)
+        if job is not None and (job.refresh or not refresh):
+            return job
+        job = None if refresh else self.completed.get(key)
+        if job is not None and time.time() - job.finished_at < self.result_ttl:
+            self.jobs.pop(job.id, None)
+            self.jobs[job.id] = job
+            return job
+
+        job = CrawlJob(start_url, max_depth, refresh)
+        self.jobs[job.id] = job
+        self.active[key] = job
+        self.queue.put_nowait(job)
+        self._trim()
+        return job
+
+    def get(self, job_id: str) -> CrawlJob | None:
+        return self.jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                await self.runner(job)
+                job.status = "done"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                # 같은 키로 뒤에 제출된 refresh 작업이 진행 중이면 그대로 둠
+                if self.active.get(job.key) is job:
+                    del self.active[job.key]
+                if job.status == "done":
+                    self.completed[job.key] = job
+                job.done.set()
+                self.queue.task_done()
+                self._trim()
+
+    def _trim(self):
+        # 오래된 완료 작업부터 제거 (진행 중인 작업은 유지), 만료된 결과 캐시도 정리
+        for job_id in [j.id for j in self.jobs.values() if j.finished][: max(0, len(self.jobs) - self.history)]:
+            del self.jobs[job_id]
+        now = time.time()
+        self.completed = {k: j for k, j in self.completed.items() if now - j.finished_at < self.result_ttl}
+
+    def stats(self) -> dict:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {"workers": self.n_workers, "cached": len(self.completed), **counts}
+
+    async def close(self):
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        self.loop = None
@@ -0,0 +1,72 @@
+import json
+import os
+import uuid
+
+# ========================================
+# 크롤링 결과 실행 파일 (JSONL)
+# ========================================
+# 크롤러가 페이지 결과를 메모리 리스트에 모으지 않고 추출하는 즉시 한 줄씩 파일에 덧붙임.
+# MCP 도구 사이에는 결과 전체 대신 실행 핸들({"run", "path", "count"})만 주고받고,
+# 하위 단계는 iter_chunks 로 파일을 조금씩 읽어 처리 → 대규모 크롤링에서도 두 프로세스의 메모리와
+# stdio 메시지 크기가 결과 수에 비례해 늘지 않음. (서버는 클라이언트가 띄운 하위 프로세스라 같은 디스크를 씀)
+
+CRAWL_RUN_DIR = os.getenv(
+    "CRAWL_RUN_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs", "crawl")
+)
+# 하위 단계가 한 번에 읽는 결과 수
+CRAWL_RUN_CHUNK = int(os.getenv("CRAWL_RUN_CHUNK", "100"))
+
+
+class CrawlRun:
+    """결과를 한 줄에 하나씩 기록하는 쓰기 핸들. with 문으로 쓰거나 close() 호출"""
+
+    def __init__(self, run_dir: str = CRAWL_RUN_DIR, run_id: str | None = None):
+        os.makedirs(run_dir, exist_ok=True)
+        self.id = run_id or uuid.uuid4().hex
+        self.path = os.path.join(run_dir, f"{self.id}.jsonl")
+        self.count = 0
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def append(self, item: dict):
+        self.file.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def handle(self) -> dict:
+        """도구 사이에 넘기는 값 (결과 본문은 포함하지 않음)"""
+        if not self.file.closed:
+            self.file.flush()
+        return {"run": self.id, "path": self.path, "count": self.count}
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_chunks(path: str, size: int = CRAWL_RUN_CHUNK):
+    """실행 파일을 size 건씩 나눠 읽음. 깨진 줄(중단된 쓰기)은 건너뜀"""
+    chunk = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                chunk.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def remove_run(path: str):
+    """하위 단계가 결과를 다 옮긴 뒤 실행 파일 삭제"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
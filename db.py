@@ -1,6 +1,11 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, MetaData, Table, Column, String, Text, Integer, ForeignKey
+import re
+from metrics import inc, timed
+from sqlalchemy import (
+    create_engine, MetaData, Table, Column, String, Text, Integer, ForeignKey,
+    JSON, Index, UniqueConstraint, inspect, text,
+)
 
 # 개발 시
 load_dotenv("apikey.env")
@@ -15,11 +20,67 @@ DB_NAME = os.getenv("DATABASE_NAME")
 # DB_HOST = os.environ.get("DATABASE_URL", "localhost")
 # DB_NAME = os.environ.get("DATABASE_NAME", "welfare")
 
+# -------------------------
+# 엔진 / 커넥션 풀 설정
+# -------------------------
+# 워크로드별 풀 설정. API는 동시 요청을 받고, 배치는 연결 한두 개를 오래 씀.
+# pool_pre_ping/pool_recycle로 MySQL wait_timeout에 끊긴 연결을 재사용하지 않도록 함
+POOL_PROFILES = {
+    "api": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 10, "pool_recycle": 1800},
+    "batch": {"pool_size": 2, "max_overflow": 2, "pool_timeout": 30, "pool_recycle": 600},
+}
 
-engine = create_engine(
-    f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}?charset=utf8mb4",
-    echo=False
-)
+# 환경변수로 워크로드 설정 덮어쓰기 (예: DB_POOL_SIZE=20)
+POOL_ENV = {
+    "pool_size": "DB_POOL_SIZE",
+    "max_overflow": "DB_MAX_OVERFLOW",
+    "pool_timeout": "DB_POOL_TIMEOUT",
+    "pool_recycle": "DB_POOL_RECYCLE",
+}
+
+# 비동기 드라이버 (asyncmy 또는 aiomysql)
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "asyncmy")
+
+# 접속 URL 직접 지정 (벤치마크/로컬 실행용, 예: sqlite:///bench.sqlite, sqlite+aiosqlite:///bench.sqlite)
+DB_DSN = os.getenv("DB_DSN", "")
+DB_ASYNC_DSN = os.getenv("DB_ASYNC_DSN", "")
+
+
+def database_url(driver: str = "pymysql") -> str:
+    return f"mysql+{driver}://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}?charset=utf8mb4"
+
+
+def pool_options(workload: str, **overrides) -> dict:
+    options = dict(POOL_PROFILES[workload])
+    for key, env in POOL_ENV.items():
+        if os.getenv(env):
+            options[key] = int(os.getenv(env))
+    options.update(overrides)
+    options["pool_pre_ping"] = True
+    return options
+
+
+def make_engine(workload: str = "batch", **overrides):
+    """동기 엔진 생성. 연결은 처음 사용할 때 풀에서 꺼냄"""
+    return create_engine(DB_DSN or database_url("pymysql"), echo=False, **pool_options(workload, **overrides))
+
+
+_async_engine = None
+
+
+def get_async_engine():
+    """API용 비동기 엔진 (SQLAlchemy asyncio, 처음 호출할 때 생성)"""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        _async_engine = create_async_engine(
+            DB_ASYNC_DSN or database_url(DB_ASYNC_DRIVER), echo=False, **pool_options("api")
+        )
+    return _async_engine
+
+
+# 배치 스크립트 기본 엔진 (생성만으로는 DB에 연결하지 않음)
+engine = make_engine(os.getenv("DB_WORKLOAD", "batch"))
 
 metadata = MetaData()
 
@@ -33,12 +94,112 @@ metadata = MetaData()
     Column("링크", Text),
     Column("지원대상", Text),
     Column("참고사항", Text),
-    Column("상세내용", Text)
+    Column("상세내용", Text),
+    # 서비스별 카테고리 목록 (카테고리 테이블의 비정규화 사본, 조회 API용)
+    Column("카테고리목록", JSON),
+    # 공공데이터 API 원본 값의 해시 (fetch_and_save 변경 감지용, 분류가 덮어쓰는 컬럼과 무관)
+    Column("원본해시", String(64)),
 )
 
 카테고리 = Table(
     "카테고리", metadata,
     Column("카테고리ID", Integer, primary_key=True, autoincrement=True),
     Column("서비스ID", String(20), ForeignKey("복지서비스.서비스ID", onupdate="CASCADE", ondelete="CASCADE")),
-    Column("카테고리", String(50))
+    Column("카테고리", String(50)),
+    UniqueConstraint("서비스ID", "카테고리", name="uq_category_service"),
+    Index("ix_category_name", "카테고리", "서비스ID"),
 )
+
+
+# -------------------------
+# 카테고리 저장 헬퍼
+# -------------------------
+def split_categories(raw) -> list:
+    """'저소득층, 주거' 같은 모델 출력(또는 리스트)을 순서를 유지한 개별 카테고리 목록으로 변환"""
+    if not raw:
+        return []
+    parts = raw if isinstance(raw, (list, tuple)) else re.split(r"[,\n]", str(raw))
+    result = []
+    for p in parts:
+        p = str(p).strip().strip("`'\"").strip()
+        if p and len(p) <= 50 and p not in result:
+            result.append(p)
+    return result
+
+
+@timed("db_save_categories")
+def save_categories(conn, service_id: str, categories) -> list:
+    """서비스의 카테고리를 개별 행으로 교체 저장하고 카테고리목록 사본도 함께 갱신"""
+    cats = split_categories(categories)
+    conn.execute(카테고리.delete().where(카테고리.c.서비스ID == service_id))
+    if cats:
+        conn.execute(
+            카테고리.insert().prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+            [{"서비스ID": service_id, "카테고리": c} for c in cats],
+        )
+    conn.execute(
+        복지서비스.update()
+        .where(복지서비스.c.서비스ID == service_id)
+        .values(카테고리목록=cats)
+    )
+    inc("db_rows_written_total", len(cats), table="카테고리")
+    return cats
+
+
+# -------------------------
+# 기존 DB 마이그레이션
+# -------------------------
+def migrate_schema():
+    """인덱스/유니크키/카테고리목록·원본해시 컬럼 추가 및 기존 데이터 정리 (여러 번 실행해도 안전)"""
+    metadata.create_all(engine)
+    insp = inspect(engine)
+
+    with engine.begin() as conn:
+        columns = {c["name"] for c in insp.get_columns("복지서비스")}
+        if "카테고리목록" not in columns:
+            conn.execute(text("ALTER TABLE 복지서비스 ADD COLUMN 카테고리목록 JSON NULL"))
+        if "원본해시" not in columns:
+            # 기존 행은 해시가 없으므로 다음 수집 때 한 번 바뀐 행으로 처리됨
+            conn.execute(text("ALTER TABLE 복지서비스 ADD COLUMN 원본해시 VARCHAR(64) NULL"))
+
+        # 쉼표로 묶여 저장된 카테고리를 개별 행으로 분리
+        rows = conn.execute(text(
+            "SELECT 카테고리ID, 서비스ID, 카테고리 FROM 카테고리 WHERE 카테고리 LIKE '%,%'"
+        )).all()
+        for cat_id, service_id, raw in rows:
+            for c in split_categories(raw):
+                conn.execute(카테고리.insert().prefix_with("IGNORE").values(서비스ID=service_id, 카테고리=c))
+            conn.execute(카테고리.delete().where(카테고리.c.카테고리ID == cat_id))
+        print(f"[migrate] 묶음 카테고리 {len(rows)}행 분리")
+
+        # 유니크키 추가 전에 중복 행 제거 (가장 먼저 들어온 행만 유지)
+        deleted = conn.execute(text(
+            "DELETE c1 FROM 카테고리 c1 JOIN 카테고리 c2"
+            " ON c1.서비스ID = c2.서비스ID AND c1.카테고리 = c2.카테고리"
+            " AND c1.카테고리ID > c2.카테고리ID"
+        )).rowcount
+        print(f"[migrate] 중복 카테고리 {deleted}행 삭제")
+
+        index_names = {i["name"] for i in insp.get_indexes("카테고리")}
+        index_names |= {u["name"] for u in insp.get_unique_constraints("카테고리")}
+        if "uq_category_service" not in index_names:
+            conn.execute(text(
+                "ALTER TABLE 카테고리 ADD UNIQUE KEY uq_category_service (서비스ID, 카테고리)"
+            ))
+        if "ix_category_name" not in index_names:
+            conn.execute(text(
+                "ALTER TABLE 카테고리 ADD INDEX ix_category_name (카테고리, 서비스ID)"
+            ))
+
+        # 카테고리목록 사본 재구성
+        conn.execute(text("UPDATE 복지서비스 SET 카테고리목록 = JSON_ARRAY()"))
+        conn.execute(text(
+            "UPDATE 복지서비스 s JOIN ("
+            " SELECT 서비스ID, JSON_ARRAYAGG(카테고리) AS cats FROM 카테고리 GROUP BY 서비스ID"
+            ") c ON s.서비스ID = c.서비스ID SET s.카테고리목록 = c.cats"
+        ))
+        print("[migrate] 카테고리목록 재구성 완료")
+
+
+if __name__ == "__main__":
+    migrate_schema()
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import re
+
+import numpy as np
+
+# ========================================
+# MinHash + LSH 기반 유사 중복 탐지
+# ========================================
+
+# 유사도 기준 (추정 Jaccard) / 시그니처 길이 / LSH 밴드 수
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "32"))
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text: str, k: int = 5) -> set:
+    """공백·기호를 제거한 문자 k-gram 집합 (한글은 어절 경계가 자주 달라 문자 단위 사용)"""
+    text = re.sub(r"[\s\W_]+", "", (text or "").lower())
+    if not text:
+        return set()
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # x < 2^32 이므로 a < 2^29 이면 a*x + b < 2^61 + 2^32 → uint64 안에서 넘치지 않고 정확히 계산됨
+        self.a = rng.randint(1, 1 << 29, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, (1 << 32) - 1, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: set) -> np.ndarray:
+        if not shingle_set:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hv = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in shingle_set),
+            dtype=np.uint64, count=len(shingle_set),
+        )
+        # (a*x + b) mod p 를 순열마다 계산해 최솟값만 남김
+        phv = (np.outer(self.a, hv) + self.b[:, None]) % _MERSENNE & _MAX_HASH
+        return phv.min(axis=1)
+
+
+def similarity(sig1: np.ndarray, sig2: np.ndarray) -> float:
+    """시그니처 일치 비율 = Jaccard 추정치"""
+    return float(np.mean(sig1 == sig2))
+
+
+class DedupIndex:
+    """밴드별 버킷에 시그니처를 넣어 후보만 비교 (전체 쌍 비교 없이 준선형)"""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM,
+                 bands: int = DEDUP_BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+
+    def _band_keys(self, sig: np.ndarray):
+        for i in range(self.bands):
+            yield i, sig[i * self.rows:(i + 1) * self.rows].tobytes()
+
+    def query(self, text: str) -> tuple[str | None, float]:
+        """가장 비슷한 기존 항목과 유사도. 기준 미만이면 (None, 최고 유사도)"""
+        sig = self.hasher.signature(shingles(text))
+        return self._query(sig)
+
+    def _query(self, sig: np.ndarray) -> tuple[str | None, float]:
+        candidates = set()
+        for i, key in self._band_keys(sig):
+            candidates.update(self.buckets[i].get(key, ()))
+        best, best_sim = None, 0.0
+        for cand in candidates:
+            sim = similarity(sig, self.signatures[cand])
+            if sim > best_sim:
+                best, best_sim = cand, sim
+        if best_sim >= self.threshold:
+            return best, best_sim
+        return None, best_sim
+
+    def add(self, key: str, text: str) -> str | None:
+        """중복이면 원본 key를 반환하고 색인하지 않음. 새 항목이면 색인 후 None"""
+        sig = self.hasher.signature(shingles(text))
+        if not sig.size or sig[0] == _MAX_HASH:
+            return None
+        dup, _ = self._query(sig)
+        if dup is not None:
+            return dup
+        self.signatures[key] = sig
+        for i, band in self._band_keys(sig):
+            self.buckets[i].setdefault(band, []).append(key)
+        return None
+
+    def __len__(self):
+        return len(self.signatures)
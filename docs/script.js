@@ -4,6 +4,7 @@ document.addEventListener("DOMContentLoaded", async () => {
     const searchInput = document.querySelector(".search-container input");
     const searchBtn = document.querySelector(".search-container button");
     const resultCount = document.getElementById("result-count");
+    const providerCount = document.getElementById("provider-count");
     const favoriteCount = document.getElementById("favorite-count");
     const viewBtns = document.querySelectorAll(".view-btn");
     
@@ -24,6 +25,7 @@ document.addEventListener("DOMContentLoaded", async () => {
 
     const selectedCategories = new Set();
     const excludedCategories = new Set();
+    const filterButtons = new Map();
 
     // --- 필터 버튼 생성 ---
     for (const [id, arr] of Object.entries(filters)) {
@@ -34,7 +36,11 @@ document.addEventListener("DOMContentLoaded", async () => {
             btn.textContent = cat;
             btn.dataset.value = cat;
             btn.dataset.clickCount = 0;
+            const countEl = document.createElement("span");
+            countEl.className = "facet-count";
+            btn.appendChild(countEl);
             container.appendChild(btn);
+            filterButtons.set(cat, countEl);
 
             btn.addEventListener("click", () => {
                 let count = (parseInt(btn.dataset.clickCount) + 1) % 3;
@@ -99,48 +105,180 @@ document.addEventListener("DOMContentLoaded", async () => {
     favoriteCount.textContent = favorites.size;
 
     // --- 데이터 불러오기 ---
-    try {
-        const res = await fetch("https://port-0-socialwelfare-mgjckxvm97f5b4e4.sel3.cloudtype.app/services");
-        const data = await res.json();
-        // 정규화: 서비스 배열을 받아 각 항목의 필드를 안전하게 초기화하고
-        // 카테고리를 배열로 보장합니다. 백엔드에서 문자열로 반환할 수도 있으므로
-        // 쉼표로 분리해 배열로 변환합니다.
-        services = (data.data || []).map(s => {
-            const catsRaw = s.카테고리 || [];
-            // 강력한 분리 로직: 한 항목에 '아동, 청소년, 교육'처럼 묶여있거나
-            // '아동/청소년' 등 여러 구분자가 섞여 있어도 각각 분리합니다.
-            const splitRegex = /[,/|;、·\/\\]+|\s{2,}|\s?[-–—]\s?|\s+/; // 여러 구분자 지원
-            let cats = [];
-            if (Array.isArray(catsRaw)) {
-                catsRaw.forEach(elem => {
-                    if (!elem) return;
-                    const parts = elem.toString().split(splitRegex).map(c => c.trim()).filter(Boolean);
-                    parts.forEach(p => cats.push(p));
-                });
-            } else if (typeof catsRaw === 'string') {
-                cats = catsRaw.split(splitRegex).map(c => c.trim()).filter(Boolean);
-            } else {
-                cats = [];
-            }
-            // 순서 보존된 중복 제거
-            const seen = new Set();
-            cats = cats.filter(c => {
-                const key = c.toString();
-                if (seen.has(key)) return false;
-                seen.add(key);
-                return true;
+    // 정적 스냅샷(data/manifest.json)이 있으면 필요한 샤드만 받고, 없으면 API 전체 조회
+    const API_URL = "https://port-0-socialwelfare-mgjckxvm97f5b4e4.sel3.cloudtype.app/services";
+    const FACETS_URL = API_URL.replace(/\/services$/, "/facets");
+    const STATIC_BASE = "data/";
+    let manifest = null;
+    let searchIndex = null;
+    const shardCache = new Map();
+    let loadSeq = 0;
+
+    // 정규화: 서비스 배열을 받아 각 항목의 필드를 안전하게 초기화하고
+    // 카테고리를 배열로 보장합니다. 백엔드에서 문자열로 반환할 수도 있으므로
+    // 쉼표로 분리해 배열로 변환합니다.
+    // 강력한 분리 로직: 한 항목에 '아동, 청소년, 교육'처럼 묶여있거나
+    // '아동/청소년' 등 여러 구분자가 섞여 있어도 각각 분리합니다.
+    const splitRegex = /[,/|;、·\/\\]+|\s{2,}|\s?[-–—]\s?|\s+/; // 여러 구분자 지원
+
+    function splitCategories(catsRaw) {
+        let cats = [];
+        if (Array.isArray(catsRaw)) {
+            catsRaw.forEach(elem => {
+                if (!elem) return;
+                const parts = elem.toString().split(splitRegex).map(c => c.trim()).filter(Boolean);
+                parts.forEach(p => cats.push(p));
             });
+        } else if (typeof catsRaw === 'string') {
+            cats = catsRaw.split(splitRegex).map(c => c.trim()).filter(Boolean);
+        }
+        // 순서 보존된 중복 제거
+        const seen = new Set();
+        return cats.filter(c => {
+            const key = c.toString();
+            if (seen.has(key)) return false;
+            seen.add(key);
+            return true;
+        });
+    }
+
+    function normalizeService(s) {
+        return {
+            ...s,
+            정책명: s.정책명 || "",
+            지원대상: s.지원대상 || "",
+            참고사항: s.참고사항 || "",
+            상세내용: s.상세내용 || "",
+            링크: s.링크 || s.정책링크 || "",
+            카테고리: splitCategories(s.카테고리 || [])
+        };
+    }
 
-            return {
-                ...s,
-                정책명: s.정책명 || "",
-                지원대상: s.지원대상 || "",
-                참고사항: s.참고사항 || "",
-                상세내용: s.상세내용 || "",
-                링크: s.링크 || s.정책링크 || "",
-                카테고리: cats
-            };
+    // 컬럼형 샤드({fields, rows})를 객체 배열로 변환
+    function fromColumnar(data) {
+        return (data.rows || []).map(row => {
+            const obj = {};
+            data.fields.forEach((f, i) => { obj[f] = row[i]; });
+            return obj;
         });
+    }
+
+    function fetchJson(file) {
+        return fetch(STATIC_BASE + file).then(res => {
+            if (!res.ok) throw new Error(`${file}: ${res.status}`);
+            return res.json();
+        });
+    }
+
+    function fetchShard(file) {
+        if (!shardCache.has(file)) {
+            shardCache.set(file, fetchJson(file).then(data => fromColumnar(data).map(normalizeService)));
+        }
+        return shardCache.get(file);
+    }
+
+    // 화면 필터 이름('임신')과 DB 카테고리('임신·출산')를 같은 분리 규칙으로 대응
+    function namesForCategory(names, cat) {
+        const target = cat.toLowerCase();
+        return names.filter(name => splitCategories([name]).some(p => p.toLowerCase() === target));
+    }
+
+    function shardsForCategory(cat) {
+        return namesForCategory(Object.keys(manifest.categories), cat)
+            .map(name => manifest.categories[name].file);
+    }
+
+    // --- 필터별 건수 ---
+    // 서버(/facets)가 유지하는 집계로 버튼 옆 건수와 정부/기업 구분을 표시.
+    // 선택/제외한 카테고리가 있으면 그 조건 안에서의 건수. API가 없으면 스냅샷 manifest의 전체 건수 사용
+    let facetNames = [];
+    let facetSeq = 0;
+
+    function renderFacets(counts, providers) {
+        for (const [cat, countEl] of filterButtons) {
+            const n = namesForCategory(Object.keys(counts), cat).reduce((sum, name) => sum + counts[name], 0);
+            countEl.textContent = n;
+        }
+        providerCount.textContent = providers ? `정부 ${providers["정부"]}개 · 기업 ${providers["기업"]}개` : "";
+    }
+
+    async function loadFacets() {
+        const seq = ++facetSeq;
+        const params = new URLSearchParams();
+        selectedCategories.forEach(cat => namesForCategory(facetNames, cat).forEach(n => params.append("category", n)));
+        excludedCategories.forEach(cat => namesForCategory(facetNames, cat).forEach(n => params.append("exclude", n)));
+        try {
+            const res = await fetch(`${FACETS_URL}?${params}`);
+            if (!res.ok) throw new Error(`facets: ${res.status}`);
+            const facets = await res.json();
+            if (seq !== facetSeq) return;
+            if (!facetNames.length) facetNames = Object.keys(facets.categories);
+            renderFacets(facets.categories, facets.providers);
+        } catch (e) {
+            if (seq !== facetSeq || !manifest) return;
+            const counts = {};
+            Object.entries(manifest.categories).forEach(([name, info]) => { counts[name] = info.count; });
+            renderFacets(counts, null);
+        }
+    }
+
+    // 소문자·공백 정리한 문자 2-gram (export_static.search_grams와 같은 규칙)
+    function searchGrams(text) {
+        const chars = Array.from(text.toLowerCase().split(/\s+/).filter(Boolean).join(" "));
+        const grams = new Set();
+        for (let i = 0; i + 1 < chars.length; i++) grams.add(chars[i] + chars[i + 1]);
+        return [...grams];
+    }
+
+    // 현재 선택/검색 상태에 필요한 샤드만 받아 services를 채움
+    async function loadServices() {
+        if (!manifest) return;
+        let files;
+        const keyword = searchKeyword.trim().toLowerCase();
+        if (selectedCategories.size > 0) {
+            files = [...new Set([...selectedCategories].flatMap(shardsForCategory))];
+        } else if (keyword) {
+            const grams = searchGrams(keyword);
+            if (grams.length === 0) {
+                // 한 글자 검색어는 색인으로 좁힐 수 없으므로 전체 청크
+                files = manifest.all;
+            } else {
+                if (!searchIndex) searchIndex = fetchJson(manifest.search).then(data => data.index);
+                const index = await searchIndex;
+                // 검색어의 2-gram을 모두 가진 청크만 (실제 포함 여부는 아래 목록 필터에서 다시 확인)
+                let chunks = null;
+                for (const gram of grams) {
+                    const found = new Set(index[gram] || []);
+                    chunks = chunks === null ? found : new Set([...chunks].filter(c => found.has(c)));
+                    if (chunks.size === 0) break;
+                }
+                files = [...chunks].map(i => manifest.all[i]);
+            }
+        } else {
+            files = manifest.all;
+        }
+        const lists = await Promise.all(files.map(fetchShard));
+        const byId = new Map();
+        lists.flat().forEach(s => byId.set(s.서비스ID, s));
+        services = [...byId.values()];
+    }
+
+    try {
+        try {
+            manifest = await fetchJson(`manifest.json?t=${Date.now()}`);
+        } catch (e) {
+            manifest = null;
+        }
+        // 건수는 목록을 기다리지 않고 따로 받아 필터 버튼을 바로 그림
+        loadFacets();
+
+        if (manifest) {
+            await loadServices();
+        } else {
+            const res = await fetch(API_URL);
+            const data = await res.json();
+            services = (data.data || []).map(normalizeService);
+        }
 
         renderServices(services);
     } catch (e) {
@@ -207,7 +345,17 @@ document.addEventListener("DOMContentLoaded", async () => {
     }
 
     // --- 필터 + 검색 적용 ---
-    function applyFilters() {
+    async function applyFilters() {
+        const seq = ++loadSeq;
+        loadFacets();
+        try {
+            await loadServices();
+        } catch (e) {
+            console.error(e);
+        }
+        // 더 나중에 시작된 호출이 있으면 이 결과는 버림
+        if (seq !== loadSeq) return;
+
         const keyword = searchKeyword.trim().toLowerCase();
         let filtered = services.filter(service => {
             const cats = Array.isArray(service.카테고리) ? service.카테고리.map(c => (c||"").toString().trim()) : [];
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import shutil
+import sys
+import time
+
+from db import engine
+from catalog import dumps_json, services_query, to_columnar, to_service
+
+# ========================================
+# 정적 스냅샷 내보내기 (GitHub Pages / CDN 용)
+# ========================================
+# docs/data/manifest.json          ← 매번 덮어씀 (짧게 캐시)
+# docs/data/<version>/all-000.json ← 내용 해시로 버전이 바뀌므로 영구 캐시 가능
+# docs/data/<version>/category-00.json, search.json
+# 압축은 GitHub Pages/CDN이 전송 시 처리하므로 .gz 사본은 만들지 않음
+
+EXPORT_DIR = os.getenv(
+    "EXPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "docs", "data")
+)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "500"))
+EXPORT_KEEP_VERSIONS = int(os.getenv("EXPORT_KEEP_VERSIONS", "3"))
+
+SEARCH_FIELDS = ["정책명", "지원대상", "상세내용", "참고사항"]
+
+
+def search_grams(text: str) -> set:
+    """소문자·공백 정리한 문자 2-gram (docs/script.js의 searchGrams와 같은 규칙)"""
+    chars = list(" ".join((text or "").lower().split()))
+    return {a + b for a, b in zip(chars, chars[1:])}
+
+
+def build_search_index(services: list, chunk_size: int) -> dict:
+    """2-gram → 그 2-gram이 들어 있는 청크 번호 목록.
+    검색어의 2-gram을 모두 가진 청크만 받아 브라우저에서 부분 문자열로 다시 거름 (본문 사본을 내려받지 않음)"""
+    index = {}
+    for i, s in enumerate(services):
+        chunk = i // chunk_size
+        for gram in search_grams(" ".join(str(s.get(f) or "") for f in SEARCH_FIELDS)):
+            chunks = index.setdefault(gram, [])
+            if not chunks or chunks[-1] != chunk:
+                chunks.append(chunk)
+    return {"gram": 2, "index": index}
+
+
+def _write(version_dir: str, name: str, obj, hashes: dict) -> str:
+    """JSON을 쓰고 매니페스트에 넣을 상대 경로 반환"""
+    body = dumps_json(obj)
+    path = os.path.join(version_dir, name)
+    with open(path, "wb") as f:
+        f.write(body)
+    rel = f"{os.path.basename(version_dir)}/{name}"
+    hashes[rel] = hashlib.sha256(body).hexdigest()
+    return rel
+
+
+def _prune(out_dir: str, keep: str):
+    """오래된 버전 디렉터리 정리 (최신 EXPORT_KEEP_VERSIONS개 유지)"""
+    versions = [
+        d for d in os.listdir(out_dir)
+        if os.path.isdir(os.path.join(out_dir, d)) and d != keep
+    ]
+    versions.sort(key=lambda d: os.path.getmtime(os.path.join(out_dir, d)), reverse=True)
+    for d in versions[max(EXPORT_KEEP_VERSIONS - 1, 0):]:
+        shutil.rmtree(os.path.join(out_dir, d), ignore_errors=True)
+
+
+def export_snapshot(out_dir: str = EXPORT_DIR, chunk_size: int = EXPORT_CHUNK_SIZE) -> dict:
+    """main.get_services와 같은 조회로 카탈로그를 읽어 버전별 샤드와 매니페스트 생성"""
+    with engine.connect() as conn:
+        services = [to_service(row) for row in conn.execute(services_query()).mappings().all()]
+    services.sort(key=lambda s: s["서비스ID"])
+
+    version = hashlib.sha256(dumps_json(services)).hexdigest()[:12]
+    version_dir = os.path.join(out_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    hashes = {}
+
+    # 전체 목록: 고정 크기 청크
+    chunks = []
+    for i in range(0, len(services), chunk_size):
+        chunks.append(_write(version_dir, f"all-{i // chunk_size:03d}.json",
+                             to_columnar(services[i:i + chunk_size]), hashes))
+
+    # 카테고리별 샤드
+    by_category = {}
+    for s in services:
+        for c in s["카테고리"]:
+            by_category.setdefault(c, []).append(s)
+    categories = {}
+    for idx, name in enumerate(sorted(by_category)):
+        rows = by_category[name]
+        categories[name] = {
+            "file": _write(version_dir, f"category-{idx:02d}.json", to_columnar(rows), hashes),
+            "count": len(rows),
+        }
+
+    # 검색 색인: 2-gram → 청크 번호
+    search_file = _write(version_dir, "search.json", build_search_index(services, chunk_size), hashes)
+
+    manifest = {
+        "version": version,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "total": len(services),
+        "chunk_size": chunk_size,
+        "all": chunks,
+        "search": search_file,
+        "categories": categories,
+        "hashes": hashes,
+    }
+
+    # 매니페스트는 샤드를 모두 쓴 뒤 원자적으로 교체
+    tmp = os.path.join(out_dir, "manifest.json.tmp")
+    with open(tmp, "wb") as f:
+        f.write(dumps_json(manifest))
+    os.replace(tmp, os.path.join(out_dir, "manifest.json"))
+
+    _prune(out_dir, version)
+    print(f"[export] version={version} 서비스 {len(services)}개, 카테고리 {len(categories)}개 → {out_dir}")
+    return manifest
+
+
+def main():
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else EXPORT_DIR
+    export_snapshot(out_dir)
+
+
+if __name__ == "__main__":
+    main()
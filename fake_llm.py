@@ -0,0 +1,300 @@
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+# ========================================
+# 가짜 LLM (Ollama / Gemini 대역)
+# ========================================
+# GPU·API 할당량 없이 파이프라인의 동시성/배치/캐시 동작을 측정하기 위한 모델 대역.
+#   LLM_BACKEND=fake        → llm_gateway / MCP 서버가 프로세스 안에서 FakeModel 사용
+#   python fake_llm.py      → Ollama(/api/chat)·Gemini(:generateContent) 형태의 HTTP 서버
+#                             (OLLAMA_HOST(S), GEMINI_BASE_URL 을 이 주소로 지정)
+#
+# FAKE_LLM_LATENCY     fixed:0.5 | uniform:0.2,1.5 | normal:0.8,0.2 | lognormal:-0.5,0.6 (초)
+# FAKE_LLM_ERROR_RATE  0~1, 이 비율로 503 오류
+# FAKE_LLM_CAPACITY    동시에 처리하는 요청 수 (초과분은 대기, 0이면 무제한)
+# FAKE_LLM_RULES       [{"match": "정규식", "reply": "응답"}, ...] JSON 파일 (기본 규칙보다 우선)
+# FAKE_LLM_SEED        난수 시드
+
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "fixed:0")
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_CAPACITY = int(os.getenv("FAKE_LLM_CAPACITY", "0"))
+FAKE_LLM_RULES = os.getenv("FAKE_LLM_RULES", "")
+FAKE_LLM_SEED = os.getenv("FAKE_LLM_SEED", "")
+
+
+class FakeModelError(Exception):
+    """모델 서버 과부하/오류 흉내 (게이트웨이는 5xx로 보고 재시도)"""
+
+    def __init__(self, message: str = "fake model overloaded", status_code: int = 503):
+        super().__init__(message)
+        self.error = message
+        self.status_code = status_code
+
+
+def parse_latency(spec: str):
+    """'분포:인자' 문자열 → 지연(초)을 뽑는 함수"""
+    kind, _, args = spec.partition(":")
+    params = [float(a) for a in args.split(",") if a.strip()] if args else []
+    if kind == "fixed":
+        value = params[0] if params else 0.0
+        return lambda rng: value
+    if kind == "uniform":
+        low, high = params
+        return lambda rng: rng.uniform(low, high)
+    if kind == "normal":
+        mean, std = params
+        return lambda rng: max(0.0, rng.gauss(mean, std))
+    if kind == "lognormal":
+        mu, sigma = params
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"unknown latency distribution: {spec}")
+
+
+def _keyword_categories(text: str) -> str:
+    """카테고리 키워드 사전으로 규칙 기반 분류 (모델 출력 형식: '저소득층, 주거')"""
+    from frontier import load_category_keywords
+    found = [cat for cat, kws in load_category_keywords().items() if any(kw in text for kw in kws)]
+    return ", ".join(found[:3]) or "기타"
+
+
+# (정규식, 응답 또는 응답 함수) — 저장소의 각 프롬프트가 기대하는 출력 형식
+DEFAULT_RULES = [
+    (r"### 카테고리 목록", lambda system, prompt: _keyword_categories(prompt)),
+    (r"JSON 배열로만 반환", lambda system, prompt: json.dumps(
+        [{"foundation": "희망나눔장학재단", "url": "https://example.org/"}], ensure_ascii=False)),
+    (r"\"VALID\"만 정확히 출력", lambda system, prompt: "VALID" if re.search(r"장학|지원|모집", prompt) else "INVALID"),
+    (r"단순 소개형이면 \"IGNORE\"", lambda system, prompt: "IGNORE" if re.search(r"인사말|연혁|오시는\s*길", prompt) else (
+        "[프로그램명]: 장학생 선발\n[지원대상]: 저소득층 대학생\n[지원내용]: 등록금 및 생활비\n"
+        "[신청기간]: 2025.02.03 ~ 2025.02.21\n[신청링크]: -")),
+    (r"1~3문장으로 요약", "저소득층 대학생에게 등록금과 생활비를 지원하며, 신청 기간 내에 온라인으로 신청합니다."),
+    (r"generated_title", lambda system, prompt: json.dumps({
+        "generated_title": "장학생 선발 지원", "policy_link": "", "target": "저소득층 대학생",
+        "note": "신청 기간 내 신청", "details": "등록금 및 생활비 지원"}, ensure_ascii=False)),
+    (r"정책명\(2-5단어\)", "에너지 비용 지원"),
+    (r"지원대상\(예:", "저소득층"),
+    (r"참고사항을 1-2문장", "신청 기간 내에 주소지 행정복지센터에서 신청해야 합니다."),
+]
+
+
+def load_rules(path: str = FAKE_LLM_RULES) -> list:
+    rules = []
+    if path:
+        with open(path, encoding="utf-8") as f:
+            rules = [(r["match"], r["reply"]) for r in json.load(f)]
+    return [(re.compile(p), reply) for p, reply in rules + DEFAULT_RULES]
+
+
+class FakeModel:
+    """지연 분포·오류율·동시 처리량을 흉내 내고 규칙에 맞는 고정 응답을 돌려줌"""
+
+    def __init__(self, latency: str = FAKE_LLM_LATENCY, error_rate: float = FAKE_LLM_ERROR_RATE,
+                 capacity: int = FAKE_LLM_CAPACITY, rules: list | None = None, seed=FAKE_LLM_SEED or None):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.rules = rules if rules is not None else load_rules()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        # 동시 처리량 제한은 스레드/이벤트 루프 어디서 불러도 같게 세마포어로
+        self.slots = threading.BoundedSemaphore(capacity) if capacity else None
+        self.stats = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def reply(self, system: str, prompt: str) -> str:
+        text = system + "\n" + prompt
+        for pattern, reply in self.rules:
+            if pattern.search(text):
+                return reply(system, prompt) if callable(reply) else reply
+        return "정상"
+
+    def _begin(self) -> tuple[float, bool]:
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            return self.sample_latency(self.rng), self.rng.random() < self.error_rate
+
+    def _end(self, failed: bool):
+        with self.lock:
+            self.stats["in_flight"] -= 1
+            if failed:
+                self.stats["errors"] += 1
+
+    def generate(self, system: str, prompt: str) -> str:
+        """동기 호출 (Gemini SDK, HTTP 서버 스레드)"""
+        if self.slots:
+            self.slots.acquire()
+        try:
+            delay, fail = self._begin()
+            time.sleep(delay)
+            self._end(fail)
+            if fail:
+                raise FakeModelError()
+            return self.reply(system, prompt)
+        finally:
+            if self.slots:
+                self.slots.release()
+
+    async def agenerate(self, system: str, prompt: str) -> str:
+        """비동기 호출 (Ollama AsyncClient 대역)"""
+        if self.slots:
+            # 이벤트 루프를 막지 않고, 취소되어도 슬롯이 새지 않도록 비차단 획득을 반복
+            while not self.slots.acquire(blocking=False):
+                await asyncio.sleep(0.005)
+        try:
+            delay, fail = self._begin()
+            await asyncio.sleep(delay)
+            self._end(fail)
+            if fail:
+                raise FakeModelError()
+            return self.reply(system, prompt)
+        finally:
+            if self.slots:
+                self.slots.release()
+
+
+_model = None
+
+
+def get_fake_model() -> FakeModel:
+    """프로세스 공용 가짜 모델 (Ollama/Gemini 대역이 같은 처리량 제한을 공유)"""
+    global _model
+    if _model is None:
+        _model = FakeModel()
+    return _model
+
+
+def split_messages(messages: list) -> tuple[str, str]:
+    system = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") != "system")
+    return system, prompt
+
+
+def ollama_response(model: str, content: str, prompt: str) -> dict:
+    return {
+        "model": model,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "message": {"role": "assistant", "content": content},
+        "done": True,
+        "done_reason": "stop",
+        "prompt_eval_count": len(prompt) // 2,
+        "eval_count": max(1, len(content) // 2),
+    }
+
+
+def gemini_response(content: str, prompt: str) -> dict:
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": content}]}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": len(prompt) // 2, "candidatesTokenCount": max(1, len(content) // 2)},
+    }
+
+
+# ------------------------
+# 프로세스 내 클라이언트 대역
+# ------------------------
+class FakeOllamaClient:
+    """ollama.AsyncClient.chat 과 같은 인자/응답 형태"""
+
+    def __init__(self, model: FakeModel | None = None):
+        self.model = model or get_fake_model()
+
+    async def chat(self, model: str = "", messages: list | None = None, **kwargs) -> dict:
+        system, prompt = split_messages(messages or [])
+        content = await self.model.agenerate(system, prompt)
+        return ollama_response(model, content, system + prompt)
+
+    async def list(self) -> dict:
+        return {"models": []}
+
+
+class _FakeGeminiModels:
+    def __init__(self, model: FakeModel):
+        self.model = model
+
+    def generate_content(self, model: str, contents, config=None):
+        prompt = contents if isinstance(contents, str) else json.dumps(contents, ensure_ascii=False, default=str)
+        content = self.model.generate("", prompt)
+        usage = gemini_response(content, prompt)["usageMetadata"]
+        return SimpleNamespace(
+            text=content,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=usage["promptTokenCount"],
+                candidates_token_count=usage["candidatesTokenCount"],
+            ),
+        )
+
+
+class FakeGeminiClient:
+    """google.genai.Client 중 models.generate_content 만 흉내"""
+
+    def __init__(self, model: FakeModel | None = None, **kwargs):
+        self.models = _FakeGeminiModels(model or get_fake_model())
+
+
+# ------------------------
+# HTTP 서버 (다른 프로세스/언어의 클라이언트용)
+# ------------------------
+def serve(port: int = 11434, model: FakeModel | None = None):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    model = model or get_fake_model()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, obj):
+            data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, model.stats)
+            elif self.path == "/api/tags":
+                self._send(200, {"models": []})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            try:
+                if self.path == "/api/chat":
+                    system, prompt = split_messages(payload.get("messages", []))
+                    content = model.generate(system, prompt)
+                    self._send(200, ollama_response(payload.get("model", ""), content, system + prompt))
+                elif ":generateContent" in self.path:
+                    prompt = "\n".join(p.get("text", "") for c in payload.get("contents", [])
+                                       for p in c.get("parts", []))
+                    self._send(200, gemini_response(model.generate("", prompt), prompt))
+                else:
+                    self._send(404, {"error": "not found"})
+            except FakeModelError as e:
+                self._send(e.status_code, {"error": e.error})
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    port = int(os.getenv("PORT", "11434"))
+    server = serve(port)
+    print(f"[fake_llm] http://127.0.0.1:{port} latency={FAKE_LLM_LATENCY} "
+          f"error_rate={FAKE_LLM_ERROR_RATE} capacity={FAKE_LLM_CAPACITY or '∞'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
+import hashlib
 import requests
 import time
+import math
+import sys
 import xml.etree.ElementTree as ET
 from db import engine
+from catalog import notify_changed
+from jobs import JobStore, CLASSIFY_QUEUE
+from metrics import span, timed, inc, write_run_summary
 import re
 import os
 from dotenv import load_dotenv
@@ -13,8 +19,11 @@ load_dotenv(dotenv_path="apikey.env")
 
 SERVICE_KEY = os.getenv("SERVICE_KEY")
 
-conn = engine.raw_connection()
-cur = conn.cursor()
+# totalCount를 못 읽었을 때 사용할 전체 페이지 수 / 작업 큐 이름
+TOTAL_PAGES = int(os.getenv("TOTAL_PAGES", "256"))
+# 상세 조회 사이 대기 (API 호출 제한 대응, 초)
+FETCH_DELAY = float(os.getenv("FETCH_DELAY", "0.3"))
+JOB_QUEUE = "fetch_pages"
 
 COMMON_PARAMS = {
     "serviceKey": SERVICE_KEY,
@@ -32,6 +41,71 @@ def 정리(text: str) -> str:
     text = text.replace('\n', ' ').replace('\r', ' ')
     return text
 
+# 저장 컬럼 ↔ API 필드 (서비스ID 제외)
+ROW_FIELDS = (
+    ("정책명", "servDgst"),
+    ("링크", "serv_link"),
+    ("지원대상", "tgtrDtlCn"),
+    ("참고사항", "slctCritCn"),
+    ("상세내용", "alwServCn"),
+)
+
+def row_values(row: dict) -> tuple:
+    return tuple(row[field] or "" for _, field in ROW_FIELDS)
+
+def source_hash(row: dict) -> str:
+    """API 원본 값의 해시. 정책명/지원대상/참고사항은 분류 단계가 생성문으로 덮어쓰므로
+    저장된 컬럼이 아니라 이 해시(원본해시 컬럼)로 변경 여부를 판단"""
+    return hashlib.sha256("\x1f".join(row_values(row)).encode("utf-8")).hexdigest()
+
+def changed_rows(rows: list, existing: dict) -> list:
+    """existing(서비스ID → 저장된 원본해시)과 비교해 새로 들어오거나 원본이 바뀐 행만 반환"""
+    return [row for row in rows if existing.get(row["servId"]) != source_hash(row)]
+
+def load_existing(ids: list) -> dict:
+    """이번 페이지 servId들의 저장된 원본해시 (한 번의 SELECT)"""
+    from sqlalchemy import select
+    from db import 복지서비스
+    with engine.connect() as conn:
+        result = conn.execute(
+            select(복지서비스.c.서비스ID, 복지서비스.c.원본해시).where(복지서비스.c.서비스ID.in_(ids))
+        )
+        return {r[0]: r[1] for r in result}
+
+def upsert_rows(rows: list):
+    sql = """
+    INSERT INTO 복지서비스
+    (서비스ID, 정책명, 링크, 지원대상, 참고사항, 상세내용, 원본해시)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        정책명=VALUES(정책명),
+        링크=VALUES(링크),
+        지원대상=VALUES(지원대상),
+        참고사항=VALUES(참고사항),
+        상세내용=VALUES(상세내용),
+        원본해시=VALUES(원본해시)
+    """
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.executemany(sql, [(row["servId"], *row_values(row), source_hash(row)) for row in rows])
+        conn.commit()
+    finally:
+        conn.close()
+
+@timed("db_upsert")
+def save_rows(rows: list) -> list:
+    """페이지 단위로 저장된 원본해시와 비교해 새로 들어오거나 원본이 바뀐 행만 upsert. 그 servId 반환.
+    (pymysql은 CLIENT.FOUND_ROWS라 rowcount로는 변경 여부를 알 수 없어 직접 비교)"""
+    if not rows:
+        return []
+    changed = changed_rows(rows, load_existing([row["servId"] for row in rows]))
+    if changed:
+        upsert_rows(changed)
+    inc("db_rows_written_total", len(changed), table="복지서비스")
+    return [row["servId"] for row in changed]
+
+@timed("fetch_list")
 def fetch_list(page_no: int):
     params = COMMON_PARAMS.copy()
     params["pageNo"] = page_no
@@ -39,6 +113,7 @@ def fetch_list(page_no: int):
     res.raise_for_status()
     return res.text
 
+@timed("fetch_detail")
 def fetch_detail(serv_id: str):
     params = {
         "serviceKey": SERVICE_KEY,
@@ -49,71 +124,85 @@ def fetch_detail(serv_id: str):
     res.raise_for_status()
     return res.text
 
-if __name__ == "__main__":
-    total_pages = 256
-
-    for page in range(5, total_pages + 1):
-        result_data = []  # 페이지마다 초기화
+def count_pages() -> int:
+    """1페이지 응답의 totalCount로 전체 페이지 수 계산 (실패 시 TOTAL_PAGES)"""
+    try:
+        root = ET.fromstring(fetch_list(1))
+        total = int(root.findtext(".//totalCount") or 0)
+        if total:
+            return math.ceil(total / COMMON_PARAMS["numOfRows"])
+    except Exception as e:
+        print(f"[!] 전체 건수 조회 오류: {e}")
+    return TOTAL_PAGES
+
+def process_page(page: int, jobs: JobStore | None = None) -> int:
+    """목록 1페이지 + 각 항목 상세를 조회해 저장. 저장한 건수 반환.
+    jobs가 있으면 바뀐 servId를 분류 큐에 넣어 다음 단계가 그 행만 처리하게 함"""
+    result_data = []  # 페이지마다 초기화
+
+    xml_text = fetch_list(page)
+    with span("parse_xml", kind="list"):
+        root = ET.fromstring(xml_text)
+
+    serv_list = root.findall(".//servList")
+    if not serv_list:
+        return 0
+
+    for item in serv_list:
+        serv_id = item.findtext("servId")
+        serv_dgst = item.findtext("servDgst") or ""
+        serv_link = item.findtext("servDtlLink") or ""
 
         try:
-            xml_text = fetch_list(page)
-            root = ET.fromstring(xml_text)
-
-            serv_list = root.findall(".//servList")
-            if not serv_list:
-                continue
-
-            for item in serv_list:
-                serv_id = item.findtext("servId")
-                serv_dgst = item.findtext("servDgst") or ""
-                serv_link = item.findtext("servDtlLink") or ""
-
-                try:
-                    detail_xml = fetch_detail(serv_id)
-                    detail_root = ET.fromstring(detail_xml)
-                    tgtrDtlCn = 정리(detail_root.findtext("tgtrDtlCn")) or ""
-                    slctCritCn = 정리(detail_root.findtext("slctCritCn")) or ""
-                    alwServCn = 정리(detail_root.findtext("alwServCn")) or ""
-                except Exception as e:
-                    print(f"[!] 상세조회 오류: {serv_id}, {e}")
-                    tgtrDtlCn = slctCritCn = alwServCn = ""
-
-                result_data.append({
-                    "servId": serv_id,
-                    "servDgst": serv_dgst,
-                    "serv_link": serv_link,
-                    "tgtrDtlCn": tgtrDtlCn,
-                    "slctCritCn": slctCritCn,
-                    "alwServCn": alwServCn
-                })
-
-                time.sleep(0.3)
-
-            for row in result_data:
-                sql = """
-                INSERT INTO 복지서비스
-                (서비스ID, 정책명, 링크, 지원대상, 참고사항, 상세내용)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    정책명=VALUES(정책명),
-                    링크=VALUES(링크),
-                    지원대상=VALUES(지원대상),
-                    참고사항=VALUES(참고사항),
-                    상세내용=VALUES(상세내용)
-                """
-                cur.execute(sql, (
-                    row["servId"],
-                    row["servDgst"],
-                    row["serv_link"],
-                    row["tgtrDtlCn"],
-                    row["slctCritCn"],
-                    row["alwServCn"]
-                ))
-
-            conn.commit()
-            print(f"[page {page}] {len(result_data)}개 저장 완료")
-
+            detail_xml = fetch_detail(serv_id)
+            with span("parse_xml", kind="detail"):
+                detail_root = ET.fromstring(detail_xml)
+                tgtrDtlCn = 정리(detail_root.findtext("tgtrDtlCn")) or ""
+                slctCritCn = 정리(detail_root.findtext("slctCritCn")) or ""
+                alwServCn = 정리(detail_root.findtext("alwServCn")) or ""
         except Exception as e:
+            print(f"[!] 상세조회 오류: {serv_id}, {e}")
+            tgtrDtlCn = slctCritCn = alwServCn = ""
+
+        result_data.append({
+            "servId": serv_id,
+            "servDgst": serv_dgst,
+            "serv_link": serv_link,
+            "tgtrDtlCn": tgtrDtlCn,
+            "slctCritCn": slctCritCn,
+            "alwServCn": alwServCn
+        })
+
+        time.sleep(FETCH_DELAY)
+
+    changed = save_rows(result_data)
+    if jobs is not None and changed:
+        jobs.requeue(CLASSIFY_QUEUE, changed)
+    notify_changed(changed)
+    return len(result_data)
+
+def main(argv: list | None = None):
+    # 페이지 단위 작업 큐: 중단 후 재실행하면 끝나지 않은 페이지부터 이어서 처리하고,
+    # 지난 패스가 다 끝났으면 전체 페이지로 새 패스 시작 (예약 실행마다 다시 수집).
+    # 같은 명령을 여러 프로세스로 띄우면 페이지를 나눠 가져감. --reset 으로 진행 중인 패스도 버리고 새로 시작
+    argv = sys.argv[1:] if argv is None else argv
+    jobs = JobStore()
+    if jobs.begin_pass(JOB_QUEUE, force="--reset" in argv):
+        jobs.enqueue_many(JOB_QUEUE, range(1, count_pages() + 1))
+
+    for key, _ in jobs.iterate(JOB_QUEUE):
+        page = int(key)
+        try:
+            saved = process_page(page, jobs)
+            jobs.complete(JOB_QUEUE, key, {"saved": saved})
+            print(f"[page {page}] {saved}개 저장 완료")
+        except Exception as e:
+            jobs.fail(JOB_QUEUE, key, e)
             print(f"[!] page {page} 에서 오류: {e}")
 
-conn.close()
+    print(f"[작업 현황] {jobs.counts(JOB_QUEUE)}")
+    write_run_summary("fetch_and_save", {"jobs": jobs.counts(JOB_QUEUE)})
+    jobs.close()
+
+if __name__ == "__main__":
+    main()
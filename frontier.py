@@ -0,0 +1,262 @@
+import functools
+import heapq
+import itertools
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import deque
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+# ========================================
+# 크롤러 공용 프론티어 (URL 큐 + 중복 제거)
+# ========================================
+
+# 방문 기록 SQLite 파일 / 재크롤링 주기(초). 경로가 비어 있으면 메모리만 사용
+VISITED_DB_PATH = os.getenv("CRAWL_VISITED_DB", "")
+RECRAWL_TTL = int(os.getenv("CRAWL_RECRAWL_TTL", str(24 * 3600)))
+
+# 사이트당 최대 방문 페이지 수 / 수확률 판정 최소 페이지 수 / 최소 수확률
+MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "60"))
+YIELD_MIN_PAGES = int(os.getenv("CRAWL_YIELD_MIN_PAGES", "15"))
+MIN_YIELD = float(os.getenv("CRAWL_MIN_YIELD", "0.05"))
+
+KEYWORDS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "Keywords", "text_category_keywords", "category_keywords.txt",
+)
+
+# 페이지 내용과 무관한 추적용 쿼리 파라미터
+TRACKING_PARAMS = {
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+    "fbclid", "gclid", "ref",
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """스킴/호스트 소문자화, 기본 포트·fragment·추적 파라미터 제거, 쿼리 정렬, 끝 슬래시 정리"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    while "//" in path:
+        path = path.replace("//", "/")
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def same_site(url: str, start_url: str) -> bool:
+    return urlsplit(url).netloc.lower() == urlsplit(start_url).netloc.lower()
+
+
+class VisitedStore:
+    """정규화 URL 기준 방문 기록. 경로가 주어지면 SQLite에 저장해 다음 실행에서도 유지"""
+
+    def __init__(self, path: str = VISITED_DB_PATH, ttl: int = RECRAWL_TTL):
+        self.ttl = ttl
+        self.conn = None
+        self.memory = set()
+        if path:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS visited ("
+                " url TEXT PRIMARY KEY,"
+                " fetched_at REAL NOT NULL)"
+            )
+            self.conn.commit()
+
+    def is_fresh(self, url: str) -> bool:
+        """TTL 안에 이미 크롤링한 URL이면 True"""
+        if url in self.memory:
+            return True
+        if self.conn is None:
+            return False
+        row = self.conn.execute(
+            "SELECT fetched_at FROM visited WHERE url = ?", (url,)
+        ).fetchone()
+        return row is not None and time.time() - row[0] < self.ttl
+
+    def mark(self, url: str):
+        self.memory.add(url)
+        if self.conn is not None:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO visited (url, fetched_at) VALUES (?, ?)",
+                (url, time.time()),
+            )
+            self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class Frontier:
+    """BFS 프론티어. 큐에 넣는 시점에 중복을 걸러 같은 링크가 여러 번 쌓이지 않게 함.
+    TTL 안에 방문한 URL도 큐에는 넣음 (다시 가져오지 않을 뿐, 저장된 링크로 탐색은 이어감 → is_fresh)"""
+
+    def __init__(self, start_url: str, max_depth: int, visited: VisitedStore | None = None,
+                 refresh: bool = False):
+        self.start_url = start_url
+        self.max_depth = max_depth
+        self.visited = visited or VisitedStore(path="")
+        self.refresh = refresh
+        self.queue = self._make_queue()
+        self.seen = set()
+        self.push(start_url, 0)
+
+    def _make_queue(self):
+        return deque()
+
+    def _admit(self, url: str, depth: int) -> str | None:
+        """깊이 제한과 정규화 URL 중복을 거르고 처음 보는 URL이면 정규화한 값 반환"""
+        if not url or depth > self.max_depth:
+            return None
+        url = canonicalize_url(url)
+        if url in self.seen:
+            return None
+        self.seen.add(url)
+        return url
+
+    def _enqueue(self, url: str, depth: int, anchor_text: str):
+        self.queue.append((url, depth))
+
+    def push(self, url: str, depth: int, anchor_text: str = "") -> bool:
+        url = self._admit(url, depth)
+        if url is None:
+            return False
+        self._enqueue(url, depth, anchor_text)
+        return True
+
+    def pop(self):
+        return self.queue.popleft()
+
+    def is_fresh(self, url: str) -> bool:
+        """TTL 안에 가져온 URL이면 True → 크롤러는 다시 가져오지 않고 PageStore의 링크/판정을 사용.
+        refresh 이면 항상 False"""
+        return not self.refresh and self.visited.is_fresh(url)
+
+    def mark_visited(self, url: str):
+        self.visited.mark(url)
+
+    def __bool__(self):
+        return bool(self.queue)
+
+    def __len__(self):
+        return len(self.queue)
+
+
+# ========================================
+# 링크 우선순위 점수 (best-first 탐색용)
+# ========================================
+
+# 신청/모집 페이지를 가리키는 강한 단서
+APPLY_TERMS = ["장학", "모집", "신청", "지원", "공고", "선발", "접수", "사업안내", "프로그램"]
+APPLY_PATH_TOKENS = {
+    "scholar", "scholarship", "apply", "application", "recruit", "program",
+    "support", "business", "biz", "grant", "fund", "notice_apply",
+}
+# 내용이 거의 없는 페이지를 가리키는 단서
+WEAK_PATH_TOKENS = {
+    "gallery", "photo", "video", "event", "map", "sitemap", "print",
+    "download", "pdf", "jpg", "png", "zip", "search", "rss",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_category_keywords(path: str = KEYWORDS_PATH) -> dict:
+    """카테고리 → 키워드 사전 (경로별로 한 번만 읽음, 호출 측은 수정하지 않음)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+class LinkScorer:
+    """앵커 텍스트, URL 경로 토큰, 카테고리 키워드로 링크 점수 계산"""
+
+    def __init__(self, category_keywords: dict | None = None):
+        if category_keywords is None:
+            category_keywords = load_category_keywords()
+        self.category_keywords = {
+            kw for kws in category_keywords.values() for kw in kws if len(kw) >= 2
+        }
+
+    def text_score(self, text: str) -> float:
+        if not text:
+            return 0.0
+        score = 3.0 * sum(1 for t in APPLY_TERMS if t in text)
+        hits = sum(1 for kw in self.category_keywords if kw in text)
+        return score + min(hits, 3)
+
+    def url_score(self, url: str) -> float:
+        path = unquote(urlsplit(url).path + " " + urlsplit(url).query).lower()
+        tokens = set(re.split(r"[^0-9a-z가-힣]+", path))
+        score = 2.0 * len(tokens & APPLY_PATH_TOKENS)
+        score -= 2.0 * len(tokens & WEAK_PATH_TOKENS)
+        # 한글 경로/쿼리도 앵커 텍스트와 같은 기준으로 반영
+        return score + 0.5 * self.text_score(path)
+
+    def score(self, url: str, anchor_text: str = "", depth: int = 0) -> float:
+        return self.text_score(anchor_text) + self.url_score(url) - 0.5 * depth
+
+
+class PriorityFrontier(Frontier):
+    """점수가 높은 링크부터 방문하고, 페이지 예산이나 수확률 기준에 걸리면 조기 종료"""
+
+    def __init__(self, start_url: str, max_depth: int, visited: VisitedStore | None = None,
+                 scorer: LinkScorer | None = None, max_pages: int = MAX_PAGES,
+                 min_yield: float = MIN_YIELD, yield_min_pages: int = YIELD_MIN_PAGES,
+                 refresh: bool = False):
+        self.scorer = scorer or LinkScorer()
+        self.max_pages = max_pages
+        self.min_yield = min_yield
+        self.yield_min_pages = yield_min_pages
+        self.counter = itertools.count()
+        self.pages = 0
+        self.useful = 0
+        super().__init__(start_url, max_depth, visited, refresh)
+
+    def _make_queue(self):
+        return []
+
+    def _enqueue(self, url: str, depth: int, anchor_text: str):
+        score = self.scorer.score(url, anchor_text, depth)
+        heapq.heappush(self.queue, (-score, depth, next(self.counter), url))
+
+    def pop(self):
+        _, depth, _, url = heapq.heappop(self.queue)
+        return url, depth
+
+    def record(self, useful: bool):
+        """방문한 페이지가 쓸모 있었는지 기록 (수확률 계산용)"""
+        self.pages += 1
+        if useful:
+            self.useful += 1
+
+    def exhausted(self) -> bool:
+        if self.pages >= self.max_pages:
+            return True
+        if self.pages >= self.yield_min_pages:
+            return self.useful / self.pages < self.min_yield
+        return False
+
+    def __bool__(self):
+        return bool(self.queue) and not self.exhausted()
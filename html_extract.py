@@ -0,0 +1,159 @@
+import asyncio
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
+
+from prompt_input import CRAWL_SNIPPET_BUDGET, fit_text, record
+
+# ========================================
+# 렌더링된 HTML → 본문 추출 (프로세스 풀)
+# ========================================
+# 브라우저에서는 page.content() 한 번만 가져오고, 셀렉터별 본문 찾기 / 메뉴·스크립트 제거 /
+# 스킵 단어 검사 / 토큰 예산 맞추기 / 링크 수집은 lxml 로 별도 프로세스에서 처리.
+# 셀렉터마다 브라우저를 오가던 왕복이 없어지고, 파싱하는 동안 이벤트 루프는 다른 작업의 페이지 이동을 계속함.
+# 워커에는 함수가 아니라 데이터(HTML, 스킵 단어)만 넘김 → 크롤러별 규칙은 인자로 전달
+
+# 0이면 프로세스 풀 없이 스레드에서 처리
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# 후보 본문 셀렉터 (앞에서부터, 100자 넘는 첫 본문 사용) — 태그 / #id / .class 만 지원
+CONTENT_SELECTORS = [
+    "main", "article", "#content", ".content", ".post",
+    ".program", ".board-view", "#container"
+]
+# 페이지 전체에서 제거 (링크 수집에서도 빠짐)
+PAGE_NOISE = "header, footer, script, style, noscript, template"
+# 본문 후보 안에서 제거
+BLOCK_NOISE = "nav, aside, .menu, .sidebar"
+
+# innerText 처럼 줄을 나누는 블록 요소
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tbody", "td", "tfoot",
+    "th", "thead", "tr", "ul",
+}
+SPACES = re.compile(r"\s+")
+
+
+def _xpath(selectors: str) -> str:
+    """'tag, #id, .class' 형태의 단순 CSS 셀렉터를 XPath 로 변환"""
+    paths = []
+    for sel in (s.strip() for s in selectors.split(",")):
+        if sel.startswith("#"):
+            paths.append(f".//*[@id='{sel[1:]}']")
+        elif sel.startswith("."):
+            paths.append(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {sel[1:]} ')]")
+        elif sel:
+            paths.append(f".//{sel}")
+    return " | ".join(paths)
+
+
+def _remove(node, selectors: str):
+    for el in node.xpath(_xpath(selectors)):
+        if el.getparent() is not None:
+            el.drop_tree()
+
+
+def inner_text(node) -> str:
+    """브라우저 innerText 근사: 블록 요소 경계에서 줄바꿈, 줄 안의 공백은 하나로.
+    node 안의 주석/처리 지시문은 제거함 (iterwalk 가 건너뛰어 뒤따르는 텍스트까지 빠지므로 tail 은 앞으로 합침)"""
+    from lxml import etree
+    etree.strip_tags(node, etree.Comment, etree.ProcessingInstruction)
+    parts = []
+    for event, el in etree.iterwalk(node, events=("start", "end")):
+        block = el.tag in BLOCK_TAGS
+        if event == "start":
+            if block:
+                parts.append("\n")
+            if el.text:
+                parts.append(el.text)
+        else:
+            if block:
+                parts.append("\n")
+            if el.tail and el is not node:
+                parts.append(el.tail)
+    lines = (SPACES.sub(" ", line).strip() for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def is_meaningless_text(text: str, phrases) -> tuple[bool, str]:
+    matched = [p for p in phrases if p in text]
+    if matched:
+        return True, f"[스킵 단어] {', '.join(matched)}"
+    return False, ""
+
+
+def extract_page(html: str, base_url: str, skip_phrases=(), budget: int = CRAWL_SNIPPET_BUDGET,
+                 selectors=tuple(CONTENT_SELECTORS)) -> dict:
+    """워커에서 실행. 반환: title, snippet(예산에 맞춘 본문, 스킵이면 ""), length, skipped(사유), anchors, stats"""
+    import lxml.html
+
+    doc = lxml.html.document_fromstring(html or "<html></html>")
+    title = " ".join((doc.findtext(".//title") or "").split())
+    _remove(doc, PAGE_NOISE)
+
+    text = ""
+    for sel in selectors:
+        nodes = doc.xpath(_xpath(sel))
+        if nodes:
+            _remove(nodes[0], BLOCK_NOISE)
+            text = inner_text(nodes[0])
+            if len(text.strip()) > 100:
+                break
+    body = doc.find("body")
+    if not text and body is not None:
+        _remove(body, BLOCK_NOISE)
+        text = inner_text(body)
+
+    anchors = []
+    for a in doc.xpath("//a[@href]"):
+        try:
+            href = urljoin(base_url, a.get("href").strip())
+        except ValueError:
+            continue
+        anchors.append([href, " ".join(a.text_content().split())])
+
+    normalized = " ".join(text.split())
+    skip, reason = is_meaningless_text(normalized, skip_phrases)
+    snippet, stats = ("", {}) if skip else fit_text(text, budget, stage=None)
+    return {
+        "title": title,
+        "snippet": snippet,
+        "length": len(normalized),
+        "skipped": reason,
+        "anchors": anchors,
+        "stats": stats,
+    }
+
+
+_pool = None
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if _pool is None and EXTRACT_WORKERS > 0:
+        _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS)
+    return _pool
+
+
+async def extract_html(html: str, base_url: str, skip_phrases=(), budget: int = CRAWL_SNIPPET_BUDGET,
+                       stage: str = "crawl_snippet") -> dict:
+    """extract_page 를 프로세스 풀에서 실행하고 줄인 토큰 수는 이 프로세스의 계측에 기록"""
+    pool = _get_pool()
+    args = (html, base_url, tuple(skip_phrases), budget)
+    if pool is None:
+        result = await asyncio.to_thread(extract_page, *args)
+    else:
+        result = await asyncio.get_running_loop().run_in_executor(pool, extract_page, *args)
+    if result["stats"]:
+        record(stage, result["stats"])
+    return result
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
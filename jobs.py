@@ -0,0 +1,185 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+
+# ========================================
+# 작업 큐 / 체크포인트 저장소 (SQLite)
+# ========================================
+# 페이지·행·URL 단위 작업을 pending → running(리스) → done/failed 로 기록.
+# 중단 후 다시 실행하면 끝나지 않은 작업부터 이어서 처리하고,
+# 리스가 만료된 작업(죽은 워커)은 다른 워커가 가져감. 여러 프로세스 동시 실행 가능.
+
+JOB_DB_PATH = os.getenv(
+    "JOB_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite")
+)
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# 수집 단계가 새로 들어오거나 바뀐 서비스ID를 넣고, 분류 단계가 꺼내 쓰는 큐
+CLASSIFY_QUEUE = "classify_rows"
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobStore:
+    def __init__(self, path: str = JOB_DB_PATH, lease_seconds: float = JOB_LEASE_SECONDS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker = worker_id()
+        # 트랜잭션은 직접 관리 (claim 시 BEGIN IMMEDIATE로 쓰기 잠금)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " queue TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending',"
+            " payload TEXT,"
+            " result TEXT,"
+            " error TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " lease_owner TEXT,"
+            " lease_until REAL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (queue, key))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_state ON jobs (queue, state, lease_until)")
+
+    def enqueue(self, queue: str, key, payload=None) -> bool:
+        """이미 있는 작업은 그대로 둠 (재실행해도 진행 상태 유지). 새로 넣었으면 True"""
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO jobs (queue, key, payload, updated_at) VALUES (?, ?, ?, ?)",
+            (queue, str(key), json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+             time.time()),
+        )
+        return cur.rowcount > 0
+
+    def enqueue_many(self, queue: str, keys, payloads=None) -> int:
+        """한 트랜잭션으로 여러 작업 추가. payloads 는 keys 와 같은 순서 (없으면 키만)"""
+        now = time.time()
+        keys = list(keys)
+        payloads = list(payloads) if payloads is not None else [None] * len(keys)
+        self.conn.execute("BEGIN")
+        try:
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (queue, key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                [(queue, str(k), json.dumps(p, ensure_ascii=False) if p is not None else None, now)
+                 for k, p in zip(keys, payloads)],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount
+
+    def requeue(self, queue: str, keys) -> int:
+        """이미 끝난 작업이라도 다시 pending으로 (내용이 바뀐 레코드를 후속 단계에 전달)"""
+        now = time.time()
+        self.conn.execute("BEGIN")
+        try:
+            cur = self.conn.executemany(
+                "INSERT INTO jobs (queue, key, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (queue, key) DO UPDATE SET state = 'pending', attempts = 0,"
+                " error = NULL, lease_owner = NULL, lease_until = NULL, updated_at = excluded.updated_at",
+                [(queue, str(k), now) for k in keys],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount
+
+    def claim(self, queue: str, limit: int = 1) -> list:
+        """대기 중이거나 리스가 만료된 작업을 원자적으로 가져와 리스 설정. [(key, payload), ...]"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                "SELECT key, payload FROM jobs WHERE queue = ?"
+                " AND (state = 'pending' OR (state = 'running' AND lease_until < ?))"
+                " ORDER BY rowid LIMIT ?",
+                (queue, now, limit),
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE jobs SET state = 'running', lease_owner = ?, lease_until = ?,"
+                " attempts = attempts + 1, updated_at = ? WHERE queue = ? AND key = ?",
+                [(self.worker, now + self.lease_seconds, now, queue, key) for key, _ in rows],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [(key, json.loads(payload) if payload else None) for key, payload in rows]
+
+    def extend(self, queue: str, key):
+        """오래 걸리는 작업의 리스 연장"""
+        self.conn.execute(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE queue = ? AND key = ? AND lease_owner = ?",
+            (time.time() + self.lease_seconds, time.time(), queue, str(key), self.worker),
+        )
+
+    def complete(self, queue: str, key, result=None):
+        self.conn.execute(
+            "UPDATE jobs SET state = 'done', result = ?, lease_owner = NULL, lease_until = NULL,"
+            " updated_at = ? WHERE queue = ? AND key = ?",
+            (json.dumps(result, ensure_ascii=False) if result is not None else None,
+             time.time(), queue, str(key)),
+        )
+
+    def fail(self, queue: str, key, error):
+        """재시도 횟수가 남았으면 pending으로 되돌리고, 아니면 failed로 기록"""
+        self.conn.execute(
+            "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+            " error = ?, lease_owner = NULL, lease_until = NULL, updated_at = ?"
+            " WHERE queue = ? AND key = ?",
+            (self.max_attempts, str(error), time.time(), queue, str(key)),
+        )
+
+    def iterate(self, queue: str, batch: int = 1):
+        """작업이 남아 있는 동안 하나씩 가져옴 (다른 워커와 나눠 처리)"""
+        while True:
+            claimed = self.claim(queue, batch)
+            if not claimed:
+                return
+            yield from claimed
+
+    def counts(self, queue: str) -> dict:
+        rows = self.conn.execute(
+            "SELECT state, COUNT(*) FROM jobs WHERE queue = ? GROUP BY state", (queue,)
+        ).fetchall()
+        result = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        result.update(dict(rows))
+        return result
+
+    def has_unfinished(self, queue: str) -> bool:
+        c = self.counts(queue)
+        return c["pending"] + c["running"] > 0
+
+    def reset(self, queue: str):
+        """새 패스를 시작할 때 해당 큐의 기록 삭제"""
+        self.conn.execute("DELETE FROM jobs WHERE queue = ?", (queue,))
+
+    def begin_pass(self, queue: str, force: bool = False) -> bool:
+        """끝나지 않은 작업이 없으면(또는 force) 지난 패스 기록을 지우고 새 패스 시작. 새로 시작했으면 True.
+        이어서 처리하는 것은 중단된 패스뿐이고, 다 끝난 큐는 다음 실행 때 처음부터 다시 채움"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            unfinished = self.conn.execute(
+                "SELECT 1 FROM jobs WHERE queue = ? AND state IN ('pending', 'running') LIMIT 1", (queue,)
+            ).fetchone()
+            started = force or unfinished is None
+            if started:
+                self.conn.execute("DELETE FROM jobs WHERE queue = ?", (queue,))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return started
+
+    def close(self):
+        self.conn.close()
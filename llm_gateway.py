@@ -0,0 +1,316 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import metrics
+
+# ========================================
+# Ollama 공용 게이트웨이
+# ========================================
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+# 여러 모델 서버에 나눠 보낼 때: 쉼표로 구분한 주소 목록 (없으면 OLLAMA_HOST 하나)
+OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", OLLAMA_HOST).split(",") if h.strip()]
+DEFAULT_MODEL = os.getenv("OLLAMA_MODEL", "gpt-oss:20b")
+# 모델 서버 1대가 동시에 처리할 수 있는 요청 수 (ollama 서버의 OLLAMA_NUM_PARALLEL에 맞춤)
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "2"))
+# 대기열에서 기다릴 최대 시간 / 요청 1건의 최대 시간 (초)
+OLLAMA_QUEUE_TIMEOUT = float(os.getenv("OLLAMA_QUEUE_TIMEOUT", "600"))
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "180"))
+OLLAMA_RETRIES = int(os.getenv("OLLAMA_RETRIES", "2"))
+# 연속 실패가 이만큼이면 서버를 COOLDOWN(초) 동안 제외, 이후 요청 한 건으로 다시 확인
+OLLAMA_HOST_MAX_FAILURES = int(os.getenv("OLLAMA_HOST_MAX_FAILURES", "2"))
+OLLAMA_HOST_COOLDOWN = float(os.getenv("OLLAMA_HOST_COOLDOWN", "30"))
+# 모델을 메모리에 유지할 시간 (ollama keep_alive, 예: "30m", "-1"=계속). 비우면 서버 기본값(5분)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# 모든 요청에 고정으로 붙일 실행 옵션. num_ctx 등이 요청마다 다르면 서버가 모델을 다시 올리므로 한 값으로 고정
+#   OLLAMA_NUM_CTX=8192  /  OLLAMA_OPTIONS='{"temperature": 0, "num_thread": 8}'
+OLLAMA_OPTIONS = json.loads(os.getenv("OLLAMA_OPTIONS", "") or "{}")
+if os.getenv("OLLAMA_NUM_CTX"):
+    OLLAMA_OPTIONS["num_ctx"] = int(os.getenv("OLLAMA_NUM_CTX"))
+# 모델 백엔드: ollama (기본) | fake (fake_llm.FakeModel, GPU 없이 부하 테스트)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")
+
+
+def make_client(backend: str, host: str):
+    """백엔드 이름 → ollama.AsyncClient.chat 과 같은 인자/응답 형태의 클라이언트.
+    모델 패키지는 첫 호출 때 import (게이트웨이를 import 하는 것만으로는 로드하지 않음)"""
+    if backend == "ollama":
+        import ollama
+        return ollama.AsyncClient(host=host)
+    if backend == "fake":
+        from fake_llm import FakeOllamaClient
+        return FakeOllamaClient()
+    raise ValueError(f"unknown LLM_BACKEND: {backend}")
+
+
+def _is_retryable(e: Exception) -> bool:
+    # 모델 없음 같은 4xx 오류는 재시도해도 결과가 같음 (ollama.ResponseError, FakeModelError)
+    status = getattr(e, "status_code", None)
+    return status is None or status < 0 or status >= 500
+
+
+class ModelHost:
+    """모델 서버 1대의 처리 중 요청 수와 상태 (연속 실패 시 잠시 제외)"""
+
+    def __init__(self, url: str, concurrency: int = OLLAMA_CONCURRENCY):
+        self.url = url
+        self.concurrency = concurrency
+        self.outstanding = 0
+        self.failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_ok(self):
+        self.failures = 0
+        self.down_until = 0.0
+
+    def mark_failed(self, max_failures: int = OLLAMA_HOST_MAX_FAILURES, cooldown: float = OLLAMA_HOST_COOLDOWN):
+        self.failures += 1
+        self.errors += 1
+        if self.failures >= max_failures:
+            self.down_until = time.monotonic() + cooldown
+
+    def to_dict(self) -> dict:
+        return {"url": self.url, "healthy": self.healthy, "outstanding": self.outstanding,
+                "requests": self.requests, "errors": self.errors}
+
+
+class LLMGateway:
+    """모델 서버별 AsyncClient를 재사용하고, 처리 중 요청이 가장 적은 정상 서버로 보냄.
+    서버마다 동시 요청 수를 concurrency로 제한하고, 실패하면 다른 서버로 재시도"""
+
+    def __init__(self, hosts: list | str = OLLAMA_HOSTS, concurrency: int = OLLAMA_CONCURRENCY,
+                 queue_timeout: float = OLLAMA_QUEUE_TIMEOUT, timeout: float = OLLAMA_TIMEOUT,
+                 retries: int = OLLAMA_RETRIES, backend: str = LLM_BACKEND,
+                 keep_alive: str = OLLAMA_KEEP_ALIVE, options: dict | None = None):
+        if isinstance(hosts, str):
+            hosts = [hosts]
+        self.hosts = [ModelHost(url, concurrency) for url in hosts]
+        self.backend = backend
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.retries = retries
+        self.keep_alive = keep_alive
+        self.options = dict(OLLAMA_OPTIONS if options is None else options)
+        # 이벤트 루프마다 클라이언트/대기 조건을 따로 둠 (루프 간 공유 불가). 닫힌 루프의 것은 _state()에서 정리
+        self._per_loop = {}
+        self._lock = threading.Lock()
+        self._sync_loop = None
+        self.metrics = {
+            "requests": 0,
+            "failures": 0,
+            "retries": 0,
+            "failovers": 0,
+            "queue_timeouts": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+            "queue_wait_total": 0.0,
+        }
+
+    def _state(self) -> dict:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # asyncio.run 을 여러 번 부르는 스크립트에서 끝난 루프의 클라이언트가 쌓이지 않게 버림
+            for closed in [l for l in self._per_loop if l.is_closed()]:
+                del self._per_loop[closed]
+            state = self._per_loop.get(loop)
+            if state is None:
+                state = {"clients": {}, "cond": asyncio.Condition()}
+                self._per_loop[loop] = state
+        return state
+
+    def _client(self, state: dict, host: ModelHost):
+        client = state["clients"].get(host.url)
+        if client is None:
+            client = state["clients"][host.url] = make_client(self.backend, host.url)
+        return client
+
+    def _pick(self, exclude: set) -> ModelHost | None:
+        """정상 서버 중 처리 중 요청이 가장 적은 곳. 정상 서버가 하나도 없으면 제외된 서버라도 시도"""
+        candidates = [h for h in self.hosts if h.url not in exclude]
+        pool = [h for h in candidates if h.healthy] or candidates
+        free = [h for h in pool if h.outstanding < h.concurrency]
+        if not free:
+            return None
+        return min(free, key=lambda h: (h.outstanding, h.requests))
+
+    async def _acquire(self, state: dict, exclude: set) -> ModelHost:
+        cond = state["cond"]
+        async with cond:
+            while True:
+                with self._lock:
+                    host = self._pick(exclude)
+                    if host is not None:
+                        host.outstanding += 1
+                        return host
+                # 다른 루프(chat_sync)에서 풀린 자리는 알림이 오지 않으므로 주기적으로 다시 확인
+                try:
+                    await asyncio.wait_for(cond.wait(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _release(self, state: dict, host: ModelHost):
+        with self._lock:
+            host.outstanding -= 1
+        async with state["cond"]:
+            state["cond"].notify()
+
+    def _record(self, response, latency: float, model: str, host: ModelHost):
+        m = self.metrics
+        m["requests"] += 1
+        m["latency_total"] += latency
+        m["latency_max"] = max(m["latency_max"], latency)
+        prompt_tokens = response.get("prompt_eval_count") or 0
+        completion_tokens = response.get("eval_count") or 0
+        m["prompt_tokens"] += prompt_tokens
+        m["completion_tokens"] += completion_tokens
+        metrics.inc("llm_requests_total", backend=self.backend, model=model, host=host.url, outcome="ok")
+        metrics.inc("llm_tokens_total", prompt_tokens, backend=self.backend, model=model, kind="prompt")
+        metrics.inc("llm_tokens_total", completion_tokens, backend=self.backend, model=model, kind="completion")
+
+    def pin_options(self, **options):
+        """배치 실행 동안 모든 요청에 붙일 옵션 고정 (예: num_ctx=8192)"""
+        self.options.update(options)
+
+    def _request_kwargs(self, kwargs: dict) -> dict:
+        # 호출자가 준 옵션이 고정 옵션보다 우선
+        if self.options or "options" in kwargs:
+            kwargs["options"] = {**self.options, **(kwargs.get("options") or {})}
+        if self.keep_alive and "keep_alive" not in kwargs:
+            kwargs["keep_alive"] = self.keep_alive
+        return kwargs
+
+    async def chat(self, messages: list, model: str = DEFAULT_MODEL, **kwargs) -> str:
+        """대기열 → 서버 선택 → 타임아웃/재시도(다른 서버 우선) 포함 호출 → 응답 본문 반환. 최종 실패 시 예외.
+        고정 프롬프트는 system 메시지로 맨 앞에 두어 서버가 같은 접두부의 KV 캐시를 재사용하게 함"""
+        state = self._state()
+        kwargs = self._request_kwargs(kwargs)
+        tried = set()
+        for attempt in range(self.retries + 1):
+            queued_at = time.perf_counter()
+            try:
+                host = await asyncio.wait_for(self._acquire(state, tried), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.metrics["queue_timeouts"] += 1
+                metrics.inc("llm_requests_total", backend=self.backend, model=model, outcome="queue_timeout")
+                raise
+            queue_wait = time.perf_counter() - queued_at
+            self.metrics["queue_wait_total"] += queue_wait
+            metrics.observe("span_seconds", queue_wait, span="llm_queue_wait")
+
+            started = time.perf_counter()
+            host.requests += 1
+            try:
+                async with metrics.span("llm_chat", model=model):
+                    response = await asyncio.wait_for(
+                        self._client(state, host).chat(model=model, messages=messages, **kwargs),
+                        timeout=self.timeout,
+                    )
+                host.mark_ok()
+                self._record(response, time.perf_counter() - started, model, host)
+                return (response.get("message") or {}).get("content") or ""
+            except Exception as e:
+                if not _is_retryable(e):
+                    self.metrics["failures"] += 1
+                    metrics.inc("llm_requests_total", backend=self.backend, model=model, host=host.url, outcome="error")
+                    raise
+                host.mark_failed()
+                if attempt >= self.retries:
+                    self.metrics["failures"] += 1
+                    metrics.inc("llm_requests_total", backend=self.backend, model=model, host=host.url, outcome="error")
+                    raise
+                self.metrics["retries"] += 1
+                metrics.inc("llm_requests_total", backend=self.backend, model=model, host=host.url, outcome="retry")
+            finally:
+                await self._release(state, host)
+
+            tried.add(host.url)
+            if len(tried) < len(self.hosts):
+                # 아직 시도하지 않은 서버가 있으면 기다리지 않고 바로 넘김
+                self.metrics["failovers"] += 1
+            else:
+                tried.clear()
+                await asyncio.sleep(2 ** attempt)
+
+    async def warm_up(self, model: str = DEFAULT_MODEL, system_prompt: str = "") -> dict:
+        """모든 서버에 모델을 미리 올리고(keep_alive 적용) system_prompt가 있으면 그 접두부를 한 번 처리해 둠.
+        배치 첫 요청이 모델 로딩 시간을 떠안지 않게 하기 위함. {주소: 소요 시간(초) 또는 오류}"""
+        state = self._state()
+        messages = []
+        if system_prompt:
+            messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": "."}]
+        kwargs = self._request_kwargs({"options": {"num_predict": 1}} if messages else {})
+
+        async def load(host: ModelHost):
+            started = time.perf_counter()
+            try:
+                async with metrics.span("llm_warmup", model=model):
+                    await asyncio.wait_for(
+                        self._client(state, host).chat(model=model, messages=messages, **kwargs),
+                        timeout=self.timeout,
+                    )
+                host.mark_ok()
+                return round(time.perf_counter() - started, 3)
+            except Exception as e:
+                host.mark_failed(max_failures=1)
+                return f"error: {e}"
+
+        results = await asyncio.gather(*[load(h) for h in self.hosts])
+        return {h.url: r for h, r in zip(self.hosts, results)}
+
+    async def check_health(self, timeout: float = 5.0) -> dict:
+        """모든 서버에 모델 목록을 요청해 상태 갱신. {주소: 정상 여부}
+        파이프라인 워밍업과 분류 배치 시작 때 호출 → 죽은 서버는 첫 요청이 실패하기 전에 제외"""
+        state = self._state()
+
+        async def probe(host: ModelHost) -> bool:
+            try:
+                await asyncio.wait_for(self._client(state, host).list(), timeout=timeout)
+                host.mark_ok()
+                return True
+            except Exception:
+                host.mark_failed(max_failures=1)
+                return False
+
+        results = await asyncio.gather(*[probe(h) for h in self.hosts])
+        return {h.url: ok for h, ok in zip(self.hosts, results)}
+
+    def run_sync(self, coro):
+        """동기 스크립트용. 게이트웨이 전용 백그라운드 루프에서 실행해 클라이언트를 재사용"""
+        with self._lock:
+            if self._sync_loop is None:
+                self._sync_loop = asyncio.new_event_loop()
+                threading.Thread(target=self._sync_loop.run_forever, daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._sync_loop).result()
+
+    def chat_sync(self, messages: list, model: str = DEFAULT_MODEL, **kwargs) -> str:
+        return self.run_sync(self.chat(messages, model=model, **kwargs))
+
+    def stats(self) -> dict:
+        m = dict(self.metrics)
+        m["latency_avg"] = m["latency_total"] / m["requests"] if m["requests"] else 0.0
+        m["hosts"] = [h.to_dict() for h in self.hosts]
+        m["options"] = dict(self.options)
+        return m
+
+
+_gateway = None
+
+
+def get_gateway() -> LLMGateway:
+    """프로세스 공용 게이트웨이"""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
@@ -1,9 +1,56 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.sql import select
-from db import engine, 복지서비스, 카테고리
+from db import get_async_engine
+from catalog import (
+    CATALOG_REFRESH_SECONDS, JSON_TYPE, ColumnarCatalog, catalog_cache, current_catalog, dumps_json,
+    encode, negotiate_encoding, negotiate_format, services_query, set_catalog, to_service,
+)
+import metrics
+
+# 파이프라인 배포 단계가 캐시를 비울 때 쓰는 토큰 (비어 있으면 엔드포인트 비활성)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+async def refresh_catalog() -> ColumnarCatalog:
+    """복지서비스 전체를 한 번 읽어 메모리 카탈로그를 새로 만들고 교체"""
+    with metrics.span("catalog_load"):
+        # 비동기 엔진을 써서 DB 대기 중에 이벤트 루프를 막지 않음
+        async with get_async_engine().connect() as conn:
+            result = await conn.execute(services_query())
+            services = [to_service(row) for row in result.mappings().all()]
+        catalog = ColumnarCatalog(services)
+    set_catalog(catalog)
+    return catalog
+
+
+async def refresh_loop():
+    while True:
+        await asyncio.sleep(CATALOG_REFRESH_SECONDS)
+        try:
+            await refresh_catalog()
+        except Exception as e:
+            # 갱신에 실패해도 기존 카탈로그로 계속 응답
+            print(f"[catalog] 갱신 실패: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    try:
+        await refresh_catalog()
+    except Exception as e:
+        # DB에 닿지 않아도 API는 뜨게 함 (/metrics 등). /services 는 요청 때 다시 적재를 시도
+        print(f"[catalog] 시작 적재 실패: {e}")
+    refresher = asyncio.create_task(refresh_loop())
+    yield
+    refresher.cancel()
+    await get_async_engine().dispose()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,26 +61,108 @@ app.add_middleware(
 )
 
 @app.get("/services")
-def get_services():
+async def get_services(
+    request: Request,
+    category: list[str] | None = Query(None, description="카테고리 필터"),
+    match: str = Query("any", pattern="^(any|all)$", description="any: 하나라도(OR), all: 모두(AND)"),
+    exclude: list[str] | None = Query(None, description="이 카테고리가 있는 서비스는 제외"),
+):
     """
-    복지서비스 + 카테고리 JOIN API
+    복지서비스 + 카테고리 API (메모리 카탈로그에서 응답, DB 조회 없음)
+    Accept: application/json(기본) | application/vnd.welfare.columnar+json | application/msgpack
     """
-    with engine.connect() as conn:
-        services = [dict(row) for row in conn.execute(select(복지서비스)).mappings().all()]
-        categories = [dict(row) for row in conn.execute(select(카테고리)).mappings().all()]
+    media_type = negotiate_format(request.headers.get("accept"))
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    key = (tuple(sorted(category or [])), match, tuple(sorted(exclude or [])), media_type)
+
+    # 데이터가 바뀌지 않았으면 이전에 직렬화·압축한 본문을 그대로 사용
+    entry = catalog_cache.get(key)
+    cache = "hit"
+    with metrics.span("services"):
+        if entry is None:
+            cache = "miss"
+            catalog = current_catalog() or await refresh_catalog()
+            with metrics.span("services_query"):
+                services = catalog.rows(catalog.select(category, match, exclude))
+            with metrics.span("services_encode", format=media_type):
+                entry = catalog_cache.put(key, encode(services, media_type))
+
+        headers = {"ETag": entry["etag"], "Vary": "Accept, Accept-Encoding"}
+        if request.headers.get("if-none-match") == entry["etag"]:
+            metrics.inc("http_requests_total", path="/services", status=304, cache=cache)
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        with metrics.span("services_compress", encoding=encoding):
+            body = catalog_cache.body(entry, encoding)
+    metrics.inc("http_requests_total", path="/services", status=200, cache=cache)
+    return Response(body, media_type=media_type, headers=headers)
+
+
+@app.get("/facets")
+async def get_facets(
+    request: Request,
+    category: list[str] | None = Query(None, description="현재 선택한 카테고리 (있으면 그 결과 안에서 집계)"),
+    match: str = Query("any", pattern="^(any|all)$"),
+    exclude: list[str] | None = Query(None),
+):
+    """카테고리별 건수와 정부/기업 구분 건수. 필터 버튼과 결과 수를 전체 목록 없이 그리기 위함"""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    key = ("facets", tuple(sorted(category or [])), match, tuple(sorted(exclude or [])))
+    entry = catalog_cache.get(key)
+    cache = "hit"
+    if entry is None:
+        cache = "miss"
+        catalog = current_catalog() or await refresh_catalog()
+        with metrics.span("facets"):
+            entry = catalog_cache.put(key, dumps_json(catalog.facets(category, match, exclude)))
+
+    headers = {"ETag": entry["etag"], "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == entry["etag"]:
+        metrics.inc("http_requests_total", path="/facets", status=304, cache=cache)
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    metrics.inc("http_requests_total", path="/facets", status=200, cache=cache)
+    return Response(catalog_cache.body(entry, encoding), media_type=JSON_TYPE, headers=headers)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 텍스트 형식의 카운터/히스토그램"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 
-        cat_map = {}
-        for c in categories:
-            sid = c["서비스ID"]
-            cat_map.setdefault(sid, []).append(c["카테고리"])
+@app.post("/cache/invalidate")
+async def invalidate_cache(x_admin_token: str = Header("")):
+    """새 데이터 배포 후 메모리 카탈로그를 DB에서 다시 읽고 직렬화 캐시를 비움"""
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403)
+    catalog = await refresh_catalog()
+    return {"invalidated": True, "services": len(catalog)}
 
-        for s in services:
-            s["카테고리"] = cat_map.get(s["서비스ID"], [])
 
-    return {"data": services}
+@app.post("/catalog/rows")
+async def update_catalog_rows(ids: list[str] = Body(..., embed=True), x_admin_token: str = Header("")):
+    """수집/분류가 쓴 행만 다시 읽어 메모리 카탈로그와 건수에 반영 (전체 재적재 없음).
+    DB에 없는 ids는 삭제된 행으로 보고 카탈로그에서 제거"""
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403)
+    if current_catalog() is None:
+        catalog = await refresh_catalog()
+        return {"updated": len(ids), "added": 0, "removed": 0, "services": len(catalog)}
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(services_query(ids=ids))
+        services = [to_service(row) for row in result.mappings().all()]
+    # 조회하는 동안 주기 갱신으로 카탈로그가 교체됐을 수 있으므로 지금 것에 반영
+    catalog = current_catalog()
+    added = catalog.upsert(services)
+    removed = catalog.remove(set(ids) - {s["서비스ID"] for s in services})
+    catalog_cache.invalidate()
+    return {"updated": len(services), "added": added, "removed": removed}
 
 
 if __name__ == "__main__":
-    import uvicorn, os
+    import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port)
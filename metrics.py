@@ -0,0 +1,209 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+# ========================================
+# 계측: 구간(span) 타이머 + 카운터/히스토그램
+# ========================================
+# API 프로세스는 /metrics 로 Prometheus 텍스트 형식을 내보내고,
+# 배치 스크립트는 종료 시 write_run_summary()로 단계별 소요 시간을 JSON으로 남김.
+#   with span("fetch_list"): ...          async with span("llm_chat", model=m): ...
+#   @timed("fetch_rendered")              inc("llm_tokens_total", n, kind="prompt")
+
+METRICS_RUN_DIR = os.getenv(
+    "METRICS_RUN_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs")
+)
+# 1이면 구간이 끝날 때마다 부모 경로와 소요 시간을 출력
+METRICS_TRACE = os.getenv("METRICS_TRACE", "") == "1"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+HELP = {
+    "span_seconds": "구간별 소요 시간",
+    "span_errors_total": "예외로 끝난 구간 수",
+    "llm_requests_total": "LLM 호출 수 (결과별)",
+    "llm_tokens_total": "LLM 토큰 수 (prompt/completion)",
+    "http_requests_total": "HTTP 응답 수 (경로/상태별)",
+    "db_rows_written_total": "DB에 쓴 행 수",
+    "url_checks_total": "URL 접속 검사 수 (결과별)",
+    "prompt_input_tokens_total": "LLM 입력 추정 토큰 수 (남긴 양/줄인 양)",
+    "discovery_queries_total": "사이트 검색어 수 (검색/캐시/오류)",
+}
+
+_current_span = contextvars.ContextVar("current_span", default="")
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Registry:
+    """프로세스 안의 카운터/히스토그램 저장소 (스레드 안전)"""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0,
+                                            "count": 0, "max": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    h["buckets"][i] += 1
+            h["sum"] += value
+            h["count"] += 1
+            h["max"] = max(h["max"], value)
+
+    def render(self) -> str:
+        """Prometheus 텍스트 노출 형식"""
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+        seen = set()
+        for (name, key), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+            lines.append(f"{name}{_format_labels(key)} {value}")
+        for (name, key), h in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+            for bound, count in zip(self.buckets, h["buckets"]):
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', str(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {h['count']}")
+            lines.append(f"{name}_sum{_format_labels(key)} {h['sum']}")
+            lines.append(f"{name}_count{_format_labels(key)} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """구간별 횟수/합계/평균/최대 + 카운터 (배치 실행 요약용)"""
+        with self.lock:
+            spans = {}
+            for (name, key), h in self.histograms.items():
+                label = ",".join(f"{k}={v}" for k, v in key) or name
+                spans[label] = {
+                    "count": h["count"],
+                    "total_s": round(h["sum"], 3),
+                    "avg_s": round(h["sum"] / h["count"], 4) if h["count"] else 0.0,
+                    "max_s": round(h["max"], 3),
+                }
+            counters = {
+                name + _format_labels(key): value for (name, key), value in self.counters.items()
+            }
+        return {"spans": spans, "counters": counters}
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started_at = time.time()
+
+
+registry = Registry()
+
+
+def inc(name: str, value: float = 1, **labels):
+    registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    registry.observe(name, value, **labels)
+
+
+class span:
+    """with / async with 둘 다 지원하는 구간 타이머. span_seconds{span=...}에 기록"""
+
+    def __init__(self, name: str, **labels):
+        self.name = name
+        self.labels = labels
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.path = f"{parent}>{self.name}" if parent else self.name
+        self._token = _current_span.set(self.path)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        registry.observe("span_seconds", self.elapsed, span=self.name, **self.labels)
+        if exc_type is not None:
+            registry.inc("span_errors_total", span=self.name, **self.labels)
+        if METRICS_TRACE:
+            print(f"[trace] {self.path} {self.elapsed:.3f}s{' !' if exc_type else ''}")
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def timed(name: str, **labels):
+    """함수 전체를 구간으로 기록하는 데코레이터 (동기/비동기 함수 모두)"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def write_run_summary(run_name: str, extra: dict | None = None, run_dir: str = METRICS_RUN_DIR) -> str:
+    """배치 실행이 끝날 때 단계별 소요 시간을 출력하고 runs/<이름>-<시각>.json 으로 저장"""
+    report = {
+        "run": run_name,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(registry.started_at)),
+        "elapsed_s": round(time.time() - registry.started_at, 3),
+        **registry.summary(),
+    }
+    if extra:
+        report["extra"] = extra
+    print(f"[계측] {run_name} {report['elapsed_s']}s")
+    for label, s in sorted(report["spans"].items(), key=lambda kv: -kv[1]["total_s"]):
+        print(f"  {label:<40} {s['count']:>6}회 합계 {s['total_s']:>9.3f}s 평균 {s['avg_s']:.4f}s 최대 {s['max_s']:.3f}s")
+    os.makedirs(run_dir, exist_ok=True)
+    path = os.path.join(run_dir, f"{run_name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
@@ -0,0 +1,133 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# ========================================
+# 페이지 저장소 (조건부 재크롤링용)
+# ========================================
+
+# 정규화 URL별 ETag / Last-Modified / 본문 해시 / LLM 판정 결과를 저장.
+# 기본은 저장소 루트의 파일 (jobs.sqlite 옆) → 실행 간, 그리고 MCP 서버/클라이언트 프로세스 간에 공유.
+# 비우면 메모리 DB (실행 간 유지되지 않음)
+PAGE_DB_PATH = os.getenv(
+    "CRAWL_PAGE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages.sqlite")
+)
+
+
+def content_hash(text: str) -> str:
+    """공백 차이는 무시하고 추출 본문의 해시 계산"""
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def response_validators(headers: dict | None) -> tuple[str, str]:
+    """응답 헤더에서 (ETag, Last-Modified) 추출"""
+    if not headers:
+        return "", ""
+    lower = {k.lower(): v for k, v in headers.items()}
+    return lower.get("etag", ""), lower.get("last-modified", "")
+
+
+class PageStore:
+    def __init__(self, path: str = PAGE_DB_PATH):
+        # 여러 프로세스(크롤러 서버, MCP 클라이언트)가 같은 파일을 씀
+        self.conn = sqlite3.connect(path or ":memory:", timeout=30)
+        if path:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " content_hash TEXT,"
+            " title TEXT,"
+            " links TEXT,"
+            " result TEXT,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, url: str) -> dict | None:
+        row = self.conn.execute(
+            "SELECT etag, last_modified, content_hash, title, links, result"
+            " FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, chash, title, links, result = row
+        return {
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+            "content_hash": chash or "",
+            "title": title or "",
+            "links": json.loads(links) if links else [],
+            "result": result,
+        }
+
+    def conditional_headers(self, url: str) -> dict:
+        """이전 응답의 검증자로 If-None-Match / If-Modified-Since 헤더 생성"""
+        cached = self.get(url)
+        if not cached:
+            return {}
+        headers = {}
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
+    def save(self, url: str, title: str, snippet: str, links: list,
+             headers: dict | None = None) -> bool:
+        """페이지 기록 갱신. 본문 해시가 이전과 다르면(또는 처음이면) True"""
+        cached = self.get(url)
+        etag, last_modified = response_validators(headers)
+        chash = content_hash(snippet)
+        changed = cached is None or cached["content_hash"] != chash
+        # 내용이 바뀌면 이전 LLM 판정은 무효
+        result = None if changed else cached["result"]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages"
+            " (url, etag, last_modified, content_hash, title, links, result, fetched_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, chash, title,
+             json.dumps(links, ensure_ascii=False), result, time.time()),
+        )
+        self.conn.commit()
+        return changed
+
+    def save_result(self, url: str, result: str):
+        """하위 LLM 단계의 판정 결과 저장 (변경 없는 페이지에서 재사용)"""
+        self.conn.execute("UPDATE pages SET result = ? WHERE url = ?", (result, url))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+@contextlib.asynccontextmanager
+async def conditional_navigation(page, url: str, store: PageStore):
+    """이 블록 안의 page.goto(url) 메인 문서 요청에만 If-None-Match / If-Modified-Since 를 붙임.
+    서버가 304를 주면 goto 응답의 status 가 304 → 본문을 두 번 받지 않고 바로 판단.
+    (별도 조건부 GET 후 렌더링하면 바뀐 페이지나 검증자를 무시하는 서버는 두 번 내려받음)"""
+    headers = store.conditional_headers(url)
+    if not headers:
+        yield
+        return
+
+    async def handler(route, request):
+        if request.is_navigation_request():
+            await route.continue_(headers={**await request.all_headers(), **headers})
+        else:
+            await route.fallback()
+
+    def matcher(request_url: str) -> bool:
+        return request_url == url
+
+    await page.route(matcher, handler)
+    try:
+        yield
+    finally:
+        await page.unroute(matcher, handler)
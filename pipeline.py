@@ -0,0 +1,153 @@
+import asyncio
+import os
+import sys
+
+import requests
+
+from jobs import JobStore, CLASSIFY_QUEUE
+from metrics import span, write_run_summary
+
+# ========================================
+# 수집 → 분류 → 배포 파이프라인 (DAG)
+# ========================================
+#   ingest_gov (공공데이터 API) ──┐
+#   crawl_corp (MCP 기업 크롤링) ──┼─→ classify (바뀐 행만) ─→ publish (정적 스냅샷) ─→ invalidate (API 캐시)
+#   warmup (모델 미리 올리기) ─────┘
+# 선행 단계가 없는 단계끼리는 동시에 실행 (수집하는 동안 모델 서버는 모델과 분류 프롬프트를 올려 둠).
+# 단계 사이에는 전체 테이블이 아니라 바뀐 서비스ID만 작업 큐(jobs.sqlite)로 전달
+# (두 수집 단계 모두 새로 저장하거나 바뀐 행을 CLASSIFY_QUEUE에 넣음).
+# 중복 제거는 별도 단계로 두지 않음: 중복을 걸러야 아낄 수 있는 것이 그 단계의 LLM 호출이라
+# 호출 직전에 판정해야 함 → classify(DedupIndex 재사용)와 MCP 클라이언트(검증 전 스니펫 중복) 안에서 처리.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 배포 후 캐시를 비울 API 주소와 관리 토큰 (main.py의 ADMIN_TOKEN과 같은 값)
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+class Stage:
+    """command가 있으면 하위 프로세스로, func가 있으면 스레드에서 실행.
+    preview: 시작 전에 출력할 설명을 돌려주는 함수 (예: 처리 대상 건수)"""
+
+    def __init__(self, name: str, command: list | None = None, func=None,
+                 cwd: str = ROOT, deps: tuple = (), preview=None):
+        self.name = name
+        self.command = command
+        self.func = func
+        self.cwd = cwd
+        self.deps = tuple(deps)
+        self.preview = preview
+
+    async def run(self):
+        if self.func is not None:
+            return await asyncio.to_thread(self.func)
+        proc = await asyncio.create_subprocess_exec(*self.command, cwd=self.cwd)
+        code = await proc.wait()
+        if code != 0:
+            raise RuntimeError(f"{self.name} exited with {code}")
+
+
+def warm_up_models():
+    """모든 모델 서버의 상태를 확인하고 모델 + 분류 프롬프트 접두부를 올려 둠 (OLLAMA_KEEP_ALIVE 동안 유지).
+    실패해도 진행"""
+    from llm_gateway import get_gateway
+    with open(os.path.join(ROOT, "NLP", "prompt.txt"), encoding="utf-8") as f:
+        system_prompt = f.read()
+    gateway = get_gateway()
+    print(f"[pipeline] 모델 서버 상태 {gateway.run_sync(gateway.check_health())}")
+    result = gateway.run_sync(gateway.warm_up(system_prompt=system_prompt))
+    print(f"[pipeline] 워밍업 {result}")
+    return result
+
+
+def publish():
+    from export_static import export_snapshot
+    manifest = export_snapshot()
+    return manifest["version"]
+
+
+def invalidate_api_cache():
+    if not ADMIN_TOKEN:
+        print("[pipeline] ADMIN_TOKEN 없음 → API 캐시 무효화 건너뜀 (TTL 만료 후 반영)")
+        return
+    res = requests.post(f"{API_URL}/cache/invalidate", headers={"X-Admin-Token": ADMIN_TOKEN}, timeout=10)
+    res.raise_for_status()
+
+
+def changed_count() -> int:
+    """분류 단계로 넘어갈(새로 들어오거나 바뀐) 행 수"""
+    jobs = JobStore()
+    try:
+        return jobs.counts(CLASSIFY_QUEUE)["pending"]
+    finally:
+        jobs.close()
+
+
+STAGES = [
+    Stage("ingest_gov", [sys.executable, "fetch_and_save.py"]),
+    Stage("crawl_corp", [sys.executable, "client.py"], cwd=os.path.join(ROOT, "MyMCPProject")),
+    Stage("warmup", func=warm_up_models),
+    # 워밍업은 warmup 단계에서 이미 했으므로 분류 단계에서는 생략
+    Stage("classify", [sys.executable, "NLP/classify.py", "--changed-only", "--skip-warmup"],
+          deps=("ingest_gov", "crawl_corp", "warmup"), preview=lambda: f"분류 대상 {changed_count()}건"),
+    Stage("publish", func=publish, deps=("classify",)),
+    Stage("invalidate", func=invalidate_api_cache, deps=("publish",)),
+]
+
+
+async def run_pipeline(stages: list = STAGES, skip: set = frozenset()) -> dict:
+    """의존성이 끝난 단계부터 동시에 실행. 선행 단계가 실패하면 뒤 단계는 건너뜀.
+    반환: {단계: "done" | "skipped" | "failed: ..."}"""
+    by_name = {s.name: s for s in stages}
+    tasks = {}
+    status = {}
+
+    async def run_stage(stage: Stage):
+        for dep in stage.deps:
+            await tasks[dep]
+        if any(status[dep] != "done" for dep in stage.deps):
+            status[stage.name] = "skipped (upstream failed)"
+            return
+        if stage.name in skip:
+            status[stage.name] = "done"
+            print(f"[pipeline] {stage.name} 건너뜀 (--skip)")
+            return
+        if stage.preview is not None:
+            print(f"[pipeline] {stage.name}: {stage.preview()}")
+        print(f"[pipeline] {stage.name} 시작")
+        try:
+            async with span("pipeline_stage", stage=stage.name) as timer:
+                await stage.run()
+            status[stage.name] = "done"
+        except Exception as e:
+            status[stage.name] = f"failed: {e}"
+        print(f"[pipeline] {stage.name} {status[stage.name]} ({timer.elapsed:.1f}s)")
+
+    for stage in stages:
+        missing = [d for d in stage.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"{stage.name}: unknown dependency {missing}")
+    # 선언 순서대로 태스크를 만들므로 의존 단계가 항상 먼저 등록되어 있어야 함
+    for stage in stages:
+        tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+    await asyncio.gather(*tasks.values())
+    return status
+
+
+def main():
+    # 예) python pipeline.py --skip crawl_corp
+    skip = set()
+    args = sys.argv[1:]
+    for i, arg in enumerate(args):
+        if arg == "--skip" and i + 1 < len(args):
+            skip.update(args[i + 1].split(","))
+    status = asyncio.run(run_pipeline(skip=skip))
+    print(f"[pipeline] 결과 {status}")
+    write_run_summary("pipeline", {"status": status})
+    if any(v.startswith("failed") for v in status.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
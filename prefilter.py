@@ -0,0 +1,89 @@
+import os
+import re
+
+from frontier import load_category_keywords
+from dedup import DedupIndex
+
+# ========================================
+# LLM 호출 전 관련성 사전 필터
+# ========================================
+
+# 이 점수 미만이면 LLM에 보내지 않음 / 이 유사도 이상이면 중복으로 간주
+PREFILTER_MIN_SCORE = float(os.getenv("PREFILTER_MIN_SCORE", "3"))
+PREFILTER_DUP_THRESHOLD = float(os.getenv("PREFILTER_DUP_THRESHOLD", "0.9"))
+
+# 신청 페이지에서 자주 보이는 단서와 가중치
+POSITIVE_PATTERNS = [
+    (re.compile(r"(신청|접수|모집)\s*기간"), 3.0),
+    (re.compile(r"(지원|신청|선발)\s*(대상|자격)"), 3.0),
+    (re.compile(r"지원\s*(내용|금액)|장학금|지원금|생활비|등록금"), 2.0),
+    # 2025.03.01 ~ 2025.03.31, 2025년 3월 1일 - ... 형태의 기간
+    (re.compile(r"\d{4}\s*[.\-/년]\s*\d{1,2}\s*[.\-/월]\s*\d{1,2}\s*일?\s*(\([^)]*\))?\s*[~\-–]"), 3.0),
+    (re.compile(r"\d[\d,]*\s*만?\s*원"), 1.0),
+    (re.compile(r"모집|공고|선발|접수|신청방법|제출서류"), 1.0),
+]
+# 소개/안내형 페이지 단서
+NEGATIVE_PATTERNS = [
+    (re.compile(r"인사말|연혁|오시는\s*길|조직도|설립\s*취지|이사장|비전"), -2.0),
+]
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+class RelevancePrefilter:
+    """키워드/정규식 점수로 명백한 비관련 페이지와 중복 스니펫을 LLM 호출 전에 제거"""
+
+    def __init__(self, min_score: float = PREFILTER_MIN_SCORE,
+                 dup_threshold: float = PREFILTER_DUP_THRESHOLD,
+                 category_keywords: dict | None = None):
+        if category_keywords is None:
+            category_keywords = load_category_keywords()
+        self.keywords = {
+            kw for kws in category_keywords.values() for kw in kws if len(kw) >= 2
+        }
+        self.min_score = min_score
+        self.dup_threshold = dup_threshold
+        self.dedup = DedupIndex(threshold=dup_threshold)
+        self.counts = {"checked": 0, "passed": 0, "low_score": 0, "duplicate": 0}
+
+    def score(self, text: str) -> float:
+        score = 0.0
+        for pattern, weight in POSITIVE_PATTERNS + NEGATIVE_PATTERNS:
+            if pattern.search(text):
+                score += weight
+        hits = sum(1 for kw in self.keywords if kw in text)
+        return score + 0.5 * min(hits, 4)
+
+    def _is_duplicate(self, text: str) -> bool:
+        return self.dedup.add(str(len(self.dedup)), text) is not None
+
+    def check(self, text: str) -> tuple[bool, str]:
+        """(LLM에 보낼지 여부, 사유)"""
+        self.counts["checked"] += 1
+        text = _normalize(text)
+        score = self.score(text)
+        if score < self.min_score:
+            self.counts["low_score"] += 1
+            return False, f"점수 {score:.1f} < {self.min_score}"
+        if self._is_duplicate(text):
+            self.counts["duplicate"] += 1
+            return False, "중복 스니펫"
+        self.counts["passed"] += 1
+        return True, f"점수 {score:.1f}"
+
+    def filter(self, items: list, key: str = "snippet") -> list:
+        kept = []
+        for item in items:
+            keep, reason = self.check(item.get(key, ""))
+            if keep:
+                kept.append(item)
+            else:
+                print(f"[사전필터 제외] {item.get('url', '')} | {reason}")
+        return kept
+
+    def stats(self) -> dict:
+        c = dict(self.counts)
+        c["llm_calls_avoided"] = c["low_score"] + c["duplicate"]
+        return c
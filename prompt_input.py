@@ -0,0 +1,172 @@
+import math
+import os
+import re
+
+import metrics
+
+# ========================================
+# LLM 프롬프트 입력 줄이기 (토큰 예산)
+# ========================================
+# 긴 본문을 그대로 보내지 않고 문장 단위로 나눈 뒤
+#   1) 반복되는 줄/메뉴·저작권 같은 상투 문구 제거
+#   2) 지원대상(자격)·지원금액·신청기간 단서가 있는 문장 우선
+#   3) 예산(추정 토큰 수) 안에 들어가는 만큼만 원래 순서대로 남김
+# 줄인 양은 prompt_input_tokens_total{stage, kind=kept|trimmed} 에 기록.
+
+# 분류 입력(정책명/지원대상/참고사항/상세내용) / 크롤링 스니펫의 토큰 예산
+PROMPT_INPUT_BUDGET = int(os.getenv("PROMPT_INPUT_BUDGET", "800"))
+CRAWL_SNIPPET_BUDGET = int(os.getenv("CRAWL_SNIPPET_BUDGET", "1000"))
+# 남은 예산이 이보다 적으면 잘린 문장 조각을 붙이지 않음
+MIN_FRAGMENT_TOKENS = 8
+
+HANGUL = re.compile(r"[가-힣]")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?。])\s+|(?<=다\.)\s*|\s*(?=[○◦•※▶■□◆❍]|\s-\s)")
+
+# 문장 우선순위 단서 (여러 종류가 겹칠수록 먼저 남김)
+CUES = [
+    # 지원대상·자격
+    (re.compile(r"대상|자격|요건|조건|기준|소득|연령|만\s*\d+\s*세|거주|가구|재학|해당자|선정"), 3.0),
+    # 지원금액
+    (re.compile(r"\d[\d,]*\s*(만|천|억)?\s*원|지원금|장학금|등록금|생활비|금액|한도|지급|%"), 2.0),
+    # 신청기간·방법
+    (re.compile(r"기간|마감|접수|신청|까지|\d{4}\s*[.\-/년]\s*\d{1,2}|\d{1,2}\s*월\s*\d{1,2}\s*일|[~∼]"), 2.0),
+]
+# 페이지마다 붙는 상투 문구
+BOILERPLATE = re.compile(
+    r"copyright|all rights reserved|ⓒ|©|개인정보\s*처리\s*방침|이용약관|바로가기|본문\s*바로|"
+    r"로그인|회원가입|사이트맵|top\s*$|맨\s*위로|이전\s*글|다음\s*글|목록\s*$|인쇄\s*$|공유하기",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 대략치: 한글은 1.5자, 그 밖의 공백 아닌 문자는 4자당 1토큰"""
+    if not text:
+        return 0
+    hangul = len(HANGUL.findall(text))
+    other = len(text) - hangul - text.count(" ")
+    return math.ceil(hangul / 1.5 + max(other, 0) / 4)
+
+
+def split_sentences(text: str) -> list:
+    """줄과 문장 끝/글머리 기호 기준으로 나눈 공백 정리된 문장 목록"""
+    sentences = []
+    for line in (text or "").splitlines():
+        for part in SENTENCE_SPLIT.split(line):
+            part = " ".join((part or "").split())
+            if part:
+                sentences.append(part)
+    return sentences
+
+
+def cue_score(sentence: str) -> float:
+    return sum(weight for pattern, weight in CUES if pattern.search(sentence))
+
+
+def _drop_boilerplate(sentences: list, seen: set, stats: dict) -> list:
+    kept = []
+    for s in sentences:
+        key = s.lower()
+        if key in seen or (len(s) < 40 and BOILERPLATE.search(s)):
+            stats["boilerplate"] += 1
+            continue
+        seen.add(key)
+        kept.append(s)
+    return kept
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """추정 토큰 수가 budget 이하가 되는 가장 긴 앞부분 (가능하면 단어 경계에서 자름)"""
+    if estimate_tokens(text) <= budget:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    cut = text[:lo]
+    space = cut.rfind(" ")
+    if space > lo // 2:
+        cut = cut[:space]
+    return cut.rstrip()
+
+
+def _select(sentences: list, budget: int, weights: list | None = None) -> list:
+    """단서 점수(+가중치) 높은 문장부터 예산을 채우고, 고른 문장은 원래 순서로 [(인덱스, 문장)] 반환.
+    들어가지 않은 문장 중 가장 우선인 것은 남은 예산만큼 잘라 넣음 (긴 한 줄 본문이 통째로 빠지지 않도록)"""
+    weights = weights or [0.0] * len(sentences)
+    order = sorted(
+        range(len(sentences)),
+        # 같은 점수면 앞 문장 우선 (첫 문장은 대개 제목/요약)
+        key=lambda i: (-(cue_score(sentences[i]) + weights[i] + (1.0 if i == 0 else 0.0)), i),
+    )
+    chosen, used, oversize = {}, 0, None
+    for i in order:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost > budget:
+            if oversize is None:
+                oversize = i
+            continue
+        chosen[i] = sentences[i]
+        used += cost
+    if oversize is not None and budget - used - 1 >= MIN_FRAGMENT_TOKENS:
+        fragment = truncate_tokens(sentences[oversize], budget - used - 1)
+        if fragment:
+            chosen[oversize] = fragment
+    return sorted(chosen.items())
+
+
+def record(stage: str, stats: dict):
+    """fit_* 통계를 계측에 반영 (다른 프로세스에서 줄인 경우 부모 프로세스에서 호출)"""
+    metrics.inc("prompt_input_tokens_total", stats["tokens_out"], stage=stage, kind="kept")
+    metrics.inc("prompt_input_tokens_total", stats["trimmed"], stage=stage, kind="trimmed")
+
+
+def _record(stage: str | None, before: int, after: int, stats: dict) -> dict:
+    stats.update({"tokens_in": before, "tokens_out": after, "trimmed": max(before - after, 0)})
+    if stage is not None:
+        record(stage, stats)
+    return stats
+
+
+def fit_text(text: str, budget: int = CRAWL_SNIPPET_BUDGET, stage: str | None = "crawl_snippet") -> tuple[str, dict]:
+    """본문 하나를 예산에 맞춤. (줄인 본문, 통계) 반환. stage=None 이면 계측하지 않음"""
+    stats = {"sentences": 0, "dropped": 0, "boilerplate": 0}
+    sentences = _drop_boilerplate(split_sentences(text), set(), stats)
+    before = estimate_tokens(" ".join(split_sentences(text)))
+    chosen = _select(sentences, budget)
+    stats["sentences"] = len(sentences)
+    stats["dropped"] = len(sentences) - len(chosen)
+    result = " ".join(text for _, text in chosen)
+    return result, _record(stage, before, estimate_tokens(result), stats)
+
+
+def fit_sections(sections: list, budget: int = PROMPT_INPUT_BUDGET, stage: str = "classify_input",
+                 separator: str = " | ") -> tuple[str, dict]:
+    """(라벨, 본문, 가중치) 목록을 예산에 맞춰 '라벨: 문장...' 형태로 연결.
+    가중치가 큰 섹션(정책명·지원대상 등 짧고 중요한 필드)의 문장이 먼저 남음"""
+    stats = {"sentences": 0, "dropped": 0, "boilerplate": 0}
+    seen = set()
+    flat, weights, owner = [], [], []
+    before = 0
+    for index, (label, text, weight) in enumerate(sections):
+        raw = split_sentences(text)
+        before += estimate_tokens(label) + estimate_tokens(" ".join(raw))
+        for s in _drop_boilerplate(raw, seen, stats):
+            flat.append(s)
+            weights.append(weight)
+            owner.append(index)
+    label_cost = sum(estimate_tokens(label) + 1 for label, _, _ in sections)
+    chosen = _select(flat, max(budget - label_cost, 0), weights)
+    stats["sentences"] = len(flat)
+    stats["dropped"] = len(flat) - len(chosen)
+
+    parts = []
+    for index, (label, _, _) in enumerate(sections):
+        body = " ".join(text for i, text in chosen if owner[i] == index)
+        if body:
+            parts.append(f"{label}: {body}")
+    result = separator.join(parts)
+    return result, _record(stage, before, estimate_tokens(result), stats)
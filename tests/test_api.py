@@ -0,0 +1,17 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_api_starts_when_catalog_load_fails(monkeypatch):
+    async def unreachable():
+        raise ConnectionError("db down")
+
+    monkeypatch.setattr(main, "refresh_catalog", unreachable)
+    with TestClient(main.app) as client:
+        assert client.get("/metrics").status_code == 200
@@ -0,0 +1,90 @@
+from catalog import ColumnarCatalog
+
+CATEGORIES = ("주거", "교육", "의료")
+
+
+def service(sid, *cats, title="정책"):
+    return {"서비스ID": sid, "정책명": title, "링크": "", "지원대상": "", "참고사항": "", "상세내용": "",
+            "카테고리": list(cats)}
+
+
+def make_catalog():
+    return ColumnarCatalog([
+        service("WLF001", "주거"),
+        service("WLF002", "주거", "교육"),
+        service("0123456789abcdef0123", "의료"),
+    ], CATEGORIES)
+
+
+def test_filters_use_category_masks():
+    catalog = make_catalog()
+    ids = lambda idx: [r["서비스ID"] for r in catalog.rows(idx)]
+    assert ids(catalog.select(["주거"])) == ["WLF001", "WLF002"]
+    assert ids(catalog.select(["주거", "교육"], match="all")) == ["WLF002"]
+    assert ids(catalog.select(exclude=["교육"])) == ["WLF001", "0123456789abcdef0123"]
+    assert len(catalog.select(["없는 카테고리"], match="all")) == 0
+
+
+def test_upsert_updates_counts_incrementally():
+    catalog = make_catalog()
+    assert catalog.upsert([service("WLF001", "의료", title="바뀐 정책"), service("WLF003", "교육")]) == 1
+    facets = catalog.facets()
+    assert facets["categories"] == {"주거": 1, "교육": 2, "의료": 2}
+    assert facets["providers"] == {"정부": 3, "기업": 1, "기타": 0}
+    assert catalog.rows(catalog.select(["의료"]))[0]["정책명"] == "바뀐 정책"
+    # 유지 중인 집계가 처음부터 다시 센 값과 같아야 함
+    rebuilt = ColumnarCatalog(catalog.rows(range(len(catalog))), CATEGORIES)
+    assert rebuilt.facets() == facets
+
+
+def test_remove_drops_rows_and_counts():
+    catalog = make_catalog()
+    assert catalog.remove({"WLF002", "없는ID"}) == 1
+    assert [r["서비스ID"] for r in catalog.rows(range(len(catalog)))] == ["WLF001", "0123456789abcdef0123"]
+    assert catalog.facets()["categories"] == {"주거": 1, "교육": 0, "의료": 1}
+    assert catalog.facets()["total"] == 2
+    # 제거 후에도 서비스ID → 행 위치가 맞아야 upsert 가 같은 행을 고침
+    catalog.upsert([service("0123456789abcdef0123", "교육")])
+    assert catalog.facets()["categories"] == {"주거": 1, "교육": 1, "의료": 0}
+    assert catalog.remove([]) == 0
+
+
+def test_cache_evicts_least_recently_used_entry():
+    from catalog import CatalogCache
+
+    cache = CatalogCache(ttl=60, max_entries=2, max_bytes=1 << 20)
+    cache.put("a", b"A")
+    cache.put("b", b"B")
+    assert cache.get("a") is not None
+    cache.put("c", b"C")
+    assert cache.get("b") is None
+    assert set(cache.entries) == {"a", "c"}
+    assert cache.size == 2
+
+
+def test_cache_counts_compressed_bodies_against_byte_limit():
+    from catalog import CatalogCache
+
+    cache = CatalogCache(ttl=60, max_entries=10, max_bytes=2600)
+    old = cache.put("old", b"x" * 1000)
+    new = cache.put("new", bytes(range(256)) * 6)
+    assert cache.size == 1000 + 1536
+    # 압축본이 더해져 상한을 넘으면 오래된 항목부터 빠지고 방금 쓴 항목은 남음
+    cache.body(new, "gzip")
+    assert "old" not in cache.entries and "new" in cache.entries
+    assert cache.size == new["size"]
+    assert cache.body(old, "gzip")
+    assert cache.size == new["size"]
+
+
+def test_cache_entries_expire_and_invalidate():
+    from catalog import CatalogCache
+
+    cache = CatalogCache(ttl=0, max_entries=10, max_bytes=1 << 20)
+    entry = cache.put("k", b"body")
+    assert entry["etag"].startswith('W/"')
+    assert cache.get("k") is None and cache.size == 0
+    cache = CatalogCache(ttl=60)
+    cache.put("k", b"body")
+    cache.invalidate()
+    assert cache.get("k") is None and cache.size == 0
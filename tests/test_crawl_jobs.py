@@ -0,0 +1,80 @@
+import asyncio
+
+from crawl_jobs import CrawlJobManager
+
+
+def run_manager(test, **kwargs):
+    """runner 는 결과 1건을 추가하고 gate 가 열릴 때까지 기다림"""
+    async def main():
+        gate = asyncio.Event()
+
+        async def runner(job):
+            job.add_result({"url": job.start_url, "refresh": job.refresh})
+            await gate.wait()
+
+        manager = CrawlJobManager(runner, **kwargs)
+        try:
+            await test(manager, gate)
+        finally:
+            await manager.close()
+
+    asyncio.run(main())
+
+
+def test_same_key_shares_active_and_completed_job():
+    async def test(manager, gate):
+        job = manager.submit("https://a.kr/", 2)
+        assert manager.submit("https://a.kr/", 2) is job
+        gate.set()
+        await job.done.wait()
+        assert job.status == "done"
+        assert job.to_dict(offset=1)["data"] == []
+        assert manager.submit("https://a.kr/", 2) is job
+        assert manager.submit("https://a.kr/", 1) is not job
+
+    run_manager(test)
+
+
+def test_refresh_skips_cached_and_active_jobs():
+    async def test(manager, gate):
+        job = manager.submit("https://a.kr/", 2)
+        fresh = manager.submit("https://a.kr/", 2, refresh=True)
+        assert fresh is not job and fresh.refresh
+        # 진행 중인 refresh 작업은 같은 요청끼리 공유
+        assert manager.submit("https://a.kr/", 2, refresh=True) is fresh
+        assert manager.submit("https://a.kr/", 2) is fresh
+        gate.set()
+        await asyncio.gather(job.done.wait(), fresh.done.wait())
+        again = manager.submit("https://a.kr/", 2, refresh=True)
+        assert again not in (job, fresh)
+        await again.done.wait()
+
+    run_manager(test)
+
+
+def test_finished_jobs_are_trimmed_without_new_submits():
+    async def test(manager, gate):
+        gate.set()
+        jobs = [manager.submit(f"https://a.kr/{i}", 1) for i in range(3)]
+        await asyncio.gather(*(j.done.wait() for j in jobs))
+        await asyncio.sleep(0)
+        assert len(manager.jobs) == 1
+        assert manager.completed == {}
+
+    run_manager(test, history=1, result_ttl=0)
+
+
+def test_failed_job_reports_error():
+    async def main():
+        async def runner(job):
+            raise RuntimeError("browser crashed")
+
+        manager = CrawlJobManager(runner, workers=1)
+        job = manager.submit("https://a.kr/", 1)
+        await job.done.wait()
+        await manager.close()
+        assert job.to_dict()["status"] == "failed"
+        assert job.error == "browser crashed"
+        assert manager.completed == {}
+
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+from dedup import DedupIndex, MinHasher, shingles, similarity
+
+BASE = (
+    "서울특별시에 거주하는 만 19세 이상 34세 이하 무주택 청년에게 월 최대 20만원의 월세를 "
+    "12개월간 지원합니다. 신청은 복지로 누리집 또는 주민센터에서 할 수 있습니다."
+)
+
+
+def test_shingles_ignore_spacing_and_punctuation():
+    assert shingles("청년 월세, 지원!") == shingles("청년월세지원")
+    assert shingles("") == set()
+    assert shingles("abc") == {"abc"}
+
+
+def test_similarity_of_identical_and_unrelated_text():
+    hasher = MinHasher()
+    sig = hasher.signature(shingles(BASE))
+    assert similarity(sig, hasher.signature(shingles(BASE))) == 1.0
+    other = hasher.signature(shingles("노인 일자리 사업 참여자를 모집합니다. 만 65세 이상 기초연금 수급자 대상."))
+    assert similarity(sig, other) < 0.2
+
+
+def test_index_returns_original_for_near_duplicate():
+    index = DedupIndex()
+    assert index.add("gov-1", BASE) is None
+    assert index.add("corp-1", BASE + " 문의 02-120") == "gov-1"
+    # 중복은 색인하지 않음
+    assert len(index) == 1
+
+
+def test_index_keeps_distinct_policies():
+    index = DedupIndex()
+    index.add("a", BASE)
+    assert index.add("b", "저소득층 대학생에게 학기당 등록금 전액과 생활비 150만원을 지원하는 장학 사업입니다.") is None
+    assert len(index) == 2
+
+
+def test_empty_text_is_never_a_duplicate():
+    index = DedupIndex()
+    assert index.add("a", "") is None
+    assert index.add("b", "") is None
+    assert len(index) == 0
+
+
+def test_signature_matches_exact_universal_hash():
+    import hashlib
+
+    hasher = MinHasher(num_perm=16)
+    grams = shingles(BASE)
+    p, mask = (1 << 61) - 1, (1 << 32) - 1
+    xs = [int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little") for g in grams]
+    # 파이썬 정수(임의 정밀도)로 계산한 (a*x + b) mod p 와 같아야 함 (uint64 오버플로 없음)
+    expected = [min(((int(a) * x + int(b)) % p) & mask for x in xs) for a, b in zip(hasher.a, hasher.b)]
+    assert hasher.signature(grams).tolist() == expected
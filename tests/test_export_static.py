@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine
+
+import export_static
+from db import metadata, 복지서비스, 카테고리
+from export_static import build_search_index, search_grams
+
+
+def test_search_grams_match_script_rules():
+    assert search_grams("청년  월세") == {"청년", "년 ", " 월", "월세"}
+    assert search_grams("AB") == {"ab"}
+    assert search_grams("가") == set()
+
+
+def test_search_index_lists_chunks_per_gram():
+    services = [{"정책명": "청년 월세"}, {"정책명": "노인 일자리"}, {"지원대상": "청년"}]
+    index = build_search_index(services, chunk_size=2)
+    assert index["gram"] == 2
+    assert index["index"]["청년"] == [0, 1]
+    assert index["index"]["일자"] == [0]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(복지서비스.insert(), [
+            {"서비스ID": f"WLF{i:03d}", "정책명": f"정책 {i}", "상세내용": "청년 월세" if i % 2 else "노인 일자리",
+             "카테고리목록": ["주거"] if i % 2 else ["일자리"]}
+            for i in range(5)
+        ])
+        conn.execute(카테고리.insert(), [
+            {"서비스ID": f"WLF{i:03d}", "카테고리": "주거" if i % 2 else "일자리"} for i in range(5)
+        ])
+    monkeypatch.setattr(export_static, "engine", engine)
+    return engine
+
+
+def test_export_writes_versioned_shards_and_manifest(db, tmp_path):
+    manifest = export_static.export_snapshot(str(tmp_path), chunk_size=2)
+    assert manifest["total"] == 5
+    assert len(manifest["all"]) == 3
+    assert {name: c["count"] for name, c in manifest["categories"].items()} == {"일자리": 3, "주거": 2}
+    assert json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))["version"] == manifest["version"]
+
+    first = json.loads((tmp_path / manifest["all"][0]).read_text(encoding="utf-8"))
+    assert first["fields"][0] == "서비스ID"
+    assert [row[0] for row in first["rows"]] == ["WLF000", "WLF001"]
+    assert "원본해시" not in first["fields"]
+
+    search = json.loads((tmp_path / manifest["search"]).read_text(encoding="utf-8"))
+    assert search["index"]["월세"] == [0, 1]
+    assert not any(name.endswith(".gz") for name in os.listdir(tmp_path / manifest["version"]))
+
+
+def test_same_data_keeps_the_same_version(db, tmp_path):
+    first = export_static.export_snapshot(str(tmp_path), chunk_size=2)
+    second = export_static.export_snapshot(str(tmp_path), chunk_size=2)
+    assert first["version"] == second["version"]
+    assert first["hashes"] == second["hashes"]
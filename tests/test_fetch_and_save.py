@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects.sqlite import insert
+
+import fetch_and_save
+from db import metadata, 복지서비스
+
+
+def api_row(serv_id, **overrides):
+    row = {
+        "servId": serv_id,
+        "servDgst": "저소득층 대학생 등록금 지원",
+        "serv_link": f"https://www.bokjiro.go.kr/{serv_id}",
+        "tgtrDtlCn": "기초생활수급자 가구의 대학생",
+        "slctCritCn": "소득 기준 충족 시 선정",
+        "alwServCn": "등록금 전액 지원",
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+
+    def upsert_rows(rows):
+        # upsert_rows 의 MySQL ON DUPLICATE KEY 를 SQLite 문법으로
+        stmt = insert(복지서비스)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["서비스ID"],
+            set_={c: stmt.excluded[c] for c in ("정책명", "링크", "지원대상", "참고사항", "상세내용", "원본해시")},
+        )
+        with engine.begin() as conn:
+            conn.execute(stmt, [
+                dict(zip(("서비스ID", "정책명", "링크", "지원대상", "참고사항", "상세내용", "원본해시"),
+                         (r["servId"], *fetch_and_save.row_values(r), fetch_and_save.source_hash(r))))
+                for r in rows
+            ])
+
+    monkeypatch.setattr(fetch_and_save, "engine", engine)
+    monkeypatch.setattr(fetch_and_save, "upsert_rows", upsert_rows)
+    return engine
+
+
+def classify(engine, serv_id):
+    """classify.process_row 처럼 정책명/지원대상/참고사항을 생성문으로 덮어씀"""
+    with engine.begin() as conn:
+        conn.execute(
+            복지서비스.update().where(복지서비스.c.서비스ID == serv_id)
+            .values(정책명="[복지부] 대학생 등록금 지원", 지원대상="수급자 가구 대학생", 참고사항="소득 기준")
+        )
+
+
+def test_classified_rows_are_not_changed_by_same_payload(db):
+    rows = [api_row("WLF001"), api_row("WLF002")]
+    assert fetch_and_save.save_rows(rows) == ["WLF001", "WLF002"]
+    classify(db, "WLF001")
+    classify(db, "WLF002")
+
+    assert fetch_and_save.save_rows(rows) == []
+    with db.connect() as conn:
+        title = conn.execute(select(복지서비스.c.정책명).where(복지서비스.c.서비스ID == "WLF001")).scalar()
+    assert title == "[복지부] 대학생 등록금 지원"
+
+
+def test_changed_payload_is_detected(db):
+    fetch_and_save.save_rows([api_row("WLF001"), api_row("WLF002")])
+    classify(db, "WLF001")
+    rows = [api_row("WLF001", alwServCn="등록금 반액 지원"), api_row("WLF002"), api_row("WLF003")]
+    assert fetch_and_save.save_rows(rows) == ["WLF001", "WLF003"]
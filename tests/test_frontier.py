@@ -0,0 +1,74 @@
+from frontier import Frontier, LinkScorer, PriorityFrontier, VisitedStore, canonicalize_url, same_site
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTP://Example.com:80//a//b/?utm_source=x&b=2&a=1#top") == "http://example.com/a/b?a=1&b=2"
+    assert canonicalize_url("https://example.com:8443") == "https://example.com:8443/"
+    assert canonicalize_url("") == ""
+
+
+def test_same_site():
+    assert same_site("https://Example.com/a", "https://example.com/")
+    assert not same_site("https://other.com/a", "https://example.com/")
+
+
+def test_push_dedupes_canonical_urls_and_limits_depth():
+    frontier = Frontier("https://example.com/", max_depth=1)
+    assert not frontier.push("https://example.com/#main", 1)
+    assert frontier.push("https://example.com/a?utm_source=x", 1)
+    assert not frontier.push("https://example.com/a", 1)
+    assert not frontier.push("https://example.com/b", 2)
+    assert [frontier.pop() for _ in range(len(frontier))] == [
+        ("https://example.com/", 0), ("https://example.com/a", 1),
+    ]
+
+
+def test_fresh_urls_are_still_queued(tmp_path):
+    path = str(tmp_path / "visited.sqlite")
+    visited = VisitedStore(path)
+    visited.mark("https://example.com/a")
+    visited.close()
+
+    frontier = Frontier("https://example.com/", 2, VisitedStore(path))
+    # 최근 방문한 링크도 큐에 들어가야 저장된 링크로 탐색을 이어갈 수 있음
+    assert frontier.push("https://example.com/a", 1)
+    assert frontier.is_fresh("https://example.com/a")
+    assert not frontier.is_fresh("https://example.com/")
+
+    refreshed = Frontier("https://example.com/", 2, VisitedStore(path), refresh=True)
+    assert not refreshed.is_fresh("https://example.com/a")
+
+
+def test_visited_ttl_expires(tmp_path):
+    path = str(tmp_path / "visited.sqlite")
+    VisitedStore(path).mark("https://example.com/a")
+    assert VisitedStore(path, ttl=3600).is_fresh("https://example.com/a")
+    assert not VisitedStore(path, ttl=0).is_fresh("https://example.com/a")
+
+
+def test_priority_frontier_visits_apply_links_first():
+    scorer = LinkScorer(category_keywords={})
+    frontier = PriorityFrontier("https://example.com/", 2, scorer=scorer)
+    frontier.pop()
+    frontier.push("https://example.com/gallery/photo", 1, anchor_text="사진")
+    frontier.push("https://example.com/scholarship/apply", 1, anchor_text="장학생 모집 공고")
+    assert frontier.pop()[0] == "https://example.com/scholarship/apply"
+
+
+def test_priority_frontier_stops_on_low_yield():
+    frontier = PriorityFrontier("https://example.com/", 1, scorer=LinkScorer({}),
+                                max_pages=100, min_yield=0.5, yield_min_pages=4)
+    frontier.push("https://example.com/next", 1)
+    for useful in (False, False, False, True):
+        frontier.record(useful)
+    assert frontier.exhausted()
+    assert not frontier
+
+
+def test_priority_frontier_shares_admission_rules():
+    frontier = PriorityFrontier("https://example.com/", 1, scorer=LinkScorer({}))
+    assert not frontier.push("https://example.com/#top", 1)
+    assert frontier.push("https://example.com/apply?utm_source=x", 1)
+    assert not frontier.push("https://example.com/apply", 1)
+    assert not frontier.push("https://example.com/deep", 2)
+    assert len(frontier) == 2
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("lxml")
+
+import html_extract
+from html_extract import extract_page, inner_text
+
+BODY = "장학생 선발 안내입니다. 지원 대상은 도내 대학 재학생이며 신청 기간은 3월 한 달입니다. " * 3
+
+HTML = f"""
+<html><head><title> 장학 재단 | 공고 </title><script>var x = 1;</script></head>
+<body>
+  <header><a href="/login">로그인</a></header>
+  <nav class="menu"><a href="/about">재단 소개</a></nav>
+  <main>
+    <h2>2025 장학생 모집</h2>
+    <p>{BODY}</p>
+    <aside>배너</aside>
+    <a href="apply?id=3"> 신청 하기 </a>
+  </main>
+  <footer>Copyright</footer>
+</body></html>
+"""
+
+
+def test_extracts_main_text_without_noise():
+    page = extract_page(HTML, "https://a.kr/board/view")
+    assert page["title"] == "장학 재단 | 공고"
+    assert page["snippet"].startswith("2025 장학생 모집")
+    assert "배너" not in page["snippet"] and "Copyright" not in page["snippet"]
+    assert "var x" not in page["snippet"]
+    assert page["skipped"] == ""
+
+
+def test_collects_absolute_links_outside_removed_blocks():
+    anchors = extract_page(HTML, "https://a.kr/board/view")["anchors"]
+    assert ["https://a.kr/board/apply?id=3", "신청 하기"] in anchors
+    assert ["https://a.kr/about", "재단 소개"] in anchors
+    # header/footer 는 링크 수집 전에 제거
+    assert all(href != "https://a.kr/login" for href, _ in anchors)
+
+
+def test_skip_phrases_blank_the_snippet():
+    page = extract_page(HTML, "https://a.kr/", skip_phrases=("장학생 선발",))
+    assert page["snippet"] == ""
+    assert page["skipped"] == "[스킵 단어] 장학생 선발"
+
+
+def test_budget_trims_snippet():
+    page = extract_page(HTML, "https://a.kr/", budget=20)
+    assert 0 < len(page["snippet"]) < len(BODY)
+    assert page["stats"]["trimmed"] > 0
+
+
+def test_inner_text_breaks_on_block_elements():
+    import lxml.html
+
+    node = lxml.html.fragment_fromstring("<div><p>가 <b>나</b></p><!-- c -->다<ul><li>라</li></ul></div>")
+    assert inner_text(node) == "가 나\n다\n라"
+
+
+def test_extract_html_runs_without_pool(monkeypatch):
+    monkeypatch.setattr(html_extract, "EXTRACT_WORKERS", 0)
+    monkeypatch.setattr(html_extract, "_pool", None)
+    page = asyncio.run(html_extract.extract_html(HTML, "https://a.kr/"))
+    assert page["snippet"].startswith("2025 장학생 모집")
@@ -0,0 +1,81 @@
+import time
+
+from jobs import JobStore
+
+
+def make_store(tmp_path, **kwargs):
+    return JobStore(str(tmp_path / "jobs.sqlite"), **kwargs)
+
+
+def test_iterate_claims_each_job_once(tmp_path):
+    jobs = make_store(tmp_path)
+    jobs.enqueue_many("q", [1, 2, 3])
+    seen = []
+    for key, _ in jobs.iterate("q"):
+        seen.append(key)
+        jobs.complete("q", key)
+    assert seen == ["1", "2", "3"]
+    assert jobs.counts("q")["done"] == 3
+    assert not jobs.has_unfinished("q")
+
+
+def test_enqueue_many_keeps_payloads_and_ignores_existing(tmp_path):
+    jobs = make_store(tmp_path)
+    assert jobs.enqueue_many("q", ["a", "b"], [{"n": 1}, {"n": 2}]) == 2
+    jobs.enqueue_many("q", ["a"], [{"n": 99}])
+    assert dict(jobs.claim("q", 10)) == {"a": {"n": 1}, "b": {"n": 2}}
+
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    jobs = make_store(tmp_path, lease_seconds=0.01)
+    jobs.enqueue("q", "a")
+    assert jobs.claim("q") == [("a", None)]
+    assert jobs.claim("q") == []
+    time.sleep(0.02)
+    assert jobs.claim("q") == [("a", None)]
+
+
+def test_fail_retries_until_max_attempts(tmp_path):
+    jobs = make_store(tmp_path, max_attempts=2)
+    jobs.enqueue("q", "a")
+    for _ in range(2):
+        key, _ = jobs.claim("q")[0]
+        jobs.fail("q", key, "boom")
+    assert jobs.counts("q") == {"pending": 0, "running": 0, "done": 0, "failed": 1}
+
+
+def test_requeue_reopens_finished_jobs(tmp_path):
+    jobs = make_store(tmp_path)
+    jobs.enqueue("q", "a")
+    jobs.complete("q", jobs.claim("q")[0][0])
+    jobs.requeue("q", ["a", "b"])
+    assert jobs.counts("q")["pending"] == 2
+
+
+def test_begin_pass_resumes_unfinished_queue(tmp_path):
+    jobs = make_store(tmp_path)
+    assert jobs.begin_pass("q")
+    jobs.enqueue_many("q", [1, 2])
+    jobs.complete("q", jobs.claim("q")[0][0])
+    # 중단된 패스: 기록을 유지하고 남은 작업만 이어서
+    assert not jobs.begin_pass("q")
+    assert jobs.counts("q") == {"pending": 1, "running": 0, "done": 1, "failed": 0}
+
+
+def test_begin_pass_starts_over_after_finished_pass(tmp_path):
+    jobs = make_store(tmp_path)
+    jobs.enqueue_many("q", [1, 2])
+    for key, _ in jobs.iterate("q"):
+        jobs.complete("q", key)
+    assert jobs.begin_pass("q")
+    jobs.enqueue_many("q", [1, 2])
+    assert jobs.counts("q")["pending"] == 2
+
+
+def test_begin_pass_force_discards_unfinished(tmp_path):
+    jobs = make_store(tmp_path)
+    jobs.enqueue("q", "a")
+    jobs.enqueue("other", "a")
+    assert jobs.begin_pass("q", force=True)
+    assert jobs.counts("q")["pending"] == 0
+    assert jobs.counts("other")["pending"] == 1
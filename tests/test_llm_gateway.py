@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from fake_llm import FakeModel, FakeOllamaClient
+from llm_gateway import LLMGateway
+
+
+def make_gateway(hosts=("http://a", "http://b"), **kwargs):
+    return LLMGateway(list(hosts), backend="fake", keep_alive="", options={}, **kwargs)
+
+
+def test_closed_loop_clients_are_dropped():
+    gateway = make_gateway()
+    for _ in range(3):
+        asyncio.run(gateway.chat([{"role": "user", "content": "장학금"}]))
+        # 지금까지 끝난 루프 중 마지막 것만 남음 (다음 _state() 때 정리)
+        assert len(gateway._per_loop) == 1
+
+
+def test_check_health_marks_unreachable_hosts_down():
+    class DownClient(FakeOllamaClient):
+        async def list(self):
+            raise ConnectionError("refused")
+
+    gateway = make_gateway()
+
+    async def run():
+        state = gateway._state()
+        state["clients"]["http://b"] = DownClient(FakeModel())
+        return await gateway.check_health()
+
+    assert asyncio.run(run()) == {"http://a": True, "http://b": False}
+    assert [h.healthy for h in gateway.hosts] == [True, False]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """재시도 대기(asyncio.sleep)를 기다리지 않고 기록"""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args):
+        # asyncio.sleep 자체를 바꾸므로 가짜 모델의 지연(0초)은 빼고 기록
+        if delay:
+            delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr("llm_gateway.asyncio.sleep", fake_sleep)
+    return delays
+
+
+def with_clients(gateway, clients: dict):
+    """주소별 클라이언트를 지정한 뒤 chat 실행"""
+    async def run(coro_factory):
+        state = gateway._state()
+        state["clients"].update(clients)
+        return await coro_factory()
+    return run
+
+
+def test_failover_to_next_host_without_backoff(sleeps):
+    gateway = make_gateway(retries=2)
+    run = with_clients(gateway, {
+        "http://a": FakeOllamaClient(FakeModel(error_rate=1.0, seed=1)),
+        "http://b": FakeOllamaClient(FakeModel(rules=[])),
+    })
+    # 두 서버가 비어 있으면 a 를 먼저 고르므로 a 실패 → b 로 넘어감
+    assert asyncio.run(run(lambda: gateway.chat([{"role": "user", "content": "안녕"}]))) == "정상"
+    stats = gateway.stats()
+    assert stats["failovers"] == 1 and stats["retries"] == 1 and stats["failures"] == 0
+    assert [h["errors"] for h in stats["hosts"]] == [1, 0]
+    assert sleeps == []
+
+
+def test_backoff_after_all_hosts_failed_then_raise(sleeps):
+    gateway = make_gateway(hosts=("http://a",), retries=2)
+    run = with_clients(gateway, {"http://a": FakeOllamaClient(FakeModel(error_rate=1.0, seed=1))})
+    try:
+        asyncio.run(run(lambda: gateway.chat([{"role": "user", "content": "안녕"}])))
+        raise AssertionError("expected failure")
+    except Exception as e:
+        assert getattr(e, "status_code", None) == 503
+    assert sleeps == [1, 2]
+    assert gateway.stats()["failures"] == 1
+    assert gateway.hosts[0].outstanding == 0
+
+
+def test_client_errors_are_not_retried():
+    from fake_llm import FakeModelError
+
+    class MissingModel(FakeOllamaClient):
+        calls = 0
+
+        async def chat(self, **kwargs):
+            MissingModel.calls += 1
+            raise FakeModelError("model not found", status_code=404)
+
+    gateway = make_gateway(retries=3)
+    run = with_clients(gateway, {"http://a": MissingModel(FakeModel()), "http://b": MissingModel(FakeModel())})
+    try:
+        asyncio.run(run(lambda: gateway.chat([{"role": "user", "content": "x"}])))
+        raise AssertionError("expected failure")
+    except FakeModelError:
+        pass
+    assert MissingModel.calls == 1
+
+
+def test_requests_spread_to_least_loaded_host():
+    gateway = make_gateway(concurrency=1)
+    model = FakeModel(latency="fixed:0.01", rules=[])
+    run = with_clients(gateway, {"http://a": FakeOllamaClient(model), "http://b": FakeOllamaClient(model)})
+
+    async def burst():
+        return await asyncio.gather(*[gateway.chat([{"role": "user", "content": str(i)}]) for i in range(4)])
+
+    assert asyncio.run(run(burst)) == ["정상"] * 4
+    assert [h.requests for h in gateway.hosts] == [2, 2]
+    assert model.stats["max_in_flight"] == 2
+
+
+def test_pinned_options_and_keep_alive_are_sent():
+    seen = {}
+
+    class Recorder(FakeOllamaClient):
+        async def chat(self, model="", messages=None, **kwargs):
+            seen.update(kwargs)
+            return await super().chat(model=model, messages=messages)
+
+    gateway = LLMGateway(["http://a"], backend="fake", keep_alive="30m", options={"num_ctx": 8192})
+    run = with_clients(gateway, {"http://a": Recorder(FakeModel(rules=[]))})
+    asyncio.run(run(lambda: gateway.chat([{"role": "user", "content": "x"}], options={"temperature": 0})))
+    assert seen == {"keep_alive": "30m", "options": {"num_ctx": 8192, "temperature": 0}}
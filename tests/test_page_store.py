@@ -0,0 +1,108 @@
+import asyncio
+
+from page_store import PageStore, conditional_navigation, content_hash, response_validators
+
+
+def test_content_hash_ignores_whitespace():
+    assert content_hash("장학금  신청\n안내") == content_hash("장학금 신청 안내")
+
+
+def test_response_validators_are_case_insensitive():
+    assert response_validators({"ETag": '"v1"', "last-modified": "Mon"}) == ('"v1"', "Mon")
+    assert response_validators(None) == ("", "")
+
+
+def test_store_persists_across_instances(tmp_path):
+    path = str(tmp_path / "pages.sqlite")
+    store = PageStore(path)
+    assert store.save("https://a.kr/", "제목", "본문", [["https://a.kr/x", "링크"]], {"ETag": '"v1"'})
+    store.save_result("https://a.kr/", "VALID")
+    store.close()
+
+    store = PageStore(path)
+    cached = store.get("https://a.kr/")
+    assert cached["result"] == "VALID"
+    assert cached["links"] == [["https://a.kr/x", "링크"]]
+    assert store.conditional_headers("https://a.kr/") == {"If-None-Match": '"v1"'}
+
+
+def test_changed_content_clears_previous_result(tmp_path):
+    store = PageStore(str(tmp_path / "pages.sqlite"))
+    store.save("u", "t", "본문", [])
+    store.save_result("u", "VALID")
+    assert not store.save("u", "t", "본문 ", [])
+    assert store.get("u")["result"] == "VALID"
+    assert store.save("u", "t", "바뀐 본문", [])
+    assert store.get("u")["result"] is None
+
+
+class FakeRequest:
+    def __init__(self, navigation):
+        self.navigation = navigation
+
+    def is_navigation_request(self):
+        return self.navigation
+
+    async def all_headers(self):
+        return {"user-agent": "bot"}
+
+
+class FakeRoute:
+    def __init__(self):
+        self.continued = None
+        self.fell_back = False
+
+    async def continue_(self, headers=None):
+        self.continued = headers
+
+    async def fallback(self):
+        self.fell_back = True
+
+
+class FakePage:
+    """page.route / page.unroute 만 흉내 (등록된 핸들러를 직접 호출)"""
+
+    def __init__(self):
+        self.routes = []
+
+    async def route(self, matcher, handler):
+        self.routes.append((matcher, handler))
+
+    async def unroute(self, matcher, handler):
+        self.routes.remove((matcher, handler))
+
+    async def request(self, url, navigation=True):
+        route = FakeRoute()
+        for matcher, handler in self.routes:
+            if matcher(url):
+                await handler(route, FakeRequest(navigation))
+        return route
+
+
+def test_conditional_navigation_adds_validators_to_main_request_only(tmp_path):
+    store = PageStore(str(tmp_path / "pages.sqlite"))
+    store.save("https://a.kr/", "제목", "본문", [], {"ETag": '"v1"'})
+    page = FakePage()
+
+    async def run():
+        async with conditional_navigation(page, "https://a.kr/", store):
+            main = await page.request("https://a.kr/")
+            asset = await page.request("https://a.kr/", navigation=False)
+            other = await page.request("https://a.kr/other")
+        return main, asset, other
+
+    main, asset, other = asyncio.run(run())
+    assert main.continued == {"user-agent": "bot", "If-None-Match": '"v1"'}
+    assert asset.fell_back and asset.continued is None
+    assert other.continued is None and not other.fell_back
+    assert page.routes == []
+
+
+def test_conditional_navigation_without_record_does_not_route(tmp_path):
+    page = FakePage()
+
+    async def run():
+        async with conditional_navigation(page, "https://a.kr/", PageStore(str(tmp_path / "p.sqlite"))):
+            assert page.routes == []
+
+    asyncio.run(run())
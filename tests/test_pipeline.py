@@ -0,0 +1,34 @@
+import asyncio
+
+import pipeline
+from pipeline import Stage, run_pipeline
+
+
+def test_classify_waits_for_both_ingest_stages():
+    deps = {s.name: s.deps for s in pipeline.STAGES}
+    assert {"ingest_gov", "crawl_corp", "warmup"} <= set(deps["classify"])
+    assert "--skip-warmup" in next(s for s in pipeline.STAGES if s.name == "classify").command
+
+
+def test_stages_run_after_deps_and_skip_on_failure():
+    order = []
+
+    def step(name, fail=False):
+        def run():
+            order.append(name)
+            if fail:
+                raise RuntimeError("boom")
+        return run
+
+    stages = [
+        Stage("a", func=step("a")),
+        Stage("b", func=step("b", fail=True)),
+        Stage("c", func=step("c"), deps=("a",)),
+        Stage("d", func=step("d"), deps=("b", "c")),
+    ]
+    status = asyncio.run(run_pipeline(stages))
+    assert status["a"] == status["c"] == "done"
+    assert status["b"].startswith("failed")
+    assert status["d"].startswith("skipped")
+    assert order.index("c") > order.index("a")
+    assert "d" not in order
@@ -0,0 +1,35 @@
+from prefilter import RelevancePrefilter
+
+APPLY = ("2025년 장학생 모집 공고. 신청 기간: 2025.03.01 ~ 2025.03.31. "
+         "지원 대상: 도내 대학 재학생. 지원 금액 200만원, 제출서류는 홈페이지 참고.")
+ABOUT = "재단 인사말과 연혁, 오시는 길을 안내합니다. 이사장 인사드립니다."
+
+
+def make_prefilter(**kwargs):
+    return RelevancePrefilter(category_keywords={}, **kwargs)
+
+
+def test_application_page_passes_and_about_page_is_dropped():
+    prefilter = make_prefilter()
+    assert prefilter.check(APPLY)[0]
+    keep, reason = prefilter.check(ABOUT)
+    assert not keep and reason.startswith("점수")
+
+
+def test_repeated_snippet_is_dropped_as_duplicate():
+    prefilter = make_prefilter()
+    assert prefilter.check(APPLY)[0]
+    assert prefilter.check("  " + APPLY.replace(" ", "\n", 3)) == (False, "중복 스니펫")
+    stats = prefilter.stats()
+    assert stats == {"checked": 2, "passed": 1, "low_score": 0, "duplicate": 1, "llm_calls_avoided": 1}
+
+
+def test_category_keywords_raise_score():
+    text = "청년 월세 주거 지원"
+    assert make_prefilter().score(text) < RelevancePrefilter(category_keywords={"주거": ["월세", "주거"]}).score(text)
+
+
+def test_filter_keeps_passing_items_in_order():
+    prefilter = make_prefilter()
+    items = [{"url": "a", "snippet": APPLY}, {"url": "b", "snippet": ABOUT}, {"url": "c"}]
+    assert [i["url"] for i in prefilter.filter(items)] == ["a"]
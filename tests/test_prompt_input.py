@@ -0,0 +1,54 @@
+from prompt_input import estimate_tokens, fit_sections, fit_text, split_sentences, truncate_tokens
+
+
+def test_short_text_is_kept_whole():
+    text = "지원 대상은 만 19세 이상 청년입니다. 신청은 3월 31일까지입니다."
+    result, stats = fit_text(text, 100, stage=None)
+    assert result == text
+    assert stats["trimmed"] == 0
+
+
+def test_single_long_sentence_is_truncated_not_dropped():
+    # 정리()를 거친 상세내용처럼 문장 구분이 없는 한 줄
+    text = "소득 기준 중위소득 50퍼센트 이하 가구의 대학생에게 등록금 " * 60
+    result, stats = fit_text(text, 50, stage=None)
+    assert result
+    assert text.startswith(result)
+    assert estimate_tokens(result) <= 50
+    assert stats["tokens_out"] > 0
+
+
+def test_fit_sections_keeps_long_single_line_details():
+    details = "지원 내용 생활비 월 30만원 지급 및 주거 상담 제공 " * 80
+    result, _ = fit_sections(
+        [("정책명", "청년 주거 지원", 3.0), ("지원대상", "무주택 청년", 3.0), ("상세내용", details, 0.0)],
+        120, stage=None,
+    )
+    assert result.startswith("정책명: 청년 주거 지원 | 지원대상: 무주택 청년 | 상세내용: 지원 내용")
+    assert estimate_tokens(result) <= 130
+
+
+def test_cue_sentences_win_over_filler():
+    filler = [f"재단 소식 {i}번째 이야기입니다." for i in range(20)]
+    key = "지원 대상은 기초생활수급자 가구의 대학생입니다."
+    result, _ = fit_text("\n".join(filler + [key]), 40, stage=None)
+    assert key in result
+
+
+def test_boilerplate_and_repeats_are_dropped():
+    text = "장학금 신청 안내\n로그인\n장학금 신청 안내\nCopyright 2025 재단\n신청 기간은 5월 10일까지입니다."
+    result, stats = fit_text(text, 200, stage=None)
+    assert result == "장학금 신청 안내 신청 기간은 5월 10일까지입니다."
+    assert stats["boilerplate"] == 3
+
+
+def test_split_sentences_on_bullets_and_lines():
+    assert split_sentences("○ 대상: 청년\n○ 금액: 100만원") == ["○ 대상: 청년", "○ 금액: 100만원"]
+
+
+def test_truncate_tokens_respects_budget():
+    text = "가나다라마 " * 100
+    cut = truncate_tokens(text, 20)
+    assert estimate_tokens(cut) <= 20
+    assert text.startswith(cut)
+    assert truncate_tokens("짧은 문장", 20) == "짧은 문장"